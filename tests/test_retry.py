@@ -0,0 +1,41 @@
+import time
+
+from viewsonic_serial import ViewSonicProjector, RetryPolicy, CMD, HEADER, build_frame
+from viewsonic_simulator import ProjectorSimulator, SimulatedTransport
+
+class DroppingTransport(SimulatedTransport):
+    '''loses the first occurrence of each query in drop'''
+
+    def __init__(self, simulator, drop, **kwargs):
+        super().__init__(simulator, **kwargs)
+        self.drop = set(drop)
+
+    def write(self, data: bytes) -> int:
+        if bytes(data) in self.drop:
+            self.drop.remove(bytes(data))
+            return len(data)
+        return super().write(data)
+
+def test_reads_without_samples_fall_back_to_the_timeout_of_all_reads():
+    policy = RetryPolicy(default_timeout=10.0)
+    for i in range(policy.min_samples):
+        policy.record(False, CMD.BRIGHTNESS, 0.01)
+
+    assert policy.timeout_for(False, CMD.BRIGHTNESS) == policy.min_timeout
+    assert policy.timeout_for(False, CMD.CONTRAST) == policy.min_timeout
+    # writes are not mixed with reads
+    assert policy.timeout_for(True, CMD.CONTRAST) == 10.0
+
+def test_missed_reply_to_a_command_without_samples():
+    sim = ProjectorSimulator(latency=0.005, seed=0)
+    transport = DroppingTransport(sim, [build_frame(HEADER.READ + CMD.CONTRAST)], timeout=10.0)
+    proj = ViewSonicProjector(transport=transport, timeout=10.0)
+
+    for i in range(proj.retry_policy.min_samples):
+        proj.get_brightness()
+
+    start = time.monotonic()
+    assert proj.get_contrast() == sim.registers[CMD.CONTRAST][0]
+    # retried after the timeout learned from the other reads, not the default 10 s
+    assert time.monotonic() - start < 2.0
+    assert proj.retry_policy.retries == 1
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+from viewsonic_serial import ViewSonicProjector, exhaustive_scan, disabled_file
+from viewsonic_simulator import ProjectorSimulator, SimulatedTransport
+
+@pytest.mark.parametrize('pipeline_depth', [1, 4])
+def test_late_replies_are_not_taken_for_the_next_probe(tmp_path, pipeline_depth):
+    # a distinct value per register, about half of the replies come after the probe timeout
+    registers = {bytes([0x12, cmd3]): bytes([cmd3]) for cmd3 in range(16)}
+    sim = ProjectorSimulator(registers=registers, latency=0.05, jitter=0.1, seed=1)
+    proj = ViewSonicProjector(transport=SimulatedTransport(sim, timeout=1.0), pipeline_depth=pipeline_depth)
+
+    # only the registers are probed
+    scanfile = str(tmp_path / 'scan.json')
+    with open(disabled_file(scanfile), 'w') as f:
+        json.dump({'blocks': [], 'commands': [bytes([0x12, cmd3]).hex(' ') for cmd3 in range(16, 256)]}, f)
+
+    res = exhaustive_scan([proj], [0x12], scanfile, probe_timeout=0.1)
+
+    assert res
+    for hex, response in res.items():
+        assert bytes.fromhex(response)[7:-1] == registers[bytes.fromhex(hex)]
@@ -0,0 +1,425 @@
+import asyncio
+import time
+from typing import Optional, Dict, Callable, Awaitable, List
+
+from viewsonic_serial import (
+    ViewSonicProjector,
+    Register,
+    REGISTERS,
+    ACTIONS,
+    CMD,
+    HEADER,
+    EMPTY,
+    Adjustment,
+    PowerStatus,
+    StepDelay,
+    IncrementPlan,
+    PowerStatusPoll,
+    ExchangeEvent,
+    TransmissionError,
+    FunctionDisabled,
+    ProjectorOFF,
+    CommandFailed,
+    build_frame,
+    checksum,
+    payload_length,
+    frame_command,
+    generate_accessors,
+    print_exchange,
+    decode_error_status,
+    decode_light_source_usage_time,
+    decode_operating_temperature,
+    POWER_ON_TIMEOUT_SECONDS,
+    POWER_OFF_TIMEOUT_SECONDS,
+    POLL_INITIAL_INTERVAL_SECONDS,
+    POLL_MAX_INTERVAL_SECONDS,
+    POLL_BACKOFF_FACTOR,
+    INCREMENT_MAX_BURST,
+    INCREMENT_MAX_ROUNDS
+)
+
+DRAIN_TIMEOUT_SECONDS = 0.05
+
+async def async_wait_for_power_status(
+        read_fun: Callable[[], Awaitable[PowerStatus]],
+        target: PowerStatus,
+        transitional: List[PowerStatus],
+        timeout: float,
+        initial_interval: float = POLL_INITIAL_INTERVAL_SECONDS,
+        max_interval: float = POLL_MAX_INTERVAL_SECONDS,
+        backoff: float = POLL_BACKOFF_FACTOR
+    ) -> float:
+    '''asyncio version of wait_for_power_status'''
+
+    poll = PowerStatusPoll(target, transitional, timeout, initial_interval, max_interval, backoff)
+
+    while True:
+        try:
+            status = await read_fun()
+        except TransmissionError:
+            status = None
+
+        delay = poll.next_delay(status)
+        if delay is None:
+            return poll.elapsed
+        await asyncio.sleep(delay)
+
+async def async_set_value_by_increment(
+        read_fun: Callable[[], Awaitable[int]], 
+        increment_fun: Callable[[Adjustment], Awaitable[None]], 
+        desired_value: int,
+        step_delay: Optional[StepDelay] = None,
+        max_burst: int = INCREMENT_MAX_BURST,
+        max_rounds: int = INCREMENT_MAX_ROUNDS
+    ) -> None:
+    '''asyncio version of set_value_by_increment'''
+
+    plan = IncrementPlan(desired_value, step_delay, max_burst, max_rounds)
+    burst = plan.next_burst(await read_fun())
+
+    while burst is not None:
+        step_type, count = burst
+        for i in range(count):
+            await increment_fun(step_type)
+            if plan.step_delay.value > 0:
+                await asyncio.sleep(plan.step_delay.value) 
+        burst = plan.next_burst(await read_fun())
+
+    plan.check()
+
+class AsyncViewSonicProjector:
+    '''
+    asyncio client with the same get_/set_ surface as ViewSonicProjector.
+    Works on any asyncio byte stream (StreamReader/StreamWriter pair), so a 
+    single event loop can drive many projectors concurrently.
+
+    Every request is bounded by `timeout`. Calls can also be wrapped in 
+    asyncio.wait_for for a per-request deadline: a cancelled exchange 
+    marks the stream dirty and stale bytes are drained before the next one. 
+
+    Register accessors are generated from the same REGISTERS and ACTIONS 
+    tables as ViewSonicProjector, exchanges are reported to the same 
+    hooks (add_hook, ExchangeMetrics).
+    '''
+
+    REGISTERS: List[Register] = REGISTERS
+    ACTIONS: Dict[str, bytes] = ACTIONS
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'REGISTERS' in cls.__dict__ or 'ACTIONS' in cls.__dict__:
+            generate_accessors(cls, _make_async_accessor, _make_async_disabled)
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        timeout: Optional[float] = 10.0,
+        verbose: bool = False
+        ):
+
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        # called with an ExchangeEvent after every exchange, see add_hook
+        self.hooks: List[Callable[[ExchangeEvent], None]] = []
+        self._header_at = 0.0
+        self.verbose = verbose
+
+        self.power_transition_seconds: Dict[PowerStatus, float] = {}
+        self.step_delays: Dict[str, StepDelay] = {}
+
+        self._lock = asyncio.Lock()
+        self._dirty = False
+
+    @classmethod
+    async def open_serial(
+        cls,
+        port: str = '/dev/ttyUSB0',
+        baudrate: int = 115200,
+        timeout: Optional[float] = 10.0,
+        verbose: bool = False
+        ) -> 'AsyncViewSonicProjector':
+        '''open a serial port, requires the pyserial-asyncio package'''
+
+        if baudrate not in ViewSonicProjector.VALID_BAUD_RATES:
+            raise ValueError(f'Supported baud rates are: {ViewSonicProjector.VALID_BAUD_RATES}')
+
+        import serial_asyncio
+
+        reader, writer = await serial_asyncio.open_serial_connection(
+            url = port, 
+            baudrate = baudrate
+        )
+        return cls(reader, writer, timeout, verbose)
+    
+    @classmethod
+    async def open_connection(
+        cls,
+        host: str,
+        port: int,
+        timeout: Optional[float] = 10.0,
+        verbose: bool = False
+        ) -> 'AsyncViewSonicProjector':
+        '''connect to a serial device server (RS232 over LAN)'''
+
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, timeout, verbose)
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    async def __aenter__(self) -> 'AsyncViewSonicProjector':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    @property
+    def verbose(self) -> bool:
+        return print_exchange in self.hooks
+
+    @verbose.setter
+    def verbose(self, value: bool) -> None:
+        if value and not self.verbose:
+            self.add_hook(print_exchange)
+        elif not value and self.verbose:
+            self.remove_hook(print_exchange)
+
+    def add_hook(self, hook: Callable[[ExchangeEvent], None]) -> None:
+        '''
+        Call hook after every exchange, from the event loop. Hooks must not
+        block. Without hooks, exchanges are not timed at all.
+        '''
+        self.hooks = self.hooks + [hook]
+
+    def remove_hook(self, hook: Callable[[ExchangeEvent], None]) -> None:
+        self.hooks = [h for h in self.hooks if h is not hook]
+
+    async def power_on(self, timeout: float = POWER_ON_TIMEOUT_SECONDS) -> float:
+        '''
+        Turn the projector on and wait for the projector to warm up.
+        Returns the measured transition time in seconds.
+        '''
+
+        await self._send_write_one_byte(CMD.POWER_ON + EMPTY)
+
+        elapsed = await async_wait_for_power_status(
+            self.get_power_status,
+            target = PowerStatus.ON,
+            transitional = [PowerStatus.OFF, PowerStatus.WARM_UP],
+            timeout = timeout
+        )
+        self.power_transition_seconds[PowerStatus.ON] = elapsed
+        return elapsed
+    
+    async def power_off(self, timeout: float = POWER_OFF_TIMEOUT_SECONDS) -> float:
+        '''
+        Turn the projector off and wait for the projector to cool down.
+        Returns the measured transition time in seconds.
+        '''
+
+        await self._send_write_one_byte(CMD.POWER_OFF + EMPTY)
+
+        elapsed = await async_wait_for_power_status(
+            self.get_power_status,
+            target = PowerStatus.OFF,
+            transitional = [PowerStatus.ON, PowerStatus.COOL_DOWN],
+            timeout = timeout
+        )
+        self.power_transition_seconds[PowerStatus.OFF] = elapsed
+        return elapsed
+
+    async def _set_value_by_increment(
+            self,
+            read_fun: Callable[[], Awaitable[int]], 
+            increment_fun: Callable[[Adjustment], Awaitable[None]], 
+            desired_value: int
+        ) -> None:
+        step_delay = self.step_delays.setdefault(increment_fun.__name__, StepDelay())
+        await async_set_value_by_increment(read_fun, increment_fun, desired_value, step_delay)
+
+    async def adjust_volume(self, data: Adjustment) -> None:
+        await (self.volume_up() if data == Adjustment.INCREASE else self.volume_down())
+
+    async def set_volume(self, value: int) -> None:
+        await self._set_value_by_increment(self.get_volume, self.adjust_volume, value)
+
+    async def get_light_source_usage_time(self) -> int:
+        # special case
+        return decode_light_source_usage_time(await self._send_read(CMD.LIGHT_SOURCE_USAGE_TIME))
+
+    async def get_error_status(self) -> Dict:
+        # special case
+        return decode_error_status(await self._send_read(CMD.ERROR_STATUS))
+
+    async def get_operating_temperature(self) -> float:
+        # special case
+        return decode_operating_temperature(await self._send_read(CMD.OPERATING_TEMPERATURE))
+
+    async def _drain(self) -> None:
+        '''discard late bytes left over by a timed out or cancelled exchange'''
+
+        while True:
+            try:
+                data = await asyncio.wait_for(self.reader.read(4096), DRAIN_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                break
+        self._dirty = False
+
+    async def _read_response(self) -> bytes:
+
+        response_header = await self.reader.readexactly(HEADER.NUM_BYTES)
+        if self.hooks:
+            self._header_at = time.perf_counter()
+        response_payload = await self.reader.readexactly(payload_length(response_header))
+        return response_header + response_payload
+
+    async def _send_packet(self, packet: bytes, timeout: Optional[float] = None) -> bytes:
+
+        return await self._send_frame(build_frame(packet), timeout)
+
+    async def _send_frame(self, query: bytes, timeout: Optional[float] = None) -> bytes:
+        '''send a complete query frame, anything but an ACK to a write raises'''
+
+        if timeout is None:
+            timeout = self.timeout
+
+        hooks = self.hooks
+        response = None
+        error = None
+
+        async with self._lock:
+
+            if self._dirty:
+                await self._drain()
+
+            start = written = time.perf_counter()
+            self._header_at = 0.0
+
+            try:
+                self.writer.write(query)
+                await self.writer.drain()
+                if hooks:
+                    written = time.perf_counter()
+                response = await asyncio.wait_for(self._read_response(), timeout)
+
+            except asyncio.TimeoutError:
+                self._dirty = True
+                error = TransmissionError('failed to read response')
+            
+            except asyncio.IncompleteReadError:
+                self._dirty = True
+                error = TransmissionError('payload size mismatch')
+            
+            except asyncio.CancelledError as e:
+                self._dirty = True
+                error = e
+
+        if response is not None:
+            write, _ = frame_command(query)
+            if checksum(response[:-1]) != response[-1:]:
+                error = TransmissionError('invalid checksum')
+            elif response == HEADER.DISABLED:
+                error = FunctionDisabled()
+            elif response == HEADER.PROJ_OFF:
+                error = ProjectorOFF()
+            elif write and response != HEADER.ACK:
+                error = CommandFailed()
+
+        if hooks:
+            end = time.perf_counter()
+            header_at = max(self._header_at, written) if response is not None else end
+            self._emit(query, response, error, start, written, header_at, end)
+
+        if error is not None:
+            raise error
+
+        return response
+
+    def _emit(
+            self, 
+            query: bytes, 
+            response: Optional[bytes], 
+            error: Optional[BaseException], 
+            start: float, 
+            written: float,
+            header_at: float,
+            end: float
+        ) -> None:
+
+        write, cmd = frame_command(query)
+        event = ExchangeEvent(
+            cmd, write, bytes(query), response, error, 0, 
+            written - start, header_at - written, end - header_at
+        )
+        for hook in self.hooks:
+            hook(event)
+
+    async def _send_write_frame(self, query: bytes):
+
+        await self._send_frame(query)
+
+    async def _send_write_one_byte(self, packet: bytes):
+
+        await self._send_packet(HEADER.WRITE_ONE_BYTE + packet)
+
+    async def _send_write_two_byte(self, packet: bytes):
+
+        await self._send_packet(HEADER.WRITE_TWO_BYTE + packet)
+        
+    async def _send_read(self, packet: bytes) -> bytes:
+
+        response = await self._send_packet(HEADER.READ + packet)
+        return response
+
+    async def _send_read_one_byte(self, packet: bytes) -> bytes:
+
+        response = await self._send_read(packet) 
+        data = response[-2:-1]      
+        return data
+    
+    async def _send_read_two_byte(self, packet: bytes) -> bytes:
+
+        response = await self._send_read(packet)
+        data = response[-3:-1]
+        return data
+
+def _make_async_accessor(name: str, kind: str, reg) -> Callable:
+
+    if kind == 'get':
+        query, decode = reg.read_query, reg.decode
+        async def accessor(self):
+            return decode(await self._send_frame(query))
+
+    elif kind == 'set':
+        write_frame = reg.write_frame
+        async def accessor(self, data):
+            await self._send_write_frame(write_frame(data))
+
+    elif kind == 'adjust':
+        adjust_frame = reg.adjust_frame
+        async def accessor(self, data):
+            await self._send_write_frame(adjust_frame(data))
+
+    elif kind == 'set_by_increment':
+        getter, adjuster = 'get_' + reg.name, 'adjust_' + reg.name
+        async def accessor(self, value):
+            await self._set_value_by_increment(getattr(self, getter), getattr(self, adjuster), value)
+
+    else:
+        frame = build_frame(HEADER.WRITE_ONE_BYTE + reg + EMPTY)
+        async def accessor(self):
+            await self._send_write_frame(frame)
+
+    return accessor
+
+def _make_async_disabled(name: str) -> Callable:
+    async def accessor(self, *args):
+        raise FunctionDisabled(f'{name} is not in the register table of {type(self).__name__}')
+    return accessor
+
+generate_accessors(AsyncViewSonicProjector, _make_async_accessor, _make_async_disabled)
@@ -0,0 +1,230 @@
+'''
+Round-trip benchmarks for the RS232 protocol, against a real port or the
+simulator. Reports p50/p95/p99 latency and commands per second and can
+save / compare machine-readable baselines:
+
+    python viewsonic_benchmark.py --simulate --save baseline.json
+    python viewsonic_benchmark.py --simulate --compare baseline.json
+'''
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from typing import Optional, Dict, Callable, List
+
+from viewsonic_serial import (
+    ViewSonicProjector,
+    CMD,
+    TransmissionError,
+    exhaustive_scan,
+    BAUD_PROBE_TIMEOUT_SECONDS
+)
+
+BENCH_ITERATIONS = 100
+BENCH_SWEEP_RANGE = (-20, 20)
+BENCH_SCAN_BLOCK = 0x12
+BENCH_TOLERANCE = 0.2
+SIM_LATENCY_SECONDS = 0.002
+SIM_JITTER_SECONDS = 0.001
+
+def percentile(samples: List[float], p: float) -> float:
+    '''nearest-rank percentile'''
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+def summarize(samples: List[float], commands_per_sample: int = 1) -> Dict[str, float]:
+    '''latency statistics in milliseconds and throughput'''
+    total = sum(samples)
+    return {
+        'count': len(samples),
+        'p50_ms': 1000 * percentile(samples, 50),
+        'p95_ms': 1000 * percentile(samples, 95),
+        'p99_ms': 1000 * percentile(samples, 99),
+        'mean_ms': 1000 * total / len(samples),
+        'commands_per_second': commands_per_sample * len(samples) / total if total > 0 else float('inf')
+    }
+
+def time_calls(fun: Callable[[], object], iterations: int) -> List[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fun()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def bench_commands(proj: ViewSonicProjector, iterations: int = BENCH_ITERATIONS) -> Dict[str, Dict]:
+    '''read and write paths, including the special multi-byte reads'''
+
+    # writes put back the current value so that benchmarking changes nothing
+    blank = proj.get_blank()
+    zoom = proj.get_zoom()
+
+    cases = {
+        'read_one_byte': lambda: proj._send_read_one_byte(CMD.GAMMA),
+        'read_two_byte': lambda: proj._send_read_two_byte(CMD.BRIGHTNESS),
+        'read_error_status': lambda: proj._send_read(CMD.ERROR_STATUS),
+        'read_light_source_usage_time': lambda: proj._send_read(CMD.LIGHT_SOURCE_USAGE_TIME),
+        'write_one_byte': lambda: proj._send_write_one_byte(CMD.BLANK + blank),
+        'write_two_byte': lambda: proj._send_write_two_byte(CMD.ZOOM + zoom),
+    }
+    return {name: summarize(time_calls(fun, iterations)) for name, fun in cases.items()}
+
+def bench_sweep(proj: ViewSonicProjector, sweeps: int = 3, value_range: tuple = BENCH_SWEEP_RANGE) -> Dict:
+    '''full set_value_by_increment sweeps on brightness, restored afterwards'''
+
+    original = proj.get_brightness()
+    low, high = value_range
+    proj.set_brightness(low)
+
+    samples = []
+    for i in range(sweeps):
+        for target in (high, low):
+            start = time.perf_counter()
+            proj.set_brightness(target)
+            samples.append(time.perf_counter() - start)
+
+    proj.set_brightness(original)
+    return summarize(samples, commands_per_sample=high - low)
+
+def bench_scan(proj: ViewSonicProjector, cmd2: int = BENCH_SCAN_BLOCK) -> Dict:
+    '''exhaustive scan throughput over one cmd2 block'''
+
+    with tempfile.TemporaryDirectory() as folder:
+        scanfile = os.path.join(folder, 'scan.json')
+        start = time.perf_counter()
+        exhaustive_scan([proj], [cmd2], scanfile, resume=False, skip_disabled=False)
+        elapsed = time.perf_counter() - start
+
+    return {'count': 256, 'seconds': elapsed, 'commands_per_second': 256 / elapsed}
+
+def run(proj: ViewSonicProjector, iterations: int = BENCH_ITERATIONS, scan: bool = True) -> Dict:
+    res = {'commands': bench_commands(proj, iterations), 'sweep': bench_sweep(proj)}
+    if scan:
+        res['scan'] = bench_scan(proj)
+    return res
+
+def sweep_baudrates(
+        proj: ViewSonicProjector,
+        baudrates: List[int],
+        iterations: int = BENCH_ITERATIONS,
+        scan: bool = True,
+        probe_timeout: float = BAUD_PROBE_TIMEOUT_SECONDS
+    ) -> Dict[str, Dict]:
+    '''
+    Benchmark several baud rates on one port. The projector only answers at 
+    the rate set in its menu, rates without answer are left out of the 
+    results. The original rate of the port is restored afterwards.
+    '''
+
+    original = proj.transport.baudrate
+    results = {}
+    try:
+        for baudrate in baudrates:
+            proj.transport.baudrate = proj.baudrate = baudrate
+            # round trips measured at other rates do not apply
+            proj.retry_policy.reset()
+            try:
+                with proj.temporary_timeout(probe_timeout, attempts=1):
+                    proj.get_power_status()
+            except (TransmissionError, ValueError):
+                continue
+            results[str(baudrate)] = run(proj, iterations, scan)
+    finally:
+        proj.transport.baudrate = proj.baudrate = original
+        proj.retry_policy.reset()
+
+    return results
+
+def simulated_projector(baudrate: int, latency: float, jitter: float) -> ViewSonicProjector:
+    from viewsonic_simulator import ProjectorSimulator, SimulatedTransport
+    sim = ProjectorSimulator(latency=latency, jitter=jitter, baudrate=baudrate, seed=0)
+    return ViewSonicProjector(baudrate=baudrate, transport=SimulatedTransport(sim, timeout=0.5))
+
+def compare(current: Dict, baseline: Dict, tolerance: float = BENCH_TOLERANCE) -> List[str]:
+    '''list the metrics whose p95 latency regressed by more than tolerance'''
+
+    regressions = []
+
+    def walk(cur: Dict, base: Dict, path: str) -> None:
+        for key, value in base.items():
+            if key not in cur:
+                continue
+            if isinstance(value, dict):
+                walk(cur[key], value, f'{path}/{key}')
+            elif key == 'p95_ms' and cur[key] > value * (1 + tolerance):
+                regressions.append(f'{path}: p95 {value:.3f} ms -> {cur[key]:.3f} ms')
+            elif key == 'commands_per_second' and 'p95_ms' not in base and cur[key] < value / (1 + tolerance):
+                regressions.append(f'{path}: {value:.1f} -> {cur[key]:.1f} commands/s')
+
+    walk(current['results'], baseline['results'], '')
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', default='/dev/ttyUSB0')
+    parser.add_argument('--baudrate', type=int, action='append', help='repeat for several rates, default: all rates')
+    parser.add_argument('--simulate', action='store_true', help='benchmark the simulator instead of a real port')
+    parser.add_argument('--latency', type=float, default=SIM_LATENCY_SECONDS)
+    parser.add_argument('--jitter', type=float, default=SIM_JITTER_SECONDS)
+    parser.add_argument('--iterations', type=int, default=BENCH_ITERATIONS)
+    parser.add_argument('--no-scan', action='store_true')
+    parser.add_argument('--save', help='write results as json')
+    parser.add_argument('--compare', help='baseline json to compare against')
+    parser.add_argument('--tolerance', type=float, default=BENCH_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    baudrates = args.baudrate or ViewSonicProjector.VALID_BAUD_RATES
+
+    if args.simulate:
+        results = {}
+        for baudrate in baudrates:
+            proj = simulated_projector(baudrate, args.latency, args.jitter)
+            results[str(baudrate)] = run(proj, args.iterations, not args.no_scan)
+    else:
+        proj = ViewSonicProjector(port=args.port)
+        try:
+            results = sweep_baudrates(proj, baudrates, args.iterations, not args.no_scan)
+        finally:
+            proj.close()
+
+    for baudrate in baudrates:
+        if str(baudrate) not in results:
+            print(f'{baudrate:>6} no answer')
+            continue
+        for name, stats in results[str(baudrate)]['commands'].items():
+            print(f"{baudrate:>6} {name:<30} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  {stats['commands_per_second']:8.1f} cmd/s")
+
+    report = {
+        'meta': {
+            'time': time.time(),
+            'simulated': args.simulate,
+            'port': None if args.simulate else args.port,
+            'iterations': args.iterations,
+            'python': sys.version.split()[0]
+        },
+        'results': results
+    }
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print('REGRESSION ' + line)
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
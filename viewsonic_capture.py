@@ -0,0 +1,412 @@
+'''
+Wire captures: every byte written to and read from the projector, with
+monotonic timestamps, in a compact append-only binary log.
+
+    capture = record(proj, 'session.vscap')
+    ...
+    capture.stop()
+
+    with CaptureFile('session.vscap') as f:
+        proj = ViewSonicProjector(transport=ReplayTransport(f.records(), speed=10))
+        ...
+
+    python viewsonic_capture.py session.vscap            # hex dump
+    python viewsonic_capture.py session.vscap --parse    # parser throughput
+
+File layout: MAGIC, then records of a RECORD header (monotonic time in ns,
+kind, data length) followed by the data.
+'''
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import deque
+from typing import Optional, List, Iterable, Iterator, NamedTuple
+
+from viewsonic_serial import (
+    ViewSonicProjector,
+    FrameReader,
+    TransmissionError,
+    EXPECTED_READ_RESPONSES,
+    EXPECTED_WRITE_RESPONSES
+)
+from viewsonic_transport import Transport, MemoryTransport
+
+MAGIC = b'VSCAP\x01\n\x00'
+RECORD = struct.Struct('<QBI')
+CAPTURE_BUFFER_SIZE = 64 * 1024
+
+KIND_SESSION = ord('S')  # data: wall clock time as a double
+KIND_WRITE = ord('W')    # bytes sent to the projector
+KIND_READ = ord('R')     # bytes received from the projector
+KIND_BAUDRATE = ord('B') # data: new baud rate as uint32
+
+SESSION = struct.Struct('<d')
+BAUDRATE = struct.Struct('<I')
+
+class CaptureError(Exception):
+    pass
+
+class ReplayMismatch(Exception):
+    '''the replayed client did not send what was captured'''
+    pass
+
+class CaptureRecord(NamedTuple):
+    '''time is time.monotonic_ns() when the bytes were written or read'''
+    time: int
+    kind: int
+    data: bytes
+
+class CaptureWriter:
+    '''
+    Append records to a capture file through a write buffer.
+    A new session record marks each opening of the file.
+    '''
+
+    def __init__(self, path: str, buffer_size: int = CAPTURE_BUFFER_SIZE):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            with open(path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise CaptureError(f'{path} is not a capture file')
+
+        self.file = open(path, 'ab', buffering=buffer_size)
+        if new:
+            self.file.write(MAGIC)
+        self.write(KIND_SESSION, SESSION.pack(time.time()))
+
+    def __enter__(self) -> 'CaptureWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, kind: int, data) -> None:
+        self.file.write(RECORD.pack(time.monotonic_ns(), kind, len(data)))
+        self.file.write(data)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.file.close()
+
+class CaptureTransport(Transport):
+    '''Transport wrapper teeing everything sent and received to a CaptureWriter'''
+
+    def __init__(self, transport: Transport, writer: CaptureWriter):
+        self.transport = transport
+        self.writer = writer
+        baudrate = getattr(transport, 'baudrate', None)
+        if baudrate is not None:
+            writer.write(KIND_BAUDRATE, BAUDRATE.pack(baudrate))
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return self.transport.timeout
+
+    @timeout.setter
+    def timeout(self, value: Optional[float]) -> None:
+        self.transport.timeout = value
+
+    @property
+    def baudrate(self) -> Optional[int]:
+        return getattr(self.transport, 'baudrate', None)
+
+    @baudrate.setter
+    def baudrate(self, value: int) -> None:
+        self.transport.baudrate = value
+        self.writer.write(KIND_BAUDRATE, BAUDRATE.pack(value))
+
+    def write(self, data: bytes) -> int:
+        self.writer.write(KIND_WRITE, data)
+        return self.transport.write(data)
+
+    def readinto(self, buffer) -> int:
+        n = self.transport.readinto(buffer)
+        if n:
+            self.writer.write(KIND_READ, memoryview(buffer)[:n])
+        return n
+
+    def reset_input_buffer(self) -> None:
+        self.transport.reset_input_buffer()
+
+    def reset_output_buffer(self) -> None:
+        self.transport.reset_output_buffer()
+
+    def close(self) -> None:
+        self.transport.close()
+        self.writer.close()
+
+class Capture:
+    '''recording in progress on a projector, see record()'''
+
+    def __init__(self, proj: ViewSonicProjector, transport: CaptureTransport):
+        self.proj = proj
+        self.transport = transport
+
+    def stop(self) -> None:
+        '''put the original transport back and close the capture file'''
+        with self.proj._lock:
+            if self.proj.transport is self.transport:
+                self.proj.transport = self.proj._reader.transport = self.transport.transport
+        self.transport.writer.close()
+
+def record(
+        proj: ViewSonicProjector,
+        path: str,
+        buffer_size: int = CAPTURE_BUFFER_SIZE
+    ) -> Capture:
+    '''start capturing the traffic of proj into path'''
+
+    writer = CaptureWriter(path, buffer_size)
+    with proj._lock:
+        transport = CaptureTransport(proj.transport, writer)
+        proj.transport = proj._reader.transport = transport
+    return Capture(proj, transport)
+
+class CaptureFile:
+    '''
+    Memory mapped capture file, records are only read when iterated over
+    so that large captures need not fit in memory.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            self._file.close()
+            raise CaptureError(f'{path} is empty')
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise CaptureError(f'{path} is not a capture file')
+
+    def __enter__(self) -> 'CaptureFile':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        return self._iter_from(len(MAGIC))
+
+    def _iter_from(self, offset: int) -> Iterator[CaptureRecord]:
+        data = self._map
+        size = len(data)
+        while offset + RECORD.size <= size:
+            t, kind, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            if offset + length > size:
+                # truncated by a crash while recording
+                break
+            yield CaptureRecord(t, kind, data[offset:offset + length])
+            offset += length
+
+    def session_offsets(self) -> List[int]:
+        '''offset of the first record of each session, only headers are read'''
+        data = self._map
+        offset = len(MAGIC)
+        size = len(data)
+        res = []
+        while offset + RECORD.size <= size:
+            _, kind, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size + length
+            if offset > size:
+                break
+            if kind == KIND_SESSION:
+                res.append(offset)
+        return res
+
+    def records(self, session: int = -1) -> Iterator[CaptureRecord]:
+        '''
+        records of one session, the last one by default, read lazily:
+        the file must stay open while they are consumed
+        '''
+        offsets = self.session_offsets()
+        if not offsets:
+            return iter(())
+        return self._session_from(offsets[session])
+
+    def _session_from(self, offset: int) -> Iterator[CaptureRecord]:
+        for rec in self._iter_from(offset):
+            if rec.kind == KIND_SESSION:
+                return
+            yield rec
+
+    def sessions(self) -> Iterator[Iterator[CaptureRecord]]:
+        for offset in self.session_offsets():
+            yield self._session_from(offset)
+
+class ReplayTransport(MemoryTransport):
+    '''
+    Fake port answering with a captured session. Each write is matched
+    with the next captured write, the bytes read after it are released
+    with their captured delays divided by speed. Timeouts are also
+    shortened by speed, speed=float('inf') replays without waiting.
+    If strict, a write that differs from the capture raises ReplayMismatch.
+    '''
+
+    def __init__(
+        self,
+        records: Iterable[CaptureRecord],
+        speed: float = 1.0,
+        strict: bool = True,
+        timeout: Optional[float] = 10.0
+        ):
+        super().__init__(self._unused, timeout)
+        self.speed = speed
+        self.strict = strict
+        self.baudrate: Optional[int] = None
+        self.mismatches = 0
+        # captured records are consumed lazily, with one record of lookahead
+        self._records = (rec for rec in records if rec.kind in (KIND_WRITE, KIND_READ))
+        self._next: Optional[CaptureRecord] = next(self._records, None)
+        self._pending: deque = deque()
+
+    @staticmethod
+    def _unused(data: bytes) -> bytes:
+        return b''
+
+    @property
+    def exhausted(self) -> bool:
+        return self._next is None
+
+    def _pop(self) -> CaptureRecord:
+        rec = self._next
+        self._next = next(self._records, None)
+        return rec
+
+    def _next_is_read(self) -> bool:
+        return self._next is not None and self._next.kind == KIND_READ
+
+    def _scaled(self, seconds: float) -> float:
+        return 0.0 if self.speed == float('inf') else seconds / self.speed
+
+    def _receive(self) -> None:
+        now = time.monotonic()
+        while self._pending and self._pending[0][0] <= now:
+            self._rx += self._pending.popleft()[1]
+
+    @property
+    def in_waiting(self) -> int:
+        self._receive()
+        return len(self._rx)
+
+    def write(self, data: bytes) -> int:
+        now = time.monotonic()
+
+        # reads captured before this write were answers to earlier queries
+        while self._next_is_read():
+            self._pending.append((now, self._pop().data))
+
+        if self._next is None:
+            if self.strict:
+                raise ReplayMismatch('capture exhausted')
+            return len(data)
+
+        sent = self._pop()
+        if sent.data != bytes(data):
+            self.mismatches += 1
+            if self.strict:
+                raise ReplayMismatch(f'sent {bytes(data).hex(" ")}, captured {sent.data.hex(" ")}')
+
+        while self._next_is_read():
+            rec = self._pop()
+            self._pending.append((now + self._scaled((rec.time - sent.time) / 1e9), rec.data))
+
+        return len(data)
+
+    def readinto(self, buffer) -> int:
+        timeout = None if self.timeout is None else self._scaled(self.timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            self._receive()
+            if len(self._rx) >= len(buffer):
+                break
+
+            ready_at = self._pending[0][0] if self._pending else float('inf')
+            if deadline is not None:
+                ready_at = min(ready_at, deadline)
+            if ready_at == float('inf'):
+                break
+
+            time.sleep(max(0.0, ready_at - time.monotonic()))
+            if deadline is not None and time.monotonic() >= deadline:
+                self._receive()
+                break
+
+        return super().readinto(buffer)
+
+    def reset_input_buffer(self) -> None:
+        self._receive()
+        super().reset_input_buffer()
+
+def parse_capture(records: Iterable[CaptureRecord]) -> Iterator[bytes]:
+    '''response frames found in the bytes read, as the projector parser sees them'''
+
+    transport = MemoryTransport(lambda data: b'', timeout=0)
+    for rec in records:
+        if rec.kind == KIND_READ:
+            transport._rx += rec.data
+
+    reader = FrameReader(transport)
+    expected = tuple(set(EXPECTED_READ_RESPONSES) | set(EXPECTED_WRITE_RESPONSES))
+    while True:
+        try:
+            yield bytes(reader.read_frame(expected))
+        except TransmissionError:
+            return
+
+KIND_NAMES = {KIND_SESSION: 'session', KIND_WRITE: '>>', KIND_READ: '<<', KIND_BAUDRATE: 'baudrate'}
+
+def dump(records: Iterable[CaptureRecord], file=sys.stdout) -> None:
+    start = None
+    for rec in records:
+        if rec.kind == KIND_SESSION:
+            start = None
+            print(f'session {time.ctime(SESSION.unpack(rec.data)[0])}', file=file)
+            continue
+        if start is None:
+            start = rec.time
+        elapsed = (rec.time - start) / 1e6
+        if rec.kind == KIND_BAUDRATE:
+            data = str(BAUDRATE.unpack(rec.data)[0])
+        else:
+            data = rec.data.hex(' ')
+        print(f'{elapsed:12.3f} ms {KIND_NAMES.get(rec.kind, chr(rec.kind)):>8} {data}', file=file)
+
+def main(argv: Optional[List[str]] = None) -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('capture')
+    parser.add_argument('--parse', action='store_true', help='time the frame parser on the captured responses')
+    args = parser.parse_args(argv)
+
+    with CaptureFile(args.capture) as f:
+        if not args.parse:
+            dump(f)
+            return 0
+
+        received = sum(len(rec.data) for rec in f if rec.kind == KIND_READ)
+        start = time.perf_counter()
+        frames = sum(1 for frame in parse_capture(f))
+        elapsed = time.perf_counter() - start
+        print(f'{frames} frames, {received} bytes in {elapsed * 1000:.3f} ms, {frames / elapsed if elapsed else float("inf"):.0f} frames/s')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+'''
+Command line interface, one JSON line per command on stdout:
+
+    python viewsonic_cli.py get_brightness
+    python viewsonic_cli.py --port /dev/ttyUSB1 set_blank ON
+    python viewsonic_cli.py --ports /dev/ttyUSB0,/dev/ttyUSB1 power_on
+    python viewsonic_cli.py --batch evening.txt
+    python viewsonic_cli.py --daemon set_source_input HDMI_1
+    python viewsonic_cli.py scan 0x12 0x13
+    python viewsonic_cli.py set_fast_mode
+    python viewsonic_cli.py apply_preset gaming
+
+Commands are ViewSonicProjector methods, plus scan [cmd2...],
+reverse_engineer, set_fast_mode and apply_preset NAME. Arguments are parsed as JSON when
+possible, enums are given by member name. A batch file holds one command
+per line, run in order over a single connection, # starts a comment.
+With --daemon, commands go to a running viewsonic_daemon.py instead of
+opening the port.
+'''
+
+import argparse
+import json
+import os
+import shlex
+import socket
+import sys
+import threading
+import time
+from typing import Optional, Dict, List, Tuple, Any
+
+# viewsonic_serial takes most of the startup time: it is only imported
+# when a port is opened, requests to the daemon do not need it at all
+
+CLI_DEFAULT_PORT = '/dev/ttyUSB0'
+# viewsonic_daemon.DAEMON_SOCKET, without importing it
+CLI_DAEMON_SOCKET = os.path.join(os.environ.get('XDG_RUNTIME_DIR', '/tmp'), 'viewsonic.sock')
+CLI_DAEMON_TIMEOUT_SECONDS = 300.0
+
+# module functions taking the projector as first argument
+FUNCTIONS = ['scan', 'reverse_engineer', 'set_fast_mode', 'apply_preset']
+
+Command = Tuple[str, List[Any]]
+
+def parse_argument(arg: str) -> Any:
+    '''JSON value if it is one, the string itself otherwise'''
+    try:
+        return json.loads(arg)
+    except ValueError:
+        return arg
+
+def parse_command(line: str) -> Optional[Command]:
+    words = shlex.split(line, comments=True)
+    if not words:
+        return None
+    return words[0], [parse_argument(word) for word in words[1:]]
+
+def read_batch(path: str) -> List[Command]:
+    f = sys.stdin if path == '-' else open(path, 'r')
+    try:
+        commands = [parse_command(line) for line in f]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return [command for command in commands if command is not None]
+
+def run_function(proj, name: str, args: List[Any]) -> Any:
+    import viewsonic_serial
+
+    if name == 'apply_preset':
+        from viewsonic_presets import apply_preset
+        return apply_preset(proj, *args)
+
+    if name == 'scan':
+        # cmd2 values, hex as 0x12
+        cmd2 = [int(arg, 0) if isinstance(arg, str) else arg for arg in args]
+        return viewsonic_serial.scan(proj, cmd2 or None)
+    return getattr(viewsonic_serial, name)(proj, *args)
+
+def run_method(proj, name: str, args: List[Any]) -> Any:
+    from viewsonic_daemon import method_of, bind_arguments
+
+    fun = method_of(name)
+    if fun is None:
+        raise AttributeError(f'unknown command {name}')
+    args, kwargs = bind_arguments(fun, args)
+    return getattr(proj, name)(*args, **kwargs)
+
+def run_port(
+        port: str,
+        commands: List[Command],
+        emit,
+        baudrate: Optional[int] = None
+    ) -> bool:
+    '''open port, run the commands in order, False if any failed'''
+
+    from viewsonic_serial import ViewSonicProjector
+    from viewsonic_daemon import to_json
+
+    start = time.perf_counter()
+    try:
+        proj = ViewSonicProjector(port=port, baudrate=baudrate) if baudrate else ViewSonicProjector(port=port)
+    except Exception as e:
+        emit({'port': port, 'command': 'open', 'error': error_info(e), 'elapsed': time.perf_counter() - start})
+        return False
+
+    ok = True
+    with proj:
+        for name, args in commands:
+            start = time.perf_counter()
+            try:
+                if name in FUNCTIONS:
+                    result = run_function(proj, name, args)
+                else:
+                    result = run_method(proj, name, args)
+            except Exception as e:
+                ok = False
+                emit({'port': port, 'command': name, 'error': error_info(e), 'elapsed': time.perf_counter() - start})
+                continue
+            emit({'port': port, 'command': name, 'result': to_json(result), 'elapsed': time.perf_counter() - start})
+
+    return ok
+
+def run_daemon(
+        path: str,
+        projector: Optional[str],
+        commands: List[Command],
+        emit
+    ) -> bool:
+    '''send the commands as one JSON-RPC batch, the daemon converts arguments and results'''
+
+    requests = [
+        {
+            'jsonrpc': '2.0',
+            'id': i,
+            'method': f'{projector}.{name}' if projector else name,
+            'params': args
+        }
+        for i, (name, args) in enumerate(commands)
+    ]
+
+    start = time.perf_counter()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLI_DAEMON_TIMEOUT_SECONDS)
+            sock.connect(path)
+            with sock.makefile('rwb') as f:
+                f.write(json.dumps(requests).encode() + b'\n')
+                f.flush()
+                responses = json.loads(f.readline())
+    except (OSError, ValueError) as e:
+        emit({'port': projector, 'command': 'connect', 'error': error_info(e), 'elapsed': time.perf_counter() - start})
+        return False
+    elapsed = time.perf_counter() - start
+
+    if isinstance(responses, dict):
+        # the whole batch was rejected
+        responses = [responses]
+
+    ok = True
+    by_id = {response.get('id'): response for response in responses}
+    for i, (name, args) in enumerate(commands):
+        response = by_id.get(i, {'error': {'message': 'no response'}})
+        line = {'port': projector, 'command': name}
+        if 'error' in response:
+            ok = False
+            error = response['error']
+            data = error.get('data')
+            line['error'] = {
+                'type': data.get('type', 'RPCError') if isinstance(data, dict) else 'RPCError',
+                'message': error.get('message')
+            }
+        else:
+            line['result'] = response['result']
+        line['elapsed'] = elapsed
+        emit(line)
+
+    return ok
+
+def error_info(e: BaseException) -> Dict[str, str]:
+    return {'type': type(e).__name__, 'message': str(e)}
+
+def main(argv: Optional[List[str]] = None) -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--port', help=f'default: $VIEWSONIC_PORT or {CLI_DEFAULT_PORT}')
+    target.add_argument('--ports', help='comma separated ports, run in parallel')
+    target.add_argument('--daemon', action='store_true', help='send the commands to viewsonic_daemon.py')
+    parser.add_argument('--socket', default=CLI_DAEMON_SOCKET, help='daemon socket')
+    parser.add_argument('--projector', help='projector name on the daemon')
+    parser.add_argument('--baudrate', type=int)
+    parser.add_argument('--batch', metavar='FILE', help='commands file, - for stdin')
+    parser.add_argument('command', nargs='?')
+    parser.add_argument('args', nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    commands: List[Command] = []
+    if args.batch:
+        commands += read_batch(args.batch)
+    if args.command:
+        commands.append((args.command, [parse_argument(arg) for arg in args.args]))
+    if not commands:
+        parser.error('no command')
+
+    # results go to the real stdout, anything printed along the way to stderr
+    out = sys.stdout
+    lock = threading.Lock()
+
+    def emit(line: Dict) -> None:
+        with lock:
+            out.write(json.dumps(line) + '\n')
+            out.flush()
+
+    sys.stdout = sys.stderr
+    try:
+        if args.daemon:
+            return 0 if run_daemon(args.socket, args.projector, commands, emit) else 1
+
+        if args.ports:
+            ports = [port for port in args.ports.split(',') if port]
+        else:
+            ports = [args.port or os.environ.get('VIEWSONIC_PORT', CLI_DEFAULT_PORT)]
+
+        if len(ports) == 1:
+            return 0 if run_port(ports[0], commands, emit, args.baudrate) else 1
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(ports)) as executor:
+            results = list(executor.map(lambda port: run_port(port, commands, emit, args.baudrate), ports))
+        return 0 if all(results) else 1
+
+    finally:
+        sys.stdout = out
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Callable, Any
+
+from viewsonic_serial import ViewSonicProjector
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 10
+PRIORITY_BULK = 20
+
+# commands a user is waiting for go first
+INTERACTIVE_METHODS = [
+    'set_blank',
+    'set_freeze',
+    'set_mute',
+    'set_source_input',
+    'set_remote_key',
+    'volume_up',
+    'volume_down',
+    'get_power_status'
+]
+
+# telemetry, dumps and scans go last
+BULK_METHODS = [
+    'get_state',
+    'get_error_status',
+    'get_operating_temperature',
+    'get_light_source_usage_time',
+    '_send_read'
+]
+
+DEFAULT_PRIORITIES: Dict[str, int] = {
+    **{name: PRIORITY_INTERACTIVE for name in INTERACTIVE_METHODS},
+    **{name: PRIORITY_BULK for name in BULK_METHODS}
+}
+
+class ProjectorConnection:
+    '''
+    Share one projector between threads. A single worker thread owns the
+    port and executes requests from a priority queue, lowest priority
+    value first and FIFO within a priority. Callers get futures back:
+
+        conn = ProjectorConnection(ViewSonicProjector('/dev/ttyUSB0'))
+        future = conn.submit('set_blank', Bool.ON)
+        conn.call('get_brightness')
+        monitor = TelemetryMonitor(conn.proxy(PRIORITY_BULK))
+
+    Long operations (power_on, scan...) occupy the port until they return.
+    '''
+
+    def __init__(
+        self,
+        proj: ViewSonicProjector,
+        priorities: Optional[Dict[str, int]] = None
+        ):
+
+        self.proj = proj
+        self.priorities = dict(DEFAULT_PRIORITIES if priorities is None else priorities)
+
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='ProjectorConnection', daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'ProjectorConnection':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def priority_for(self, method: str) -> int:
+        return self.priorities.get(method, PRIORITY_NORMAL)
+
+    def submit(
+            self,
+            method: str,
+            *args,
+            priority: Optional[int] = None,
+            **kwargs
+        ) -> Future:
+        '''queue a projector method call'''
+
+        if self._closed:
+            raise RuntimeError('connection closed')
+
+        fun = getattr(self.proj, method)
+        if priority is None:
+            priority = self.priority_for(method)
+
+        future = Future()
+        self._queue.put((priority, next(self._counter), future, fun, args, kwargs))
+        return future
+
+    def call(self, method: str, *args, priority: Optional[int] = None, **kwargs) -> Any:
+        '''queue a projector method call and wait for its result'''
+        return self.submit(method, *args, priority=priority, **kwargs).result()
+
+    def proxy(self, priority: Optional[int] = None) -> 'ConnectionProxy':
+        '''projector-like object whose calls go through the queue'''
+        return ConnectionProxy(self, priority)
+
+    def close(self, cancel_pending: bool = True) -> None:
+        '''stop the worker thread once the current request is done'''
+
+        if self._closed:
+            return
+        self._closed = True
+
+        # sorts before every request
+        self._queue.put((float('-inf') if cancel_pending else float('inf'), -1, None, None, None, None))
+        self._thread.join()
+
+        while True:
+            try:
+                _, _, future, _, _, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if future is not None:
+                future.cancel()
+
+    def _run(self) -> None:
+
+        while True:
+            _, _, future, fun, args, kwargs = self._queue.get()
+            if future is None:
+                return
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                future.set_result(fun(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+class ConnectionProxy:
+    '''forward method calls to a ProjectorConnection, blocking until done'''
+
+    def __init__(self, connection: ProjectorConnection, priority: Optional[int] = None):
+        self._connection = connection
+        self._priority = priority
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        attr = getattr(self._connection.proj, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs) -> Any:
+            return self._connection.call(name, *args, priority=self._priority, **kwargs)
+
+        call.__name__ = name
+        return call
@@ -0,0 +1,593 @@
+'''
+Control daemon: owns the ports of a set of projectors, keeps them open and
+serves the ViewSonicProjector API as JSON-RPC 2.0, one request or batch
+per line on a Unix socket and/or as application/json POST requests on a
+localhost HTTP port.
+
+    python viewsonic_daemon.py --projector living=/dev/ttyUSB0 --projector tcp://10.0.0.5:4001
+    python viewsonic_daemon.py --projector /dev/ttyUSB0 --http 8451
+
+The method is `<projector>.<method>`, or just `<method>` when a single
+projector is served. Positional params are the arguments, named params
+the keyword arguments. Enums are passed and returned by member name:
+
+    {"jsonrpc": "2.0", "id": 1, "method": "living.set_blank", "params": ["ON"]}
+
+Calls are queued per projector (see ProjectorConnection); the calls of a
+batch run in order on each projector and in parallel across projectors.
+
+    with DaemonClient() as client:
+        client.call('set_blank', Bool.ON)
+        client.batch([('get_brightness',), ('get_contrast',)])
+'''
+
+import argparse
+import dataclasses
+import inspect
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import typing
+from concurrent.futures import Future
+from enum import Enum
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, Dict, List, Tuple, Any, Callable, Iterable
+
+from viewsonic_serial import (
+    ViewSonicProjector,
+    TransmissionError,
+    FunctionDisabled,
+    ProjectorOFF,
+    CommandFailed,
+    PowerTransitionTimeout,
+    AdjustmentFailed,
+    POWER_ON_TIMEOUT_SECONDS,
+    POWER_OFF_TIMEOUT_SECONDS
+)
+from viewsonic_connection import ProjectorConnection
+
+DAEMON_SOCKET = os.path.join(os.environ.get('XDG_RUNTIME_DIR', '/tmp'), 'viewsonic.sock')
+DAEMON_HTTP_HOST = '127.0.0.1'
+# the longest call is a power transition, answered once it is complete
+DAEMON_CLIENT_TIMEOUT_MARGIN_SECONDS = 30.0
+DAEMON_CLIENT_TIMEOUT_SECONDS = max(POWER_ON_TIMEOUT_SECONDS, POWER_OFF_TIMEOUT_SECONDS) + DAEMON_CLIENT_TIMEOUT_MARGIN_SECONDS
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+PROJECTOR_ERROR = -32000
+
+# exceptions raised again as such by DaemonClient
+REMOTE_EXCEPTIONS: Dict[str, type] = {cls.__name__: cls for cls in [
+    TransmissionError,
+    FunctionDisabled,
+    ProjectorOFF,
+    CommandFailed,
+    PowerTransitionTimeout,
+    AdjustmentFailed,
+    TimeoutError,
+    ValueError,
+    TypeError,
+    KeyError
+]}
+
+# callable remotely besides the generated register accessors and actions,
+# anything else (hooks, profiles, timeouts, close) is not part of the API
+RPC_METHODS = [
+    'get_state',
+    'apply_state',
+    'power_on',
+    'power_off',
+    'get_volume',
+    'set_volume',
+    'adjust_volume',
+    'get_light_source_usage_time',
+    'get_error_status',
+    'get_operating_temperature'
+]
+
+# HTTP requests must be JSON: a browser cannot send one cross origin 
+# without a preflight the server does not answer
+HTTP_CONTENT_TYPE = 'application/json'
+
+class DaemonRunning(Exception):
+    pass
+
+class RPCError(Exception):
+    '''JSON-RPC error, or a projector exception DaemonClient does not know'''
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+def to_json(value: Any) -> Any:
+    '''enums by name, bytes as hex, dataclasses as dicts'''
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: to_json(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    return value
+
+def from_json(value: Any, annotation: Any) -> Any:
+    '''inverse of to_json, driven by a type annotation'''
+
+    if value is None or annotation is inspect.Parameter.empty:
+        return value
+
+    if typing.get_origin(annotation) is typing.Union:
+        for arg in typing.get_args(annotation):
+            if arg is not type(None):
+                return from_json(value, arg)
+        return value
+
+    if not isinstance(annotation, type):
+        return value
+
+    if issubclass(annotation, Enum):
+        if isinstance(value, str):
+            return annotation[value]
+        return annotation(value)
+
+    if dataclasses.is_dataclass(annotation) and isinstance(value, dict):
+        hints = typing.get_type_hints(annotation)
+        return annotation(**{k: from_json(v, hints.get(k, inspect.Parameter.empty)) for k, v in value.items()})
+
+    if issubclass(annotation, bytes) and isinstance(value, str):
+        return bytes.fromhex(value)
+
+    return value
+
+def method_of(name: str) -> Optional[Callable]:
+    '''ViewSonicProjector method, None if it cannot be called remotely'''
+    if name not in ViewSonicProjector._generated_accessors and name not in RPC_METHODS:
+        return None
+    return getattr(ViewSonicProjector, name, None)
+
+def bind_arguments(fun: Callable, params: Any) -> Tuple[list, dict]:
+    '''convert JSON params to arguments of fun'''
+
+    args = params if isinstance(params, list) else []
+    kwargs = params if isinstance(params, dict) else {}
+
+    signature = inspect.signature(fun)
+    # self is not part of params
+    bound = signature.bind(None, *args, **kwargs)
+    for name, value in list(bound.arguments.items())[1:]:
+        bound.arguments[name] = from_json(value, signature.parameters[name].annotation)
+    return list(bound.args[1:]), bound.kwargs
+
+def error_response(id: Any, code: int, message: str, data: Any = None) -> Dict:
+    error = {'code': code, 'message': message}
+    if data is not None:
+        error['data'] = data
+    return {'jsonrpc': '2.0', 'id': id, 'error': error}
+
+class ProjectorDaemon:
+    '''
+    JSON-RPC dispatcher over one ProjectorConnection per projector.
+    ports maps names to ports, a list of ports uses the ports as names.
+    Projectors that fail to open are reported by the `projectors` method.
+    '''
+
+    def __init__(
+        self,
+        ports,
+        projector_factory: Callable[..., ViewSonicProjector] = ViewSonicProjector,
+        **kwargs
+        ):
+
+        if not isinstance(ports, dict):
+            ports = {port: port for port in ports}
+
+        self.ports: Dict[str, str] = dict(ports)
+        self.connections: Dict[str, ProjectorConnection] = {}
+        self.open_errors: Dict[str, BaseException] = {}
+
+        for name, port in self.ports.items():
+            try:
+                proj = projector_factory(port=port, **kwargs)
+            except Exception as e:
+                self.open_errors[name] = e
+                continue
+            self.connections[name] = ProjectorConnection(proj)
+
+    def __enter__(self) -> 'ProjectorDaemon':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for connection in self.connections.values():
+            connection.close()
+            connection.proj.close()
+        self.connections.clear()
+
+    def projectors(self) -> Dict[str, Dict]:
+        res = {name: {'port': self.ports[name], 'open': True} for name in self.connections}
+        for name, e in self.open_errors.items():
+            res[name] = {'port': self.ports[name], 'open': False, 'error': f'{type(e).__name__}: {e}'}
+        return res
+
+    def _resolve(self, method: Any) -> Tuple[str, str]:
+        if not isinstance(method, str):
+            raise RPCError(INVALID_REQUEST, 'method must be a string')
+
+        target, _, name = method.rpartition('.')
+        if not target:
+            if len(self.ports) != 1:
+                raise RPCError(METHOD_NOT_FOUND, f'{method}: name the projector, <projector>.{method}')
+            target = next(iter(self.ports))
+
+        if target not in self.ports:
+            raise RPCError(METHOD_NOT_FOUND, f'unknown projector {target}')
+        if target not in self.connections:
+            raise RPCError(PROJECTOR_ERROR, f'{target} is not open', to_json(self.projectors()[target]))
+        if method_of(name) is None:
+            raise RPCError(METHOD_NOT_FOUND, f'unknown method {name}')
+        return target, name
+
+    def _submit(self, request: Any, priority: Optional[int] = None) -> Tuple[Any, Future]:
+        '''validate a request and queue it, returns its id and a future of the response'''
+
+        if not isinstance(request, dict) or request.get('jsonrpc') != '2.0':
+            raise RPCError(INVALID_REQUEST, 'not a JSON-RPC 2.0 request')
+
+        method = request.get('method')
+        future = Future()
+
+        if method == 'projectors':
+            future.set_result(self.projectors())
+            return request.get('id'), future
+
+        target, name = self._resolve(method)
+        try:
+            args, kwargs = bind_arguments(method_of(name), request.get('params', []))
+        except (TypeError, KeyError, ValueError) as e:
+            raise RPCError(INVALID_PARAMS, f'{name}: {e}')
+
+        return request.get('id'), self.connections[target].submit(name, *args, priority=priority, **kwargs)
+
+    def _batch_priorities(self, requests: List) -> List[Optional[int]]:
+        '''one priority per projector in a batch, so that its calls stay in order'''
+
+        targets = []
+        lowest = {}
+        for request in requests:
+            try:
+                target, name = self._resolve(request.get('method'))
+            except (RPCError, AttributeError):
+                targets.append(None)
+                continue
+            targets.append(target)
+            priority = self.connections[target].priority_for(name)
+            lowest[target] = min(lowest.get(target, priority), priority)
+
+        return [lowest.get(target) for target in targets]
+
+    def handle(self, payload) -> Optional[Any]:
+        '''
+        Answer a decoded JSON-RPC request or batch, None when there is
+        nothing to send back (notifications only).
+        '''
+
+        batch = isinstance(payload, list)
+        requests = payload if batch else [payload]
+        if batch and not requests:
+            return error_response(None, INVALID_REQUEST, 'empty batch')
+
+        priorities = self._batch_priorities(requests) if batch else [None]
+
+        pending = []
+        for request, priority in zip(requests, priorities):
+            id = request.get('id') if isinstance(request, dict) else None
+            notification = isinstance(request, dict) and 'id' not in request
+            try:
+                id, future = self._submit(request, priority)
+            except RPCError as e:
+                pending.append((notification, error_response(id, e.code, str(e), e.data)))
+                continue
+            pending.append((notification, (id, future)))
+
+        responses = []
+        for notification, item in pending:
+            if isinstance(item, tuple):
+                id, future = item
+                try:
+                    item = {'jsonrpc': '2.0', 'id': id, 'result': to_json(future.result())}
+                except Exception as e:
+                    item = error_response(id, PROJECTOR_ERROR, str(e), {'type': type(e).__name__})
+            if not notification:
+                responses.append(item)
+
+        if not responses:
+            return None
+        return responses if batch else responses[0]
+
+    def handle_bytes(self, data: bytes) -> Optional[bytes]:
+        try:
+            payload = json.loads(data)
+        except ValueError as e:
+            response = error_response(None, PARSE_ERROR, str(e))
+        else:
+            response = self.handle(payload)
+        return None if response is None else json.dumps(response).encode()
+
+class _UnixHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.projector_daemon.handle_bytes(line)
+            if response is not None:
+                self.wfile.write(response + b'\n')
+                self.wfile.flush()
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+
+    def _allowed_origin(self, origin: str) -> bool:
+        '''pages served by other sites must not drive the projectors'''
+        host, port = self.server.server_address[:2]
+        return origin in (f'http://{host}:{port}', f'http://localhost:{port}')
+
+    def do_POST(self) -> None:
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type != HTTP_CONTENT_TYPE:
+            self.send_error(415, f'Content-Type must be {HTTP_CONTENT_TYPE}')
+            return
+        origin = self.headers.get('Origin')
+        if origin is not None and not self._allowed_origin(origin):
+            self.send_error(403, f'origin {origin} not allowed')
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        response = self.server.projector_daemon.handle_bytes(self.rfile.read(length))
+        if response is None:
+            self.send_response(204)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+def socket_in_use(path: str) -> bool:
+    '''a daemon accepts connections on path, the socket is stale if refused'''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+    return True
+
+class UnixRPCServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, daemon: ProjectorDaemon):
+        if os.path.exists(path):
+            if socket_in_use(path):
+                raise DaemonRunning(f'a daemon is already serving {path}')
+            # left behind by a daemon that did not exit cleanly
+            os.remove(path)
+        # the socket is created with the umask permissions, owner and group only
+        umask = os.umask(0o117)
+        try:
+            super().__init__(path, _UnixHandler)
+        finally:
+            os.umask(umask)
+        self.projector_daemon = daemon
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+class HTTPRPCServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, daemon: ProjectorDaemon, host: str = DAEMON_HTTP_HOST):
+        super().__init__((host, port), _HTTPHandler)
+        self.projector_daemon = daemon
+
+def serve(
+        daemon: ProjectorDaemon,
+        socket_path: Optional[str] = DAEMON_SOCKET,
+        http_port: Optional[int] = None,
+        stop: Optional[threading.Event] = None
+    ) -> None:
+    '''serve until stop is set, SIGTERM or Ctrl-C'''
+
+    servers = []
+    if socket_path is not None:
+        servers.append(UnixRPCServer(socket_path, daemon))
+    if http_port is not None:
+        servers.append(HTTPRPCServer(http_port, daemon))
+
+    threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in servers]
+    for thread in threads:
+        thread.start()
+
+    if stop is None:
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *args: stop.set())
+
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+class DaemonClient:
+    '''
+    Unix socket client. Results are converted back using the return
+    annotations of ViewSonicProjector, projector exceptions are raised
+    again as the same class when it is known.
+    '''
+
+    def __init__(
+        self,
+        path: str = DAEMON_SOCKET,
+        projector: Optional[str] = None,
+        timeout: Optional[float] = DAEMON_CLIENT_TIMEOUT_SECONDS
+        ):
+
+        self.projector = projector
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self._file = self.sock.makefile('rwb')
+        self._ids = iter(range(1, sys.maxsize))
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'DaemonClient':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self.sock.close()
+
+    def _request(self, method: str, args: Iterable = (), kwargs: Optional[Dict] = None, projector: Optional[str] = None) -> Dict:
+        projector = self.projector if projector is None else projector
+        if kwargs and args:
+            raise TypeError('JSON-RPC params are either positional or named')
+        return {
+            'jsonrpc': '2.0',
+            'id': next(self._ids),
+            'method': f'{projector}.{method}' if projector else method,
+            'params': to_json(kwargs) if kwargs else to_json(list(args))
+        }
+
+    @staticmethod
+    def _answers(response: Any, ids: set) -> bool:
+        '''
+        response is for one of ids, not the late answer to a call that timed 
+        out. Errors without an id (unparsable request) are for the last one.
+        '''
+        if isinstance(response, list):
+            return any(isinstance(r, dict) and r.get('id') in ids for r in response)
+        return isinstance(response, dict) and response.get('id') in ids | {None}
+
+    def _exchange(self, payload) -> Any:
+        ids = {r['id'] for r in payload} if isinstance(payload, list) else {payload['id']}
+        with self._lock:
+            try:
+                self._file.write(json.dumps(payload).encode() + b'\n')
+                self._file.flush()
+                while True:
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError('daemon closed the connection')
+                    try:
+                        response = json.loads(line)
+                    except ValueError:
+                        # rest of a line cut by a timeout
+                        continue
+                    if self._answers(response, ids):
+                        return response
+            except socket.timeout:
+                # a file that timed out cannot be read again, the answer 
+                # still on its way is skipped by the next call
+                self._file = self.sock.makefile('rwb')
+                raise
+
+    @staticmethod
+    def _result(method: str, response: Dict) -> Any:
+        error = response.get('error')
+        if error is not None:
+            data = error.get('data') or {}
+            cls = REMOTE_EXCEPTIONS.get(data.get('type')) if isinstance(data, dict) else None
+            if cls is not None:
+                raise cls(error['message'])
+            raise RPCError(error['code'], error['message'], data)
+
+        fun = method_of(method.rpartition('.')[2])
+        if fun is None:
+            return response['result']
+        return from_json(response['result'], inspect.signature(fun).return_annotation)
+
+    def call(self, method: str, *args, projector: Optional[str] = None, **kwargs) -> Any:
+        return self._result(method, self._exchange(self._request(method, args, kwargs, projector)))
+
+    def batch(self, calls: Iterable[Tuple], projector: Optional[str] = None) -> List[Any]:
+        '''
+        calls are (method, *args) tuples, sent in a single request.
+        Returns the results in order, exceptions in place of failed calls.
+        '''
+
+        requests = [self._request(call[0], call[1:], None, projector) for call in calls]
+        if not requests:
+            return []
+        responses = self._exchange(requests)
+        if isinstance(responses, dict):
+            # the whole batch was rejected
+            error = responses.get('error') or {}
+            raise RPCError(error.get('code', INVALID_REQUEST), error.get('message', 'invalid batch response'), error.get('data'))
+        responses = {response.get('id'): response for response in responses}
+
+        res = []
+        for request in requests:
+            try:
+                res.append(self._result(request['method'], responses[request['id']]))
+            except Exception as e:
+                res.append(e)
+        return res
+
+    def projectors(self) -> Dict[str, Dict]:
+        return self._exchange(self._request('projectors', projector=''))['result']
+
+def main(argv: Optional[List[str]] = None) -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projector', action='append', required=True, metavar='[NAME=]PORT', help='repeat for each projector')
+    parser.add_argument('--socket', default=DAEMON_SOCKET, help='Unix socket path')
+    parser.add_argument('--no-socket', action='store_true')
+    parser.add_argument('--http', type=int, metavar='PORT', help=f'also serve HTTP on {DAEMON_HTTP_HOST}:PORT')
+    parser.add_argument('--baudrate', type=int)
+    args = parser.parse_args(argv)
+
+    ports = {}
+    for item in args.projector:
+        name, _, port = item.rpartition('=')
+        ports[name or port] = port
+
+    # before opening the ports the running daemon owns
+    if not args.no_socket and socket_in_use(args.socket):
+        print(f'a daemon is already serving {args.socket}', file=sys.stderr)
+        return 1
+
+    kwargs = {} if args.baudrate is None else {'baudrate': args.baudrate}
+    with ProjectorDaemon(ports, **kwargs) as daemon:
+        for name, info in daemon.projectors().items():
+            print(f"{name}: {info['port']} {'open' if info['open'] else info['error']}", file=sys.stderr)
+        serve(daemon, None if args.no_socket else args.socket, args.http)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Callable, Iterable, Any, NamedTuple
+
+from viewsonic_serial import ViewSonicProjector
+
+BARRIER_TIMEOUT_SECONDS = 30.0
+
+class FleetResult(NamedTuple):
+    '''outcome of a command on one projector'''
+    port: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class ProjectorFleet:
+    '''
+    Drive several projectors in parallel, one worker thread per unit.
+    Any public ViewSonicProjector method can be called on the fleet,
+    it returns a dict of FleetResult keyed by port:
+
+        fleet = ProjectorFleet(['/dev/ttyUSB0', '/dev/ttyUSB1'])
+        fleet.power_on()
+        fleet.set_blank(Bool.ON, synchronized=True)
+
+    Exceptions (ProjectorOFF, FunctionDisabled, TransmissionError...)
+    are collected per unit instead of aborting the whole fan-out.
+    '''
+
+    def __init__(
+        self,
+        ports: Iterable[str],
+        barrier_timeout: float = BARRIER_TIMEOUT_SECONDS,
+        projector_factory: Callable[..., ViewSonicProjector] = ViewSonicProjector,
+        **kwargs
+        ):
+
+        self.barrier_timeout = barrier_timeout
+        self.ports = list(ports)
+        self.projectors: Dict[str, ViewSonicProjector] = {}
+        self.open_errors: Dict[str, BaseException] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.ports)))
+
+        opened = self._fan_out(
+            {port: None for port in self.ports},
+            lambda port, _: projector_factory(port=port, **kwargs)
+        )
+        for port, res in opened.items():
+            if res.ok:
+                self.projectors[port] = res.value
+            else:
+                self.open_errors[port] = res.error
+
+    def __enter__(self) -> 'ProjectorFleet':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for proj in self.projectors.values():
+            proj.close()
+        self.projectors.clear()
+
+    def __getattr__(self, name: str) -> Callable[..., Dict[str, FleetResult]]:
+        if name.startswith('_') or not callable(getattr(ViewSonicProjector, name, None)):
+            raise AttributeError(name)
+
+        def fan_out(*args, **kwargs) -> Dict[str, FleetResult]:
+            return self.call(name, *args, **kwargs)
+
+        fan_out.__name__ = name
+        return fan_out
+
+    def call(
+            self,
+            method: str,
+            *args,
+            synchronized: bool = False,
+            **kwargs
+        ) -> Dict[str, FleetResult]:
+        '''
+        Call method on every projector in parallel.
+        If synchronized, workers wait on a barrier so that the command
+        leaves all ports at (nearly) the same time.
+        '''
+
+        # resolved up front: a worker failing before the barrier would 
+        # leave the others waiting for the whole barrier timeout
+        funs = {}
+        res = {}
+        for port, proj in self.projectors.items():
+            try:
+                funs[port] = getattr(proj, method)
+            except AttributeError as e:
+                res[port] = FleetResult(port, error=e)
+
+        barrier = threading.Barrier(len(funs)) if synchronized and funs else None
+
+        def run(port: str, fun: Callable) -> Any:
+            if barrier is not None:
+                barrier.wait(self.barrier_timeout)
+            return fun(*args, **kwargs)
+
+        res.update(self._fan_out(funs, run))
+        return {port: res[port] for port in self.projectors}
+
+    def _fan_out(
+            self,
+            targets: Dict[str, Any],
+            fun: Callable[[str, Any], Any]
+        ) -> Dict[str, FleetResult]:
+
+        def run(port: str, target: Any) -> FleetResult:
+            start = time.monotonic()
+            try:
+                value = fun(port, target)
+            except Exception as e:
+                return FleetResult(port, error=e, elapsed=time.monotonic() - start)
+            return FleetResult(port, value=value, elapsed=time.monotonic() - start)
+
+        futures = {port: self._executor.submit(run, port, target) for port, target in targets.items()}
+        return {port: future.result() for port, future in futures.items()}
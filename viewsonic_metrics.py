@@ -0,0 +1,132 @@
+import threading
+from typing import Dict, List, Tuple, Sequence
+
+from viewsonic_serial import (
+    ViewSonicProjector,
+    ExchangeEvent,
+    CMD
+)
+
+METRICS_PREFIX = 'viewsonic'
+
+# upper bounds of the span histograms, in seconds
+SPAN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SPANS = ['write', 'header', 'payload']
+
+COMMAND_NAMES: Dict[bytes, str] = {bytes(cmd): cmd.name for cmd in CMD}
+
+def command_name(cmd: bytes) -> str:
+    '''CMD member name, or the hex code of an unknown command'''
+    name = COMMAND_NAMES.get(bytes(cmd))
+    return name if name is not None else bytes(cmd).hex()
+
+class Histogram:
+    '''cumulative histogram with fixed buckets'''
+
+    def __init__(self, buckets: Sequence[float] = SPAN_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        '''(le, count) pairs, the last one is +Inf'''
+        res = []
+        total = 0
+        for bound, n in zip(self.buckets, self.counts):
+            total += n
+            res.append((repr(float(bound)), total))
+        res.append(('+Inf', self.count))
+        return res
+
+class ExchangeMetrics:
+    '''
+    Exchange hook counting exchanges and errors per command and timing
+    the write / header / payload spans:
+
+        metrics = ExchangeMetrics()
+        metrics.attach(proj)
+        ...
+        print(metrics.openmetrics())
+
+    One instance can be attached to several projectors.
+    '''
+
+    def __init__(self, buckets: Sequence[float] = SPAN_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.exchanges: Dict[Tuple[str, str], int] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.retries = 0
+        self.spans: Dict[str, Histogram] = {span: Histogram(self.buckets) for span in SPANS}
+        self._lock = threading.Lock()
+
+    def attach(self, proj: ViewSonicProjector) -> None:
+        proj.add_hook(self)
+
+    def detach(self, proj: ViewSonicProjector) -> None:
+        proj.remove_hook(self)
+
+    def __call__(self, event: ExchangeEvent) -> None:
+        name = command_name(event.cmd)
+        key = (name, 'write' if event.write else 'read')
+
+        with self._lock:
+            self.exchanges[key] = self.exchanges.get(key, 0) + 1
+            if event.attempt:
+                self.retries += 1
+            if event.error is not None:
+                error_key = (name, type(event.error).__name__)
+                self.errors[error_key] = self.errors.get(error_key, 0) + 1
+            self.spans['write'].observe(event.write_seconds)
+            # a timed out exchange has no header nor payload
+            if event.response is not None:
+                self.spans['header'].observe(event.header_seconds)
+                self.spans['payload'].observe(event.payload_seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.exchanges.clear()
+            self.errors.clear()
+            self.retries = 0
+            self.spans = {span: Histogram(self.buckets) for span in SPANS}
+
+    def openmetrics(self, prefix: str = METRICS_PREFIX) -> str:
+        '''OpenMetrics text exposition, also accepted by Prometheus'''
+
+        lines = []
+        with self._lock:
+
+            lines.append(f'# TYPE {prefix}_exchanges counter')
+            lines.append(f'# HELP {prefix}_exchanges Exchanges with the projector, including retries.')
+            for (cmd, kind), n in sorted(self.exchanges.items()):
+                lines.append(f'{prefix}_exchanges_total{{cmd="{cmd}",kind="{kind}"}} {n}')
+
+            lines.append(f'# TYPE {prefix}_errors counter')
+            lines.append(f'# HELP {prefix}_errors Failed exchanges by exception type.')
+            for (cmd, error), n in sorted(self.errors.items()):
+                lines.append(f'{prefix}_errors_total{{cmd="{cmd}",error="{error}"}} {n}')
+
+            lines.append(f'# TYPE {prefix}_retries counter')
+            lines.append(f'# HELP {prefix}_retries Exchanges that were a retry of a failed one.')
+            lines.append(f'{prefix}_retries_total {self.retries}')
+
+            lines.append(f'# TYPE {prefix}_exchange_seconds histogram')
+            lines.append(f'# UNIT {prefix}_exchange_seconds seconds')
+            lines.append(f'# HELP {prefix}_exchange_seconds Time spent writing the query, waiting for the response header and reading the payload.')
+            for span, histogram in self.spans.items():
+                for le, n in histogram.cumulative():
+                    lines.append(f'{prefix}_exchange_seconds_bucket{{span="{span}",le="{le}"}} {n}')
+                lines.append(f'{prefix}_exchange_seconds_count{{span="{span}"}} {histogram.count}')
+                lines.append(f'{prefix}_exchange_seconds_sum{{span="{span}"}} {histogram.sum}')
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
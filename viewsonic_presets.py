@@ -0,0 +1,270 @@
+import time
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Callable, List, Any, Union
+
+from viewsonic_serial import (
+    ViewSonicProjector,
+    TransmissionError,
+    CommandFailed,
+    PowerStatus,
+    PowerTransitionTimeout,
+    SourceInput,
+    Bool,
+    wait_for_power_status,
+    POWER_ON_TIMEOUT_SECONDS,
+    POWER_OFF_TIMEOUT_SECONDS,
+    STATE_FIELDS,
+    STATE_DEPENDENCIES
+)
+
+SETTLE_TIMEOUT_SECONDS = 10.0
+SETTLE_INITIAL_INTERVAL_SECONDS = 0.05
+SETTLE_MAX_INTERVAL_SECONDS = 0.5
+SETTLE_STABLE_READS = 2
+VERIFY_ATTEMPTS = 3
+
+class PresetFailed(RuntimeError):
+    '''report holds the steps done so far'''
+
+    def __init__(self, message: str, report: Optional['PresetReport'] = None):
+        super().__init__(message)
+        self.report = report
+
+class SettleTimeout(TimeoutError):
+    pass
+
+@dataclass
+class Preset:
+    '''
+    Named set of register values, written in dependency order (the order
+    of ProjectorState fields, other registers last). If reset, all settings
+    are reset first so that unlisted registers have known values too.
+    reset_defaults are register values known after a reset, to tell when
+    it is done.
+    '''
+    name: str
+    settings: Dict[str, Any]
+    reset: bool = False
+    power_on: bool = True
+    reset_defaults: Dict[str, Any] = field(default_factory=dict)
+
+    def ordered_settings(self) -> List[tuple]:
+        order = {name: i for i, name in enumerate(STATE_FIELDS)}
+        return sorted(self.settings.items(), key=lambda item: order.get(item[0], len(order)))
+
+@dataclass
+class PresetStep:
+    '''written is False when the register already had the value, errors are the failed reads and writes'''
+    name: str
+    value: Any
+    written: bool = False
+    attempts: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+@dataclass
+class PresetReport:
+    preset: str
+    seconds: float = 0.0
+    power_on_seconds: float = 0.0
+    reset_seconds: float = 0.0
+    steps: List[PresetStep] = field(default_factory=list)
+
+    @property
+    def written(self) -> List[str]:
+        return [step.name for step in self.steps if step.written]
+
+# low input lag: fast input mode on the game console input, no reset so
+# that the preset only touches what it needs and takes a few round trips
+GAMING = Preset('gaming', {
+    'source_input': SourceInput.HDMI_1,
+    'fast_input_mode': Bool.ON,
+    'mute': Bool.ON
+})
+
+# what set_fast_mode always did, from factory settings
+FAST_MODE = Preset('fast_mode', dict(GAMING.settings), reset=True, reset_defaults={'fast_input_mode': Bool.OFF})
+
+PRESETS: Dict[str, Preset] = {preset.name: preset for preset in [GAMING, FAST_MODE]}
+
+def wait_until_settled(
+        read_fun: Callable[[], Any],
+        done: Callable[[Any], bool] = lambda value: True,
+        timeout: float = SETTLE_TIMEOUT_SECONDS,
+        stable_reads: int = SETTLE_STABLE_READS,
+        initial_interval: float = SETTLE_INITIAL_INTERVAL_SECONDS,
+        max_interval: float = SETTLE_MAX_INTERVAL_SECONDS
+    ) -> Any:
+    '''
+    Poll read_fun until it returns the same value, accepted by done,
+    stable_reads times in a row. A projector busy applying a change may not
+    answer, refuse commands or report intermediate values meanwhile.
+    Returns the settled value, raises SettleTimeout with the last value.
+    '''
+
+    deadline = time.monotonic() + timeout
+    interval = initial_interval
+    last = None
+    count = 0
+
+    while True:
+        try:
+            value = read_fun()
+        except (TransmissionError, CommandFailed):
+            count = 0
+        else:
+            count = count + 1 if count and value == last else 1
+            last = value
+            if done(value) and count >= stable_reads:
+                return value
+
+        now = time.monotonic()
+        if now >= deadline:
+            raise SettleTimeout(f'not settled after {timeout} s, last value {last}')
+
+        time.sleep(min(interval, deadline - now))
+        interval = min(interval * 2, max_interval)
+
+def ensure_powered_on(proj: ViewSonicProjector, report: PresetReport, settle_timeout: float) -> None:
+    '''
+    Turn the projector on unless it is on or warming up. A projector 
+    cooling down cannot be turned on before it is off, nor take settings 
+    while warming up: both transitions are waited for.
+    '''
+
+    start = time.monotonic()
+    try:
+        status = wait_until_settled(proj.get_power_status, stable_reads=1, timeout=settle_timeout)
+        if status == PowerStatus.COOL_DOWN:
+            wait_for_power_status(proj.get_power_status, PowerStatus.OFF, [PowerStatus.COOL_DOWN], POWER_OFF_TIMEOUT_SECONDS)
+            status = PowerStatus.OFF
+        if status == PowerStatus.WARM_UP:
+            wait_for_power_status(proj.get_power_status, PowerStatus.ON, [PowerStatus.WARM_UP], POWER_ON_TIMEOUT_SECONDS)
+        elif status != PowerStatus.ON:
+            proj.power_on()
+        else:
+            return
+    except (SettleTimeout, PowerTransitionTimeout, ValueError, TransmissionError, CommandFailed) as e:
+        raise PresetFailed(f'{report.preset}: could not power on, {type(e).__name__}: {e}', report)
+    report.power_on_seconds = time.monotonic() - start
+
+def reset_settings(proj: ViewSonicProjector, preset: Preset, settle_timeout: float) -> None:
+    '''
+    Reset all settings and wait until a register shows it: the projector
+    acknowledges the reset before applying it. The probe is a register 
+    with a known default it does not hold yet, done when it holds the 
+    default, else the first setting, done when it changed.
+    Gives up after settle_timeout, e.g. when that setting already had its
+    default: the settings written next are verified anyway.
+    '''
+
+    probe = done = None
+    for name, default in preset.reset_defaults.items():
+        value = wait_until_settled(lambda: read_register(proj, name), stable_reads=1, timeout=settle_timeout)
+        # a register already at its default would not show the reset
+        if value != default:
+            probe, done = name, (lambda value, default=default: value == default)
+            break
+
+    if probe is None and preset.settings:
+        probe = preset.ordered_settings()[0][0]
+        before = wait_until_settled(lambda: read_register(proj, probe), stable_reads=1, timeout=settle_timeout)
+        done = lambda value: value != before
+
+    if probe is None:
+        proj.reset_all_settings()
+        wait_until_settled(proj.get_power_status, timeout=settle_timeout)
+        return
+
+    proj.reset_all_settings()
+    with suppress(SettleTimeout):
+        wait_until_settled(lambda: read_register(proj, probe), done, timeout=settle_timeout)
+
+def read_register(proj: ViewSonicProjector, name: str) -> Any:
+    '''current value, bypassing the register cache'''
+    reg = proj.REGISTER_MAP[name]
+    return reg.decode(proj._read_frame(reg.cmd, use_cache=False))
+
+def apply_preset(
+        proj: ViewSonicProjector,
+        preset: Union[str, Preset],
+        verify_attempts: int = VERIFY_ATTEMPTS,
+        settle_timeout: float = SETTLE_TIMEOUT_SECONDS
+    ) -> PresetReport:
+    '''
+    Apply a preset (or the name of one in PRESETS). Each register is read
+    first and only written if it differs, then read back until it settles
+    on the value; it is written again up to verify_attempts times.
+    Returns how long each step took. A projector cooling down or warming
+    up is waited for, PresetFailed is raised if it does not come on.
+    '''
+
+    if isinstance(preset, str):
+        preset = PRESETS[preset]
+
+    start = time.monotonic()
+    report = PresetReport(preset.name)
+
+    if preset.power_on:
+        ensure_powered_on(proj, report, settle_timeout)
+
+    if preset.reset:
+        reset_start = time.monotonic()
+        reset_settings(proj, preset, settle_timeout)
+        report.reset_seconds = time.monotonic() - reset_start
+
+    for name, value in preset.ordered_settings():
+        step = PresetStep(name, value)
+        step_start = time.monotonic()
+        report.steps.append(step)
+
+        read = lambda: read_register(proj, name)
+        try:
+            current = read()
+        except (TransmissionError, CommandFailed) as e:
+            step.errors.append(f'{type(e).__name__}: {e}')
+            try:
+                current = wait_until_settled(read, timeout=settle_timeout)
+            except SettleTimeout as e:
+                # unknown, written below
+                step.errors.append(f'{type(e).__name__}: {e}')
+                current = None
+
+        # a write changing other settings must have settled before the next 
+        # step, other writes are done once acknowledged and read back
+        stable_reads = SETTLE_STABLE_READS if name in STATE_DEPENDENCIES else 1
+
+        while current != value:
+            if step.attempts == verify_attempts:
+                step.seconds = time.monotonic() - step_start
+                report.seconds = time.monotonic() - start
+                raise PresetFailed(f'{preset.name}: {name} is {current}, expected {value} after {step.attempts} writes', report)
+
+            try:
+                getattr(proj, 'set_' + name)(value)
+            except (TransmissionError, CommandFailed) as e:
+                # busy applying the previous change, retried below
+                step.errors.append(f'{type(e).__name__}: {e}')
+            step.written = True
+            step.attempts += 1
+
+            try:
+                current = wait_until_settled(
+                    read,
+                    lambda v: v == value,
+                    timeout = settle_timeout,
+                    stable_reads = stable_reads
+                )
+            except SettleTimeout as e:
+                step.errors.append(f'{type(e).__name__}: {e}')
+                try:
+                    current = read()
+                except (TransmissionError, CommandFailed) as e:
+                    step.errors.append(f'{type(e).__name__}: {e}')
+                    current = None
+
+        step.seconds = time.monotonic() - step_start
+
+    report.seconds = time.monotonic() - start
+    return report
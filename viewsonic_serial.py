@@ -1,16 +1,56 @@
 import serial
 import time
-from typing import Optional, Dict, Callable
+from typing import Optional, Dict, Callable, List, Tuple, Iterable, Iterator, Union, NamedTuple
 import os
 import json
+import queue
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from functools import lru_cache
+from dataclasses import dataclass, field, fields, replace, asdict
 from enum import Enum
 
+from viewsonic_transport import Transport, open_transport
+
 # TODO add delay to functions that require delays
 
 EMPTY = b'\x00'
 SCANFILE = 'scan.json'
-POWER_ON_WAIT_SECONDS = 60
-POWER_OFF_WAIT_SECONDS = 60
+PROFILES_FILE = 'profiles.json'
+POWER_ON_TIMEOUT_SECONDS = 180
+POWER_OFF_TIMEOUT_SECONDS = 180
+POLL_INITIAL_INTERVAL_SECONDS = 1.0
+POLL_MAX_INTERVAL_SECONDS = 5.0
+POLL_BACKOFF_FACTOR = 1.5
+STEP_DELAY_INITIAL_SECONDS = 0.02
+STEP_DELAY_MIN_SECONDS = 0.0
+STEP_DELAY_MAX_SECONDS = 0.2
+STEP_DELAY_MISS_SECONDS = 0.01
+INCREMENT_MAX_BURST = 32
+INCREMENT_MAX_ROUNDS = 10
+CACHE_DEFAULT_TTL_SECONDS = 2.0
+SCAN_PROBE_TIMEOUT_SECONDS = 0.5
+RX_BUFFER_SIZE = 256
+BAUD_PROBE_TIMEOUT_SECONDS = 0.2
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BACKOFF_BASE_SECONDS = 0.05
+RETRY_BACKOFF_MAX_SECONDS = 1.0
+TIMEOUT_P99_MULTIPLIER = 3.0
+TIMEOUT_MIN_SECONDS = 0.25
+TIMEOUT_MIN_SAMPLES = 20
+RTT_WINDOW = 200
+POWER_COMMAND_TIMEOUT_SECONDS = 30.0
+PIPELINE_MAX_DEPTH = 8
+DRAIN_QUIET_SECONDS = 0.1
+DRAIN_MAX_SECONDS = 1.0
+PIPELINE_TUNE_READS = 32
+PIPELINE_CHECK_INTERVAL = 16
+RESPONSE_KIND_ACK = 0x03
+RESPONSE_KIND_READ = 0x05
+RESPONSE_KIND_ERROR = 0x00
 
 class BytesEnum(bytes, Enum):
     """
@@ -29,6 +69,12 @@ class ProjectorOFF(Exception):
 class CommandFailed(Exception):
     pass
 
+class PowerTransitionTimeout(TimeoutError):
+    pass
+
+class AdjustmentFailed(RuntimeError):
+    pass
+
 def int_to_two_bytes(i: int) -> bytes:
     if i >= 0:
         b = bytes([i, 0x00])
@@ -481,9 +527,12 @@ class RemoteKey(BytesEnum):
     PLAY = b'\x2a'
     SUB_MENU = b'\x2b'
 
+# preallocated single bytes, avoids building a new object per decoded byte
+BYTE_VALUES = [bytes([i]) for i in range(256)]
+
 def checksum(packet: bytes) -> bytes:
     '''compute checksum as the sum of bytes 1 to end'''
-    return (sum(packet[1:]) % 256).to_bytes()
+    return BYTE_VALUES[sum(packet[1:]) & 0xFF]
 
 def payload_length(header: bytes) -> int:
     '''get payload length from header (data + checksum)'''
@@ -495,767 +544,2190 @@ def payload_length(header: bytes) -> int:
 def packet_data_to_ascii(response: bytes) -> str:
     data_start = payload_length(response) - 2
     data = response[-data_start:-1]
-    return data.decode('ascii').replace('\x00', '')
+    return str(data, 'ascii').replace('\x00', '')
+
+@lru_cache(maxsize=4096)
+def build_frame(packet: bytes) -> bytes:
+    '''append checksum to a query packet'''
+    return packet + checksum(packet)
+
+# read queries for every known register, computed once at import.
+# BytesEnum members do not hash like bytes, so both the CMD member and 
+# its plain bytes value are used as keys.
+READ_FRAMES: Dict[bytes, bytes] = {}
+for _cmd in CMD:
+    if len(_cmd) == 2:
+        READ_FRAMES[_cmd] = READ_FRAMES[bytes(_cmd)] = build_frame(HEADER.READ + _cmd)
+
+def read_frame(packet: bytes) -> bytes:
+    '''read query for a register'''
+    query = READ_FRAMES.get(packet)
+    if query is None:
+        query = build_frame(HEADER.READ + packet)
+    return query
+
+class StepDelay:
+    '''
+    Inter-step delay for increment commands, learned from readbacks:
+    shrinks while bursts land exactly, grows when steps get dropped.
+    '''
 
-def set_value_by_increment(
-        read_fun: Callable[[], int], 
-        increment_fun: Callable[[Adjustment], None], 
-        desired_value: int
-    ) -> None:
+    def __init__(
+            self,
+            initial: float = STEP_DELAY_INITIAL_SECONDS,
+            minimum: float = STEP_DELAY_MIN_SECONDS,
+            maximum: float = STEP_DELAY_MAX_SECONDS
+        ):
+        self.value = initial
+        self.minimum = minimum
+        self.maximum = maximum
 
-    # get number of steps and sign
-    current_value = read_fun()
-    steps = desired_value - current_value
-    step_type = Adjustment.DECREASE if steps < 0 else Adjustment.INCREASE
+    def on_success(self) -> None:
+        self.value = max(self.minimum, self.value / 2)
 
-    # iterate increments/decrements until value is reached 
-    for i in range(abs(steps)):
-        increment_fun(step_type)
-        time.sleep(0.1) # give the projector some time to process the requests
-    
-    # check we have the proper value
-    final_value = read_fun()
-    if final_value != desired_value:
-        raise RuntimeError('failed to set value')
+    def on_miss(self) -> None:
+        self.value = min(self.maximum, max(2 * self.value, STEP_DELAY_MISS_SECONDS))
 
-class ViewSonicProjector:
+class IncrementPlan:
     '''
-    Requires a crossover (null modem) cable for use with PC
-    Only 3 pins need to be connected (RX,TX and GND)
+    Decisions of set_value_by_increment: increments are sent in bursts, 
+    the value is read back after each burst to correct dropped steps or 
+    overshoot. Shared with the asyncio client, which only does the I/O.
     '''
 
-    VALID_BAUD_RATES = [2400,4800,9600,14400,19200,38400,115200]
-
     def __init__(
-        self,
-        port: str = '/dev/ttyUSB0',
-        baudrate: int = 115200,
-        data_byte_length = serial.EIGHTBITS,
-        parity_check = serial.PARITY_NONE,
-        num_stop_bit: int = serial.STOPBITS_ONE,
-        timeout: Optional[float] = 10.0,
-        write_timeout: Optional[float] = 1.0,
-        flow_control: bool = False,
-        verbose: bool = False
+            self,
+            desired_value: int,
+            step_delay: Optional[StepDelay] = None,
+            max_burst: int = INCREMENT_MAX_BURST,
+            max_rounds: int = INCREMENT_MAX_ROUNDS
         ):
+        self.desired_value = desired_value
+        self.step_delay = StepDelay() if step_delay is None else step_delay
+        self.max_burst = max_burst
+        self.max_rounds = max_rounds
+        self.rounds = 0
+        self.stalled = 0
+        self.current_value: Optional[int] = None
+        self._expected: Optional[int] = None
+
+    def next_burst(self, current_value: int) -> Optional[Tuple[Adjustment, int]]:
+        '''(direction, count) of the next burst given the value read, None when done'''
+
+        previous_value = self.current_value
+        self.current_value = current_value
+
+        if self._expected is not None:
+            if current_value == self._expected:
+                self.step_delay.on_success()
+            else:
+                self.step_delay.on_miss()
 
-        if baudrate not in self.VALID_BAUD_RATES:
-            raise ValueError(f'Supported baud rates are: {self.VALID_BAUD_RATES}')
-        
-        self.port = port
-        self.baudrate = baudrate
-        self.data_byte_length = data_byte_length
-        self.parity_check = parity_check
-        self.num_stop_bit = num_stop_bit
-        self.timeout = timeout
-        self.write_timeout = write_timeout
-        self.flow_control = flow_control
-        self.verbose = verbose
+            # value does not move anymore, most likely out of range
+            self.stalled = self.stalled + 1 if current_value == previous_value else 0
+            if self.stalled == 2:
+                return None
 
-        self.ser = serial.Serial(
-            port = port,
-            baudrate = baudrate,
-            bytesize = data_byte_length,
-            parity = parity_check,
-            stopbits = num_stop_bit,
-            timeout = timeout,
-            write_timeout= write_timeout,
-            rtscts = flow_control
-        )
+        steps = self.desired_value - current_value
+        if steps == 0 or self.rounds == self.max_rounds:
+            return None
+        self.rounds += 1
 
-    def __del__(self):
-        self.ser.close()
+        burst = min(abs(steps), self.max_burst)
+        self._expected = current_value + (burst if steps > 0 else -burst)
+        return (Adjustment.INCREASE if steps > 0 else Adjustment.DECREASE), burst
 
-    def power_on(self) -> None:
-        '''
-        Turn the projector on and wait for the projector to warm up.
-        No command can be sent while the projector is warming up.
-        '''
+    def check(self) -> None:
+        if self.current_value != self.desired_value:
+            raise AdjustmentFailed(f'failed to set value: expected {self.desired_value}, got {self.current_value}')
 
-        self._send_write_one_byte(CMD.POWER_ON + EMPTY)
-        
-        # leave some time for the projector to turn on
-        time.sleep(POWER_ON_WAIT_SECONDS)
+def set_value_by_increment(
+        read_fun: Callable[[], int], 
+        increment_fun: Callable[[Adjustment], None], 
+        desired_value: int,
+        step_delay: Optional[StepDelay] = None,
+        max_burst: int = INCREMENT_MAX_BURST,
+        max_rounds: int = INCREMENT_MAX_ROUNDS
+    ) -> None:
+    '''
+    Send increments in bursts, reading the value back after each burst
+    to correct dropped steps or overshoot.
+    '''
 
-        # make sure the projector is warmed up
-        while True:
-            res = self.get_power_status()
-                
-            if res in [PowerStatus.OFF, PowerStatus.WARM_UP]:
-                time.sleep(5)
+    plan = IncrementPlan(desired_value, step_delay, max_burst, max_rounds)
+    burst = plan.next_burst(read_fun())
 
-            elif res == PowerStatus.ON:
-                break
+    while burst is not None:
+        step_type, count = burst
+        for i in range(count):
+            increment_fun(step_type)
+            if plan.step_delay.value > 0:
+                time.sleep(plan.step_delay.value) 
+        burst = plan.next_burst(read_fun())
 
-            else:
-                raise ValueError
+    plan.check()
 
-    
-    def power_off(self) -> None:
+class PowerStatusPoll:
+    '''
+    Decisions of wait_for_power_status: polling intervals growing 
+    geometrically up to max_interval, until the status reaches target. 
+    Shared with the asyncio client, which only does the I/O.
+    '''
+
+    def __init__(
+            self,
+            target: PowerStatus,
+            transitional: List[PowerStatus],
+            timeout: float,
+            initial_interval: float = POLL_INITIAL_INTERVAL_SECONDS,
+            max_interval: float = POLL_MAX_INTERVAL_SECONDS,
+            backoff: float = POLL_BACKOFF_FACTOR
+        ):
+        self.target = target
+        self.transitional = transitional
+        self.timeout = timeout
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.start = time.monotonic()
+        self.deadline = self.start + timeout
+        self.interval = initial_interval
+        self.elapsed = 0.0
+
+    def next_delay(self, status: Optional[PowerStatus]) -> Optional[float]:
         '''
-        Turn the projector off and wait for the projector to cool down.
-        No command can be sent while the projector is cooling down.
+        Seconds to wait before polling again given the status read (None 
+        when the projector did not answer), None once target is reached.
         '''
-        self._send_write_one_byte(CMD.POWER_OFF + EMPTY)
 
-        # leave some time for the projector to turn off
-        time.sleep(POWER_OFF_WAIT_SECONDS)
+        now = time.monotonic()
+        self.elapsed = now - self.start
 
-        # Wait until the projector has cooled down
-        while True:
-            res = self.get_power_status()
+        if status == self.target:
+            return None
 
-            if res in [PowerStatus.ON, PowerStatus.COOL_DOWN]:
-                time.sleep(5)
+        if status is not None and status not in self.transitional:
+            raise ValueError(f'unexpected power status {status}')
 
-            elif res == PowerStatus.OFF:
-                break
+        if now >= self.deadline:
+            raise PowerTransitionTimeout(f'{self.target} not reached after {self.timeout} s')
 
-            else:
-                raise ValueError 
-            
-    def get_serial_number(self) -> str:
-        response = self._send_read(CMD.SERIAL_NUMBER)
-        return packet_data_to_ascii(response)
-    
-    def get_model(self) -> str:
-        response = self._send_read(CMD.PROJECTOR_MODEL)
-        return packet_data_to_ascii(response)
-    
-    def get_firmware_version(self) -> str:
-        response = self._send_read(CMD.FIRMWARE_VERSION)
-        return packet_data_to_ascii(response)
-            
-    def set_gamma(self, data: Gamma) -> None:
-        self._send_write_one_byte(CMD.GAMMA + data)
+        delay = min(self.interval, self.deadline - now)
+        self.interval = min(self.interval * self.backoff, self.max_interval)
+        return delay
 
-    def get_gamma(self) -> Gamma:
-        return Gamma(self._send_read_one_byte(CMD.GAMMA))
-
-    def set_warping_control_mode(self, data: WarpingControlMode) -> None:
-        self._send_write_one_byte(CMD.WARPING_CONTROL_MODE + data)
+def wait_for_power_status(
+        read_fun: Callable[[], PowerStatus],
+        target: PowerStatus,
+        transitional: List[PowerStatus],
+        timeout: float,
+        initial_interval: float = POLL_INITIAL_INTERVAL_SECONDS,
+        max_interval: float = POLL_MAX_INTERVAL_SECONDS,
+        backoff: float = POLL_BACKOFF_FACTOR
+    ) -> float:
+    '''
+    Poll the power status until it reaches target, starting with a short
+    interval that grows geometrically up to max_interval.
+    Returns the time elapsed in seconds.
+    '''
 
-    def get_warping_control_mode(self) -> WarpingControlMode:
-        return WarpingControlMode(self._send_read_one_byte(CMD.WARPING_CONTROL_MODE))
-    
-    def set_audio_mode(self, data: AudioMode) -> None:
-        self._send_write_one_byte(CMD.AUDIO_MODE + data)
+    poll = PowerStatusPoll(target, transitional, timeout, initial_interval, max_interval, backoff)
+
+    while True:
+        try:
+            status = read_fun()
+        except TransmissionError:
+            # the projector may not answer while switching state
+            status = None
+
+        delay = poll.next_delay(status)
+        if delay is None:
+            return poll.elapsed
+        time.sleep(delay)
+
+def decode_light_source_usage_time(response: bytes) -> int:
+    return int.from_bytes(response[7:11], byteorder='little')
+
+def decode_operating_temperature(response: bytes) -> float:
+    return int.from_bytes(response[7:11], byteorder='little') / 10
+
+def decode_error_status(response: bytes) -> Dict:
+    error_status = response[7:31]
+    err = {}
+    err['lamp_fail_count'] = error_status[0]
+    err['lamp_lit_error_count'] = error_status[1]
+    err['fan1_error_count'] = error_status[2]
+    err['fan2_error_count'] = error_status[3]
+    err['fan3_error_count'] = error_status[4]
+    err['fan4_error_count'] = error_status[5]
+    err['diode1_open_error_count'] = error_status[6]
+    err['diode2_open_error_count'] = error_status[7]
+    err['diode1_short_error_count'] = error_status[8]
+    err['diode2_short_error_count'] = error_status[9]
+    err['temperature1_error_count'] = error_status[10]
+    err['temperature2_error_count'] = error_status[11]
+    err['fan_IC1_error_count'] = error_status[12]
+    err['color_wheel_error_count'] = error_status[13]
+    err['color_wheel_startup_error_count'] = error_status[14]
+    err['UART1_error_count'] = error_status[15]
+    err['abnormal_powerdown'] = error_status[16]
+    err['first_burn_in'] = int.from_bytes(error_status[17:21], byteorder='little')
+    err['lamp_status'] = error_status[21]
+    err['lamp_error_status'] = bytes(error_status[22:24])
+    return err
+
+REGISTER_ASCII = 'ascii'
+REGISTER_STRUCT = 'struct'
+
+@dataclass(eq=False)
+class Register:
+    '''
+    Entry of the register table, from which the projector accessors are 
+    generated (see generate_accessors):
+    get_<name> if readable, set_<name> if writable (enum values) or 
+    adjustable (integers, set by increments), adjust_<name> if adjust is set.
+    width: 1 or 2 bytes, REGISTER_ASCII for text, or REGISTER_STRUCT for 
+    multi-field answers decoded by a hand-written getter.
+    Integers are unsigned on 1 byte and signed on 2 bytes.
+    '''
+    name: str
+    cmd: bytes
+    value: type = int
+    width: Union[int, str] = 1
+    readable: bool = True
+    writable: bool = False
+    adjust: Optional[bytes] = None
+    adjust_width: int = 1
+    volatile: bool = False
+    immutable: bool = False
+    doc: Optional[str] = None
+
+    def __post_init__(self):
+        self.cmd = bytes(self.cmd)
+        if self.adjust is not None:
+            self.adjust = bytes(self.adjust)
+
+        # precomputed frames and decoding tables, the accessors only do lookups
+        self.read_query = build_frame(HEADER.READ + self.cmd)
+        self._members: Dict[int, BytesEnum] = {}
+        self._write_frames: Dict[bytes, bytes] = {}
+        self._adjust_frames: Dict[bytes, bytes] = {}
+
+        if isinstance(self.value, type) and issubclass(self.value, BytesEnum):
+            self._members = {int.from_bytes(m, 'little'): m for m in self.value}
+            if self.writable:
+                self._write_frames = {m: self._encode(m) for m in self.value}
+        if self.adjust is not None:
+            header = HEADER.WRITE_ONE_BYTE if self.adjust_width == 1 else HEADER.WRITE_TWO_BYTE
+            self._adjust_frames = {a: build_frame(header + self.adjust + a) for a in Adjustment}
+
+    @property
+    def settable(self) -> bool:
+        return self.writable or self.adjust is not None
+
+    def _encode(self, data: bytes) -> bytes:
+        header = HEADER.WRITE_ONE_BYTE if self.width == 1 else HEADER.WRITE_TWO_BYTE
+        return build_frame(header + self.cmd + self.value(data))
+
+    def decode(self, response: bytes):
+        '''value of a read response'''
+        if self.width == REGISTER_ASCII:
+            return packet_data_to_ascii(response)
+        if self.value is int:
+            return one_byte_to_int(response[-2:-1]) if self.width == 1 else two_bytes_to_int(response[-3:-1])
+        if self.width == 1:
+            value = response[-2]
+        else:
+            value = int.from_bytes(response[-3:-1], 'little')
+        member = self._members.get(value)
+        if member is None:
+            raise ValueError(f'{bytes(response[-1 - self.width:-1])!r} is not a valid {self.value.__name__}')
+        return member
+
+    def write_frame(self, data: bytes) -> bytes:
+        '''write query for an enum value, validated against the enum'''
+        frame = self._write_frames.get(data)
+        return self._encode(data) if frame is None else frame
+
+    def adjust_frame(self, data: Adjustment) -> bytes:
+        frame = self._adjust_frames.get(data)
+        if frame is None:
+            frame = self._adjust_frames[Adjustment(data)]
+        return frame
+
+_PRIMARY_COLOR_DOC = 'set primary color before you adjust hue/saturation/gain for that color'
+
+# ViewSonic X2-4K. Other models can subclass ViewSonicProjector with their 
+# own REGISTERS and ACTIONS.
+REGISTERS: List[Register] = [
+    Register('serial_number', CMD.SERIAL_NUMBER, str, REGISTER_ASCII, immutable=True),
+    Register('model', CMD.PROJECTOR_MODEL, str, REGISTER_ASCII, immutable=True),
+    Register('firmware_version', CMD.FIRMWARE_VERSION, str, REGISTER_ASCII, immutable=True),
+    Register('gamma', CMD.GAMMA, Gamma, writable=True),
+    Register('warping_control_mode', CMD.WARPING_CONTROL_MODE, WarpingControlMode, writable=True),
+    Register('audio_mode', CMD.AUDIO_MODE, AudioMode, writable=True),
+    Register('power_status', CMD.POWER_ON, PowerStatus, volatile=True),
+    Register('splash_screen', CMD.SPLASH_SCREEN, SplashScreen, writable=True),
+    Register('quick_poweroff', CMD.QUICK_POWEROFF, Bool, writable=True),
+    Register('auto_v_keystone', CMD.AUTO_V_KEYSTONE, Bool, writable=True),
+    Register('warping_enable', CMD.WARPING_ENABLE, Bool, writable=True),
+    Register('fast_input_mode', CMD.FAST_INPUT_MODE, Bool, writable=True),
+    Register('high_altitude_mode', CMD.HIGH_ALTITUDE_MODE, Bool, writable=True),
+    Register('light_source_mode', CMD.LIGHT_SOURCE_MODE, LightSourceMode, writable=True),
+    Register('zoom', CMD.ZOOM, Zoom, 2, writable=True),
+    Register('message', CMD.MESSAGE, Bool, writable=True),
+    Register('projector_position', CMD.PROJECTOR_POSITION, ProjectorPosition, writable=True),
+    Register('projector_3d_sync', CMD.PROJECTOR_3D_SYNC, Projector3DSync, writable=True),
+    # TODO: problem returns b'\x80'
+    Register('projector_3d_sync_invert', CMD.PROJECTOR_3D_SYNC_INVERT, Bool, writable=True),
+    Register('contrast', CMD.CONTRAST, int, 2, adjust=CMD.CONTRAST),
+    Register('brightness', CMD.BRIGHTNESS, int, 2, adjust=CMD.BRIGHTNESS),
+    Register('color_temperature_red_gain', CMD.COLOR_TEMPERATURE_RED_GAIN, int, 2, 
+        adjust=CMD.COLOR_TEMPERATURE_RED_GAIN_ADJUST, adjust_width=2),
+    Register('color_temperature_green_gain', CMD.COLOR_TEMPERATURE_GREEN_GAIN, int, 2, 
+        adjust=CMD.COLOR_TEMPERATURE_GREEN_GAIN_ADJUST, adjust_width=2),
+    Register('color_temperature_blue_gain', CMD.COLOR_TEMPERATURE_BLUE_GAIN, int, 2, 
+        adjust=CMD.COLOR_TEMPERATURE_BLUE_GAIN_ADJUST, adjust_width=2),
+    Register('color_temperature_red_offset', CMD.COLOR_TEMPERATURE_RED_OFFSET, int, 2, 
+        adjust=CMD.COLOR_TEMPERATURE_RED_OFFSET_ADJUST, adjust_width=2),
+    Register('color_temperature_green_offset', CMD.COLOR_TEMPERATURE_GREEN_OFFSET, int, 2, 
+        adjust=CMD.COLOR_TEMPERATURE_GREEN_OFFSET_ADJUST, adjust_width=2),
+    Register('color_temperature_blue_offset', CMD.COLOR_TEMPERATURE_BLUE_OFFSET, int, 2, 
+        adjust=CMD.COLOR_TEMPERATURE_BLUE_OFFSET_ADJUST, adjust_width=2),
+    Register('aspect_ratio', CMD.ASPECT_RATIO, AspectRatio, writable=True),
+    Register('horizontal_position', CMD.HORIZONTAL_POSITION, int, 1, adjust=CMD.HORIZONTAL_POSITION,
+        doc='Increase is RIGHT, decrease is LEFT'),
+    Register('vertical_position', CMD.VERTICAL_POSITION, int, 1, adjust=CMD.VERTICAL_POSITION,
+        doc='Increase is DOWN, decrease is UP'),
+    Register('color_temperature', CMD.COLOR_TEMPERATURE, ColorTemperature, writable=True),
+    Register('blank', CMD.BLANK, Bool, writable=True),
+    Register('vertical_keystone', CMD.KEYSTONE_VERTICAL, int, 1, adjust=CMD.KEYSTONE_VERTICAL),
+    Register('horizontal_keystone', CMD.KEYSTONE_HORIZONTAL, int, 1, adjust=CMD.KEYSTONE_HORIZONTAL),
+    Register('color_mode', CMD.COLOR_MODE, ColorMode, writable=True),
+    Register('auto_power_off', CMD.AUTO_POWER_OFF, AutoPowerOff, writable=True),
+    Register('ISF_mode', CMD.ISF_MODE, Bool, writable=True),
+    Register('HDR', CMD.HDR, HDR, writable=True),
+    Register('primary_color', CMD.PRIMARY_COLOR, PrimaryColor, writable=True, doc=_PRIMARY_COLOR_DOC),
+    Register('hue', CMD.HUE_TINT, int, 2, adjust=CMD.HUE_TINT, doc=_PRIMARY_COLOR_DOC),
+    Register('saturation', CMD.SATURATION, int, 2, adjust=CMD.SATURATION, doc=_PRIMARY_COLOR_DOC),
+    Register('gain', CMD.GAIN, int, 2, adjust=CMD.GAIN, doc=_PRIMARY_COLOR_DOC),
+    Register('sharpness', CMD.SHARPNESS, int, 2, adjust=CMD.SHARPNESS),
+    Register('freeze', CMD.FREEZE, Bool, writable=True),
+    Register('source_input', CMD.SOURCE_INPUT, SourceInput, writable=True),
+    Register('quick_autosearch', CMD.QUICK_AUTO_SEARCH, Bool, writable=True),
+    Register('mute', CMD.MUTE, Bool, writable=True),
+    Register('silence_mode', CMD.SILENCE_MODE, Bool, writable=True),
+    # adjusted with the separate VOLUME_UP / VOLUME_DOWN commands, see adjust_volume
+    Register('volume', CMD.VOLUME, int, 1),
+    Register('language', CMD.LANGUAGE, Language, writable=True),
+    Register('light_source_usage_time', CMD.LIGHT_SOURCE_USAGE_TIME, int, REGISTER_STRUCT, volatile=True),
+    Register('HDMI_format', CMD.HDMI_FORMAT, HDMIFormat, writable=True),
+    Register('HDMI_range', CMD.HDMI_RANGE, HDMIRange, writable=True),
+    Register('CEC', CMD.CEC, Bool, writable=True),
+    Register('error_status', CMD.ERROR_STATUS, dict, REGISTER_STRUCT, volatile=True),
+    Register('unknown_status_info', CMD.UNKNOWN_STATUS_INFO, bytes, REGISTER_STRUCT, volatile=True),
+    Register('brilliant_color', CMD.BRILLIANT_COLOR, BrilliantColor, writable=True),
+    Register('remote_control_code', CMD.REMOTE_CONTROL_CODE, RemoteControlCode, writable=True),
+    Register('screen_color', CMD.SCREEN_COLOR, ScreenColor, writable=True),
+    Register('overscan', CMD.OVER_SCAN, OverScan, writable=True),
+    Register('remote_key', CMD.REMOTE_KEY, RemoteKey, writable=True),
+    Register('operating_temperature', CMD.OPERATING_TEMPERATURE, float, REGISTER_STRUCT, volatile=True),
+]
+
+# commands without data, generated as methods without arguments
+ACTIONS: Dict[str, bytes] = {
+    'reset_all_settings': bytes(CMD.RESET_ALL_SETTINGS),
+    'reset_color_settings': bytes(CMD.RESET_COLOR_SETTINGS),
+    'cycle_aspect_ratio': bytes(CMD.ASPECT_RATIO_CYCLE),
+    'auto_adjust': bytes(CMD.AUTO_ADJUST),
+    'cycle_color_mode': bytes(CMD.COLOR_MODE_CYCLE),
+    'volume_up': bytes(CMD.VOLUME_UP),
+    'volume_down': bytes(CMD.VOLUME_DOWN),
+    'reset_light_source_usage_time': bytes(CMD.LIGHT_SOURCE_USAGE_TIME),
+    'cycle_lamp_mode': bytes(CMD.LAMP_MODE_CYCLE),
+    'cycle_audio_mode': bytes(CMD.AUDIO_MODE_CYCLE)
+}
+
+def register_accessors(registers: Iterable[Register], actions: Dict[str, bytes]) -> Dict[str, Tuple[str, object]]:
+    '''
+    Accessor name -> (kind, register or action command), kinds are 
+    'get', 'set', 'set_by_increment', 'adjust' and 'action'.
+    Used to generate both the blocking and the asyncio accessors.
+    '''
 
-    def get_audio_mode(self) -> AudioMode:
-        return AudioMode(self._send_read_one_byte(CMD.AUDIO_MODE))
-    
-    def get_power_status(self) -> PowerStatus:
-        return PowerStatus(self._send_read_one_byte(CMD.POWER_ON))
-    
-    def reset_all_settings(self) -> None:
-        self._send_write_one_byte(CMD.RESET_ALL_SETTINGS + EMPTY)
+    res = {}
+    for reg in registers:
+        if reg.readable and reg.width != REGISTER_STRUCT:
+            res['get_' + reg.name] = ('get', reg)
+        if reg.writable:
+            res['set_' + reg.name] = ('set', reg)
+        if reg.adjust is not None:
+            res['adjust_' + reg.name] = ('adjust', reg)
+            if reg.readable:
+                res['set_' + reg.name] = ('set_by_increment', reg)
+    for name, cmd in actions.items():
+        res[name] = ('action', cmd)
+    return res
+
+def _accessor_annotations(kind: str, reg) -> Dict[str, type]:
+    if kind == 'get':
+        return {'return': reg.value}
+    if kind == 'set':
+        return {'data': reg.value, 'return': None}
+    if kind == 'set_by_increment':
+        return {'value': int, 'return': None}
+    if kind == 'adjust':
+        return {'data': Adjustment, 'return': None}
+    return {'return': None}
+
+def _make_accessor(name: str, kind: str, reg) -> Callable:
+
+    if kind == 'get':
+        cmd, decode = reg.cmd, reg.decode
+        def accessor(self):
+            return decode(self._read_frame(cmd))
+
+    elif kind == 'set':
+        cmd, write_frame = reg.cmd, reg.write_frame
+        def accessor(self, data):
+            self._send_write_frame(write_frame(data), cmd)
+
+    elif kind == 'adjust':
+        cmd, adjust_frame = reg.adjust, reg.adjust_frame
+        def accessor(self, data):
+            self._send_write_frame(adjust_frame(data), cmd)
+
+    elif kind == 'set_by_increment':
+        getter, adjuster = 'get_' + reg.name, 'adjust_' + reg.name
+        def accessor(self, value):
+            self._set_value_by_increment(getattr(self, getter), getattr(self, adjuster), value)
 
-    def reset_color_settings(self) -> None:
-        self._send_write_one_byte(CMD.RESET_COLOR_SETTINGS + EMPTY)
+    else:
+        frame, cmd = build_frame(HEADER.WRITE_ONE_BYTE + reg + EMPTY), reg
+        def accessor(self):
+            self._send_write_frame(frame, cmd)
 
-    def set_splash_screen(self, data: SplashScreen) -> None:
-        self._send_write_one_byte(CMD.SPLASH_SCREEN + data)
+    return accessor
 
-    def get_splash_screen(self) -> SplashScreen:
-        return SplashScreen(self._send_read_one_byte(CMD.SPLASH_SCREEN))
+def _make_disabled(name: str) -> Callable:
+    def accessor(self, *args):
+        raise FunctionDisabled(f'{name} is not in the register table of {type(self).__name__}')
+    return accessor
 
-    def set_quick_poweroff(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.QUICK_POWEROFF + data)
+def generate_accessors(
+        cls: type, 
+        make: Callable[[str, str, object], Callable] = _make_accessor,
+        disabled: Callable[[str], Callable] = _make_disabled
+    ) -> None:
+    '''
+    Add the accessors described by cls.REGISTERS and cls.ACTIONS to cls. 
+    Methods written by hand in cls are kept. Accessors inherited from a 
+    parent table but missing from this one raise FunctionDisabled.
+    '''
 
-    def get_quick_poweroff(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.QUICK_POWEROFF))
+    accessors = register_accessors(cls.REGISTERS, cls.ACTIONS)
+    generated = set()
+
+    for name, (kind, reg) in accessors.items():
+        generated.add(name)
+        if name in cls.__dict__:
+            continue
+        accessor = make(name, kind, reg)
+        accessor.__name__ = name
+        accessor.__qualname__ = f'{cls.__name__}.{name}'
+        accessor.__annotations__ = _accessor_annotations(kind, reg)
+        accessor.__doc__ = getattr(reg, 'doc', None)
+        setattr(cls, name, accessor)
+
+    for base in cls.__mro__[1:]:
+        for name in getattr(base, '_generated_accessors', ()):
+            if name not in generated and name not in cls.__dict__:
+                setattr(cls, name, disabled(name))
+                generated.add(name)
+
+    cls._generated_accessors = frozenset(generated)
+    cls.REGISTER_MAP = {reg.name: reg for reg in cls.REGISTERS}
+
+# registers that never change for a given unit
+IMMUTABLE_REGISTERS = [reg.cmd for reg in REGISTERS if reg.immutable]
+
+# registers that change on their own, never cached by default
+VOLATILE_REGISTERS = [reg.cmd for reg in REGISTERS if reg.volatile]
+
+# registers that depend on the current color mode / color temperature
+COLOR_TEMPERATURE_REGISTERS = [
+    CMD.COLOR_TEMPERATURE_RED_GAIN,
+    CMD.COLOR_TEMPERATURE_GREEN_GAIN,
+    CMD.COLOR_TEMPERATURE_BLUE_GAIN,
+    CMD.COLOR_TEMPERATURE_RED_OFFSET,
+    CMD.COLOR_TEMPERATURE_GREEN_OFFSET,
+    CMD.COLOR_TEMPERATURE_BLUE_OFFSET
+]
+
+PRIMARY_COLOR_REGISTERS = [
+    CMD.HUE_TINT,
+    CMD.SATURATION,
+    CMD.GAIN
+]
+
+COLOR_REGISTERS = [
+    CMD.CONTRAST,
+    CMD.BRIGHTNESS,
+    CMD.SHARPNESS,
+    CMD.GAMMA,
+    CMD.COLOR_TEMPERATURE,
+    CMD.BRILLIANT_COLOR,
+    CMD.PRIMARY_COLOR,
+    CMD.ISF_MODE,
+    CMD.HDR
+] + COLOR_TEMPERATURE_REGISTERS + PRIMARY_COLOR_REGISTERS
+
+# read registers affected by a write, keyed by the first two bytes of the 
+# written command. None means every mutable register.
+# Writes that are not listed only invalidate the register they target.
+_WRITE_INVALIDATES = {
+    CMD.POWER_ON: None,
+    CMD.POWER_OFF: None,
+    CMD.RESET_ALL_SETTINGS: None,
+    CMD.RESET_TO_FACTORY_DEFAULT: None,
+    CMD.REMOTE_KEY: None,
+    CMD.RESET_COLOR_SETTINGS: [CMD.COLOR_MODE] + COLOR_REGISTERS,
+    CMD.COLOR_MODE: [CMD.COLOR_MODE] + COLOR_REGISTERS,
+    CMD.COLOR_MODE_CYCLE: [CMD.COLOR_MODE] + COLOR_REGISTERS,
+    CMD.ISF_MODE: [CMD.COLOR_MODE] + COLOR_REGISTERS,
+    CMD.HDR: [CMD.COLOR_MODE] + COLOR_REGISTERS,
+    CMD.COLOR_TEMPERATURE: [CMD.COLOR_TEMPERATURE] + COLOR_TEMPERATURE_REGISTERS,
+    CMD.COLOR_TEMPERATURE_RED_GAIN_ADJUST[:2]: COLOR_TEMPERATURE_REGISTERS[:3],
+    CMD.COLOR_TEMPERATURE_RED_OFFSET_ADJUST[:2]: COLOR_TEMPERATURE_REGISTERS[3:],
+    CMD.PRIMARY_COLOR: [CMD.PRIMARY_COLOR] + PRIMARY_COLOR_REGISTERS,
+    CMD.ASPECT_RATIO_CYCLE: [CMD.ASPECT_RATIO],
+    CMD.AUDIO_MODE_CYCLE: [CMD.AUDIO_MODE],
+    CMD.LAMP_MODE_CYCLE: [CMD.LIGHT_SOURCE_MODE],
+    CMD.VOLUME_UP: [CMD.VOLUME],
+    CMD.VOLUME_DOWN: [CMD.VOLUME],
+    CMD.SET_VOLUME_LEVEL: [CMD.VOLUME],
+    CMD.AUTO_ADJUST: [CMD.HORIZONTAL_POSITION, CMD.VERTICAL_POSITION],
+}
+# BytesEnum members do not hash like bytes, use plain bytes keys
+WRITE_INVALIDATES: Dict[bytes, Optional[List[bytes]]] = {
+    bytes(k): None if v is None else [bytes(c) for c in v] 
+    for k, v in _WRITE_INVALIDATES.items()
+}
+
+class RegisterCache:
+    '''
+    Cache of read responses keyed by CMD.
+    Immutable registers are kept forever, volatile ones are never kept,
+    other registers expire after their TTL. Writes invalidate the registers 
+    they affect (see WRITE_INVALIDATES).
+    '''
 
-    def set_auto_v_keystone(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.AUTO_V_KEYSTONE + data)
+    def __init__(
+            self,
+            default_ttl: float = CACHE_DEFAULT_TTL_SECONDS,
+            ttl: Optional[Dict[bytes, float]] = None
+        ):
 
-    def get_auto_v_keystone(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.AUTO_V_KEYSTONE))
-    
-    def set_warping_enable(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.WARPING_ENABLE + data)
+        self.default_ttl = default_ttl
+        self.ttl: Dict[bytes, float] = {bytes(c): float('inf') for c in IMMUTABLE_REGISTERS}
+        self.ttl.update({bytes(c): 0.0 for c in VOLATILE_REGISTERS})
+        if ttl is not None:
+            self.ttl.update({bytes(c): t for c, t in ttl.items()})
+
+        self.entries: Dict[bytes, Tuple[float, bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, cmd: bytes) -> float:
+        return self.ttl.get(bytes(cmd), self.default_ttl)
+
+    def get(self, cmd: bytes) -> Optional[bytes]:
+        entry = self.entries.get(bytes(cmd))
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, cmd: bytes, response: bytes) -> None:
+        ttl = self.ttl_for(cmd)
+        if ttl > 0:
+            self.entries[bytes(cmd)] = (time.monotonic() + ttl, response)
+
+    def invalidate(self, cmds: Iterable[bytes]) -> None:
+        for cmd in cmds:
+            self.entries.pop(bytes(cmd), None)
+
+    def invalidate_write(self, packet: bytes) -> None:
+        '''invalidate every register affected by a write packet (CMD + data)'''
+
+        key = bytes(packet[:2])
+        affected = WRITE_INVALIDATES.get(key, [key])
+        if affected is None:
+            self.clear(keep_immutable=True)
+        else:
+            self.invalidate(affected)
+
+    def clear(self, keep_immutable: bool = False) -> None:
+        if keep_immutable:
+            self.entries = {
+                k: v for k, v in self.entries.items() 
+                if self.ttl_for(k) == float('inf')
+            }
+        else:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries)}
+
+# writes that move a value relative to the current one: sending them twice 
+# is not the same as sending them once, so they are never retried
+NON_IDEMPOTENT_WRITES = [reg.adjust[:2] for reg in REGISTERS if reg.adjust is not None] + [bytes(c) for c in [
+    CMD.VOLUME_UP,
+    CMD.VOLUME_DOWN,
+    CMD.COLOR_MODE_CYCLE,
+    CMD.ASPECT_RATIO_CYCLE,
+    CMD.AUDIO_MODE_CYCLE,
+    CMD.LAMP_MODE_CYCLE,
+    CMD.REMOTE_KEY
+]]
+
+# writes the projector is slow to acknowledge
+SLOW_WRITES = {
+    bytes(CMD.POWER_ON): POWER_COMMAND_TIMEOUT_SECONDS,
+    bytes(CMD.POWER_OFF): POWER_COMMAND_TIMEOUT_SECONDS
+}
+
+def frame_command(query: bytes) -> Tuple[bool, bytes]:
+    '''(is_write, CMD) of a complete query frame'''
+    if query[0] == HEADER.READ[0]:
+        return False, bytes(query[len(HEADER.READ):len(HEADER.READ) + 2])
+    return True, bytes(query[len(HEADER.WRITE_ONE_BYTE):len(HEADER.WRITE_ONE_BYTE) + 2])
+
+class RetryPolicy:
+    '''
+    Per-command read timeouts learned from the observed round-trip times,
+    and retries of transient transmission errors with jittered exponential 
+    backoff. 
+    Until min_samples round trips are recorded for a command the timeout
+    learned from all reads is used for a read, the default timeout otherwise,
+    then multiplier * p99 of the command, within [min_timeout, default].
+    A retry after a timeout doubles the timeout, up to the default.
+    '''
 
-    def get_warping_enable(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.WARPING_ENABLE))
-    
-    def set_fast_input_mode(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.FAST_INPUT_MODE + data)
+    def __init__(
+            self,
+            default_timeout: Optional[float] = 10.0,
+            multiplier: float = TIMEOUT_P99_MULTIPLIER,
+            min_timeout: float = TIMEOUT_MIN_SECONDS,
+            min_samples: int = TIMEOUT_MIN_SAMPLES,
+            window: int = RTT_WINDOW,
+            max_attempts: int = RETRY_MAX_ATTEMPTS,
+            backoff_base: float = RETRY_BACKOFF_BASE_SECONDS,
+            backoff_max: float = RETRY_BACKOFF_MAX_SECONDS,
+            slow_writes: Optional[Dict[bytes, float]] = None
+        ):
 
-    def get_fast_input_mode(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.FAST_INPUT_MODE))
-        
-    def set_high_altitude_mode(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.HIGH_ALTITUDE_MODE + data)
+        self.default_timeout = default_timeout
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.window = window
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.slow_writes = dict(SLOW_WRITES if slow_writes is None else slow_writes)
+        self.non_idempotent = set(NON_IDEMPOTENT_WRITES)
+
+        self.rtts: Dict[Tuple[bool, bytes], deque] = {}
+        self.learned: Dict[Tuple[bool, bytes], float] = {}
+        # all reads together, the fallback of reads without enough samples
+        self.read_rtts: deque = deque(maxlen=window)
+        self.read_learned: Optional[float] = None
+        self._reads = 0
+        self.retries = 0
+
+    def _learn(self, samples: deque) -> float:
+        ordered = sorted(samples)
+        p99 = ordered[max(0, -(-99 * len(ordered) // 100) - 1)]
+        return max(self.min_timeout, self.multiplier * p99)
+
+    def record(self, write: bool, cmd: bytes, rtt: float) -> None:
+        key = (write, cmd)
+        samples = self.rtts.get(key)
+        if samples is None:
+            samples = self.rtts[key] = deque(maxlen=self.window)
+        samples.append(rtt)
+
+        # sorting the window on every exchange is wasteful, refresh now and then
+        if len(samples) >= self.min_samples and len(samples) % 10 == 0:
+            self.learned[key] = self._learn(samples)
+
+        if not write:
+            self.read_rtts.append(rtt)
+            self._reads += 1
+            if self._reads >= self.min_samples and self._reads % 10 == 0:
+                self.read_learned = self._learn(self.read_rtts)
+
+    def timeout_for(self, write: bool, cmd: bytes, attempt: int = 0) -> Optional[float]:
+
+        if write and cmd in self.slow_writes:
+            return self.slow_writes[cmd]
+
+        timeout = self.learned.get((write, cmd))
+        if timeout is None and not write:
+            timeout = self.read_learned
+        if timeout is None:
+            return self.default_timeout
+
+        timeout *= 2 ** attempt
+        if self.default_timeout is not None:
+            timeout = min(timeout, self.default_timeout)
+        return timeout
+
+    def attempts_for(self, write: bool, cmd: bytes) -> int:
+        if write and cmd in self.non_idempotent:
+            return 1
+        return self.max_attempts
+
+    def backoff(self, attempt: int) -> float:
+        '''full jitter: uniform in [0, base * 2^attempt]'''
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def reset(self) -> None:
+        '''forget learned timeouts, e.g. after a baud rate change'''
+        self.rtts.clear()
+        self.learned.clear()
+        self.read_rtts.clear()
+        self.read_learned = None
+        self._reads = 0
+
+# response kinds accepted for each kind of query, DISABLED and PROJ_OFF can 
+# answer anything
+EXPECTED_WRITE_RESPONSES = (RESPONSE_KIND_ACK, RESPONSE_KIND_ERROR)
+EXPECTED_READ_RESPONSES = (RESPONSE_KIND_READ, RESPONSE_KIND_ERROR)
+
+def is_response_header(header: bytes) -> bool:
+    '''plausible response header: known kind, fixed bytes and a short payload'''
+    if header[2] != 0x00 or header[4] != 0x00:
+        return False
+    if header[1] == 0x14:
+        return header[0] in (RESPONSE_KIND_ACK, RESPONSE_KIND_READ, RESPONSE_KIND_ERROR)
+    # PROJ_OFF is all zeros
+    return header[0] == 0x00 and header[1] == 0x00 and header[3] == 0x00
+
+class ExchangeEvent(NamedTuple):
+    '''
+    One exchange as seen by the hooks of a ViewSonicProjector.
+    Spans are in seconds: write is the time spent writing the query, 
+    header the wait until the response header was complete, payload the
+    rest of the response.
+    '''
+    cmd: bytes
+    write: bool
+    query: bytes
+    response: Optional[bytes]
+    error: Optional[BaseException]
+    attempt: int
+    write_seconds: float
+    header_seconds: float
+    payload_seconds: float
+
+    @property
+    def seconds(self) -> float:
+        return self.write_seconds + self.header_seconds + self.payload_seconds
+
+def print_exchange(event: ExchangeEvent) -> None:
+    '''hex dump of the frames, installed by verbose=True'''
+    print('>> ' + event.query.hex(' '))
+    if event.response is not None:
+        print(event.response.hex(' '))
+    if event.error is not None:
+        print(f'!! {type(event.error).__name__} {event.error}')
+    print()
+
+# is_response_header only accepts payloads of up to 255 bytes + checksum
+FRAME_MAX_BYTES = HEADER.NUM_BYTES + 0xFF + 1
+
+class FrameReader:
+    '''
+    Read response frames from a byte stream, resynchronising on garbage.
+    Only the bytes a frame still needs are requested from the transport, 
+    so frames that follow (late or pipelined answers) stay in the stream.
+    Bytes that do not start a plausible header are dropped, as are complete 
+    frames of an unexpected kind, e.g. the late ACK of a timed out write 
+    while waiting for a read response.
+    Bytes are read into one preallocated buffer, the received bytes are 
+    buffer[start:end]: nothing is allocated or moved per frame.
+    '''
 
-    def get_high_altitude_mode(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.HIGH_ALTITUDE_MODE))
-    
-    def set_light_source_mode(self, data: LightSourceMode) -> None:
-        self._send_write_one_byte(CMD.LIGHT_SOURCE_MODE + data)
+    def __init__(self, transport: Transport):
+        self.transport = transport
+        self.buffer = bytearray(FRAME_MAX_BYTES)
+        self._view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        self.discarded_bytes = 0
+        self.discarded_frames = 0
+        # when timed, header_at is the perf_counter time the last header was complete
+        self.timed = False
+        self.header_at = 0.0
+
+    def _fill(self, size: int) -> bool:
+        '''read until the buffer holds size bytes from start, False on timeout'''
+        if self.end - self.start >= size:
+            return True
+        if self.start + size > len(self.buffer):
+            # make room at the end, at most one partial frame is moved
+            n = self.end - self.start
+            self.buffer[:n] = self.buffer[self.start:self.end]
+            self.start, self.end = 0, n
+        self.end += self.transport.readinto(self._view[self.end:self.start + size])
+        return self.end - self.start == size
+
+    def _skip(self, n: int) -> None:
+        self.discarded_bytes += n
+        self.start += n
+
+    def _next_header(self) -> int:
+        '''offset of the next plausible header in the buffer after the first byte'''
+        view = self._view
+        for i in range(self.start + 1, self.end - HEADER.NUM_BYTES + 1):
+            if is_response_header(view[i:i + HEADER.NUM_BYTES]):
+                return i - self.start
+        return self.end - self.start
+
+    def read_frame(self, expected: Tuple[int, ...]) -> memoryview:
+        '''
+        Next frame of an expected kind, a view of the buffer that is only 
+        valid until the next call: copy it to keep it.
+        '''
 
-    def get_light_source_mode(self) -> LightSourceMode:
-        return LightSourceMode(self._send_read_one_byte(CMD.LIGHT_SOURCE_MODE))
-    
-    def set_zoom(self, data: Zoom) -> None:
-        self._send_write_two_byte(CMD.ZOOM + data)
+        view = self._view
+        while True:
 
-    def get_zoom(self) -> Zoom:
-        return Zoom(self._send_read_two_byte(CMD.ZOOM))
-        
-    def set_message(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.MESSAGE + data)
+            if not self._fill(HEADER.NUM_BYTES):
+                raise TransmissionError('failed to read response header')
 
-    def get_message(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.MESSAGE))
+            start = self.start
+            if not is_response_header(view[start:start + HEADER.NUM_BYTES]):
+                self._skip(1)
+                continue
 
-    def set_projector_position(self, data: ProjectorPosition) -> None:
-        self._send_write_one_byte(CMD.PROJECTOR_POSITION + data)
+            if self.timed:
+                self.header_at = time.perf_counter()
+
+            size = HEADER.NUM_BYTES + payload_length(view[start:start + HEADER.NUM_BYTES])
+            if not self._fill(size):
+                raise TransmissionError('payload size mismatch')
+
+            # _fill may have moved the frame to the start of the buffer
+            start = self.start
+            end = start + size
+            if sum(view[start + 1:end - 1]) & 0xFF != view[end - 1]:
+                # the header may have been garbage, resume at the next 
+                # header already received, otherwise report the corruption
+                self._skip(self._next_header())
+                if self.start == self.end:
+                    raise TransmissionError('invalid checksum')
+                continue
 
-    def get_projector_position(self) -> ProjectorPosition:
-        return ProjectorPosition(self._send_read_one_byte(CMD.PROJECTOR_POSITION))
-    
-    def set_projector_3d_sync(self, data: Projector3DSync) -> None:
-        self._send_write_one_byte(CMD.PROJECTOR_3D_SYNC + data)
+            self.start = end
+            if self.start == self.end:
+                self.start = self.end = 0
 
-    def get_projector_3d_sync(self) -> Projector3DSync:
-        return Projector3DSync(self._send_read_one_byte(CMD.PROJECTOR_3D_SYNC))
-    
-    def set_projector_3d_sync_invert(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.PROJECTOR_3D_SYNC_INVERT + data)
+            if view[start] not in expected:
+                self.discarded_frames += 1
+                continue
 
-    def get_projector_3d_sync_invert(self) -> Bool:
-        # TODO: problem returns b'\x80'
-        return Bool(self._send_read_one_byte(CMD.PROJECTOR_3D_SYNC_INVERT))
-    
-    def adjust_contrast(self, data: Adjustment) -> None:
-        self._send_write_one_byte(CMD.CONTRAST + data)
+            return view[start:end]
+
+    def clear(self) -> None:
+        '''drop everything received so far'''
+        self.discarded_bytes += self.end - self.start
+        self.start = self.end = 0
+        self.transport.reset_input_buffer()
+
+    def drain(self, quiet: float = DRAIN_QUIET_SECONDS, limit: float = DRAIN_MAX_SECONDS) -> None:
+        '''drop everything until the line stays silent for quiet seconds'''
+        self.clear()
+        previous = self.transport.timeout
+        self.transport.timeout = quiet
+        deadline = time.monotonic() + limit
+        chunk = bytearray(64)
+        try:
+            while time.monotonic() < deadline:
+                n = self.transport.readinto(chunk)
+                if n == 0:
+                    break
+                self.discarded_bytes += n
+        finally:
+            self.transport.timeout = previous
+
+# the HDR field would shadow the HDR enum in its own annotation
+_HDR = HDR
+
+@dataclass
+class ProjectorState:
+    '''
+    Snapshot of every readable setting. Fields are listed in the order they 
+    must be written back: a field always comes after the settings it depends on.
+    None means the setting could not be read (disabled on this model).
+    hue/saturation/gain only refer to the currently selected primary color.
+    '''
+    source_input: Optional[SourceInput] = None
+    color_mode: Optional[ColorMode] = None
+    ISF_mode: Optional[Bool] = None
+    HDR: Optional[_HDR] = None
+    color_temperature: Optional[ColorTemperature] = None
+    color_temperature_red_gain: Optional[int] = None
+    color_temperature_green_gain: Optional[int] = None
+    color_temperature_blue_gain: Optional[int] = None
+    color_temperature_red_offset: Optional[int] = None
+    color_temperature_green_offset: Optional[int] = None
+    color_temperature_blue_offset: Optional[int] = None
+    gamma: Optional[Gamma] = None
+    brilliant_color: Optional[BrilliantColor] = None
+    contrast: Optional[int] = None
+    brightness: Optional[int] = None
+    sharpness: Optional[int] = None
+    primary_color: Optional[PrimaryColor] = None
+    hue: Optional[int] = None
+    saturation: Optional[int] = None
+    gain: Optional[int] = None
+    light_source_mode: Optional[LightSourceMode] = None
+    projector_position: Optional[ProjectorPosition] = None
+    aspect_ratio: Optional[AspectRatio] = None
+    zoom: Optional[Zoom] = None
+    overscan: Optional[OverScan] = None
+    warping_control_mode: Optional[WarpingControlMode] = None
+    warping_enable: Optional[Bool] = None
+    auto_v_keystone: Optional[Bool] = None
+    vertical_keystone: Optional[int] = None
+    horizontal_keystone: Optional[int] = None
+    horizontal_position: Optional[int] = None
+    vertical_position: Optional[int] = None
+    projector_3d_sync: Optional[Projector3DSync] = None
+    projector_3d_sync_invert: Optional[Bool] = None
+    fast_input_mode: Optional[Bool] = None
+    HDMI_format: Optional[HDMIFormat] = None
+    HDMI_range: Optional[HDMIRange] = None
+    CEC: Optional[Bool] = None
+    quick_autosearch: Optional[Bool] = None
+    screen_color: Optional[ScreenColor] = None
+    audio_mode: Optional[AudioMode] = None
+    volume: Optional[int] = None
+    mute: Optional[Bool] = None
+    splash_screen: Optional[SplashScreen] = None
+    quick_poweroff: Optional[Bool] = None
+    auto_power_off: Optional[AutoPowerOff] = None
+    high_altitude_mode: Optional[Bool] = None
+    silence_mode: Optional[Bool] = None
+    message: Optional[Bool] = None
+    language: Optional[Language] = None
+    remote_control_code: Optional[RemoteControlCode] = None
+    blank: Optional[Bool] = None
+    freeze: Optional[Bool] = None
+
+STATE_FIELDS = [f.name for f in fields(ProjectorState)]
+
+_COLOR_TEMPERATURE_FIELDS = [
+    'color_temperature_red_gain',
+    'color_temperature_green_gain',
+    'color_temperature_blue_gain',
+    'color_temperature_red_offset',
+    'color_temperature_green_offset',
+    'color_temperature_blue_offset'
+]
+
+# settings whose value changes when another setting is written
+STATE_DEPENDENCIES: Dict[str, List[str]] = {
+    'source_input': STATE_FIELDS[1:],
+    'color_mode': STATE_FIELDS[STATE_FIELDS.index('color_mode')+1:STATE_FIELDS.index('gain')+1],
+    'ISF_mode': ['color_mode'],
+    'color_temperature': _COLOR_TEMPERATURE_FIELDS,
+    'primary_color': ['hue', 'saturation', 'gain'],
+    'warping_enable': ['vertical_keystone', 'horizontal_keystone'],
+    'auto_v_keystone': ['vertical_keystone'],
+}
+
+# pipeline depth found by ViewSonicProjector.tune_pipeline_depth, per firmware version
+PIPELINE_DEPTHS: Dict[str, int] = {}
+
+# constant registers with a distinctive answer, read between pipelined reads
+# to check that answers still line up with queries: the first one answering
+PIPELINE_SENTINELS = [CMD.SERIAL_NUMBER, CMD.PROJECTOR_MODEL, CMD.FIRMWARE_VERSION]
+
+@dataclass
+class CapabilityProfile:
+    '''
+    Registers a model / firmware answers, learned from scan results 
+    (hex command codes). Registers in neither list were not scanned.
+    Scans only read: disabled_writes are the commands whose writes were
+    answered DISABLED.
+    '''
+    model: str
+    firmware: str
+    supported: List[str]
+    disabled: List[str]
+    disabled_writes: List[str] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return f'{self.model} {self.firmware}'
+
+    def disabled_commands(self) -> frozenset:
+        return frozenset(bytes.fromhex(hex) for hex in self.disabled)
+
+    def disabled_write_commands(self) -> frozenset:
+        return frozenset(bytes.fromhex(hex) for hex in self.disabled_writes)
+
+def profile_from_scan(model: str, firmware: str, scanfile: str = SCANFILE) -> CapabilityProfile:
+    '''capability profile from the results and negative cache of a scan'''
+
+    supported = _read_json(scanfile, {})
+    disabled = _read_json(disabled_file(scanfile), {}).get('commands', [])
+    return CapabilityProfile(
+        model = model, 
+        firmware = firmware, 
+        supported = sorted(supported), 
+        disabled = sorted(set(disabled) - set(supported))
+    )
+
+def load_profiles(path: str = PROFILES_FILE) -> Dict[str, CapabilityProfile]:
+    return {key: CapabilityProfile(**value) for key, value in _read_json(path, {}).items()}
+
+def save_profile(profile: CapabilityProfile, path: str = PROFILES_FILE) -> None:
+    '''add or replace the profile of a model / firmware in the profiles file'''
+    profiles = _read_json(path, {})
+    profiles[profile.key] = asdict(profile)
+    _write_json(path, profiles)
 
-    def get_contrast(self) -> int:
-        return two_bytes_to_int(self._send_read_two_byte(CMD.CONTRAST))
-    
-    def set_contrast(self, value: int) -> None:
-        set_value_by_increment(self.get_contrast, self.adjust_contrast, value)
- 
-    def adjust_brightness(self, data: Adjustment) -> None:
-        self._send_write_one_byte(CMD.BRIGHTNESS + data)
-
-    def get_brightness(self) -> int:
-        return two_bytes_to_int(self._send_read_two_byte(CMD.BRIGHTNESS))
-    
-    def set_brightness(self, value: int) -> None:
-        set_value_by_increment(self.get_brightness, self.adjust_brightness, value)
+class ViewSonicProjector:
+    '''
+    Requires a crossover (null modem) cable for use with PC
+    Only 3 pins need to be connected (RX,TX and GND)
 
-    def adjust_color_temperature_red_gain(self, data: Adjustment) -> None:
-        self._send_write_two_byte(CMD.COLOR_TEMPERATURE_RED_GAIN_ADJUST + data)
+    Register accessors (get_/set_/adjust_ methods and actions) are generated
+    from REGISTERS and ACTIONS. A subclass declaring its own tables gets
+    its own accessors.
+    '''
 
-    def get_color_temperature_red_gain(self) -> int:
-        return two_bytes_to_int(self._send_read_two_byte(CMD.COLOR_TEMPERATURE_RED_GAIN))
-    
-    def set_color_temperature_red_gain(self, value: int) -> None:
-        set_value_by_increment(
-            self.get_color_temperature_red_gain, 
-            self.adjust_color_temperature_red_gain, 
-            value
-        )
+    REGISTERS: List[Register] = REGISTERS
+    ACTIONS: Dict[str, bytes] = ACTIONS
 
-    def adjust_color_temperature_green_gain(self, data: Adjustment) -> None:
-        self._send_write_two_byte(CMD.COLOR_TEMPERATURE_GREEN_GAIN_ADJUST + data)
+    VALID_BAUD_RATES = [2400,4800,9600,14400,19200,38400,115200]
 
-    def get_color_temperature_green_gain(self) -> int:
-        return two_bytes_to_int(self._send_read_two_byte(CMD.COLOR_TEMPERATURE_GREEN_GAIN))
+    def __init__(
+        self,
+        port: str = '/dev/ttyUSB0',
+        baudrate: Union[int, str] = 115200,
+        data_byte_length = serial.EIGHTBITS,
+        parity_check = serial.PARITY_NONE,
+        num_stop_bit: int = serial.STOPBITS_ONE,
+        timeout: Optional[float] = 10.0,
+        write_timeout: Optional[float] = 1.0,
+        flow_control: bool = False,
+        verbose: bool = False,
+        cache: Optional[RegisterCache] = None,
+        transport: Optional[Transport] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        pipeline_depth: int = 1,
+        profiles: Optional[str] = None
+        ):
+        '''
+        port: serial device, or tcp://host:port for a serial device server
+        (connections are pooled, see viewsonic_transport)
+        baudrate: one of VALID_BAUD_RATES, or 'auto' to detect the rate
+        configured on the projector (see detect_baudrate)
+        transport: already open transport (e.g. a simulator) to use
+        instead of opening port
+        retry_policy: learned timeouts and retries, by default a RetryPolicy
+        whose timeouts never exceed timeout
+        pipeline_depth: number of reads kept in flight by bulk reads (get_state, 
+        scans), 1 is lock-step. See tune_pipeline_depth.
+        profiles: capability profiles file, the profile of the connected 
+        model / firmware is loaded if there is one (see load_profile)
+        '''
 
-    def set_color_temperature_green_gain(self, value: int):
-        set_value_by_increment(
-            self.get_color_temperature_green_gain, 
-            self.adjust_color_temperature_green_gain, 
-            value
-        )
+        auto_baudrate = baudrate == 'auto'
+        if auto_baudrate:
+            baudrate = max(self.VALID_BAUD_RATES)
 
-    def adjust_color_temperature_blue_gain(self, data: Adjustment) -> None:
-        self._send_write_two_byte(CMD.COLOR_TEMPERATURE_BLUE_GAIN_ADJUST + data)
+        if baudrate not in self.VALID_BAUD_RATES:
+            raise ValueError(f'Supported baud rates are: {self.VALID_BAUD_RATES}')
+        
+        self.port = port
+        self.baudrate = baudrate
+        self.data_byte_length = data_byte_length
+        self.parity_check = parity_check
+        self.num_stop_bit = num_stop_bit
+        self.timeout = timeout
+        self.write_timeout = write_timeout
+        self.flow_control = flow_control
 
-    def get_color_temperature_blue_gain(self) -> int:
-        return two_bytes_to_int(self._send_read_two_byte(CMD.COLOR_TEMPERATURE_BLUE_GAIN))
-    
-    def set_color_temperature_blue_gain(self, value: int):
-        set_value_by_increment(
-            self.get_color_temperature_blue_gain, 
-            self.adjust_color_temperature_blue_gain, 
-            value
-        )
+        # called with an ExchangeEvent after every exchange, see add_hook
+        self.hooks: List[Callable[[ExchangeEvent], None]] = []
+
+        # opt-in read cache, e.g. cache = RegisterCache()
+        self.cache = cache
+
+        self.retry_policy = RetryPolicy(timeout) if retry_policy is None else retry_policy
+
+        # last measured power transition times, useful to tune per model
+        self.power_transition_seconds: Dict[PowerStatus, float] = {}
+
+        # learned inter-step delays, one per increment command
+        self.step_delays: Dict[str, StepDelay] = {}
+
+        # one exchange at a time on the wire, responses are read into a 
+        # per-thread buffer so that they can be decoded outside the lock
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+        if transport is None:
+            transport = open_transport(
+                port = port,
+                timeout = timeout,
+                baudrate = baudrate,
+                bytesize = data_byte_length,
+                parity = parity_check,
+                stopbits = num_stop_bit,
+                write_timeout= write_timeout,
+                rtscts = flow_control
+            )
+        self.transport = transport
+        self._transport_timeout = transport.timeout
+        self._reader = FrameReader(transport)
+        self._stale = False
+        self.verbose = verbose
 
-    def adjust_color_temperature_red_offset(self, data: Adjustment) -> None:
-        self._send_write_two_byte(CMD.COLOR_TEMPERATURE_RED_OFFSET_ADJUST + data)
+        self.pipeline_depth = pipeline_depth
+        self.pipeline_stalls = 0
+        # response size of each register, to detect misaligned pipelined answers
+        self._response_lengths: Dict[bytes, int] = {}
+        # (query, answer) of the pipeline sentinel register
+        self._sentinel: Optional[Tuple[bytes, bytes]] = None
 
-    def get_color_temperature_red_offset(self) -> int:
-        return two_bytes_to_int(self._send_read_two_byte(CMD.COLOR_TEMPERATURE_RED_OFFSET))
+        # registers this model does not support, refused without a round trip
+        self.profile: Optional[CapabilityProfile] = None
+        self._disabled: frozenset = frozenset()
+        self._disabled_writes: frozenset = frozenset()
 
-    def set_color_temperature_red_offset(self, value: int) -> None:
-        set_value_by_increment(
-            self.get_color_temperature_red_offset, 
-            self.adjust_color_temperature_red_offset, 
-            value
-        )
+        # error rate measured at each baud rate by detect_baudrate
+        self.baud_error_rates: Dict[int, float] = {}
 
-    def adjust_color_temperature_green_offset(self, data: Adjustment) -> None:
-        self._send_write_two_byte(CMD.COLOR_TEMPERATURE_GREEN_OFFSET_ADJUST + data)
+        if auto_baudrate:
+            self.detect_baudrate()
 
-    def get_color_temperature_green_offset(self) -> int:
-        return two_bytes_to_int(self._send_read_two_byte(CMD.COLOR_TEMPERATURE_GREEN_OFFSET))
+        if profiles is not None:
+            self.load_profile(profiles)
 
-    def set_color_temperature_green_offset(self, value: int) -> None:
-        set_value_by_increment(
-            self.get_color_temperature_green_offset, 
-            self.adjust_color_temperature_green_offset, 
-            value
-        )
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'REGISTERS' in cls.__dict__ or 'ACTIONS' in cls.__dict__:
+            generate_accessors(cls)
 
-    def adjust_color_temperature_blue_offset(self, data: Adjustment) -> None:
-        self._send_write_two_byte(CMD.COLOR_TEMPERATURE_BLUE_OFFSET_ADJUST + data)
+    @property
+    def verbose(self) -> bool:
+        return print_exchange in self.hooks
 
-    def get_color_temperature_blue_offset(self) -> int:
-        return two_bytes_to_int(self._send_read_two_byte(CMD.COLOR_TEMPERATURE_BLUE_OFFSET))
+    @verbose.setter
+    def verbose(self, value: bool) -> None:
+        if value and not self.verbose:
+            self.add_hook(print_exchange)
+        elif not value and self.verbose:
+            self.remove_hook(print_exchange)
 
-    def set_color_temperature_blue_offset(self, value: int):
-        set_value_by_increment(
-            self.get_color_temperature_blue_offset, 
-            self.adjust_color_temperature_blue_offset, 
-            value
+    def add_hook(self, hook: Callable[[ExchangeEvent], None]) -> None:
+        '''
+        Call hook after every exchange, from the thread that made it.
+        Without hooks, exchanges are not timed at all.
+        '''
+        self.hooks = self.hooks + [hook]
+        self._reader.timed = True
+
+    def remove_hook(self, hook: Callable[[ExchangeEvent], None]) -> None:
+        self.hooks = [h for h in self.hooks if h is not hook]
+        self._reader.timed = bool(self.hooks)
+
+    def _emit(
+            self, 
+            cmd: bytes, 
+            write: bool, 
+            query: bytes, 
+            response: Optional[bytes], 
+            error: Optional[BaseException], 
+            attempt: int, 
+            start: float, 
+            written: float,
+            header_at: float,
+            end: float
+        ) -> None:
+
+        event = ExchangeEvent(
+            cmd, write, bytes(query), 
+            None if response is None else bytes(response), 
+            error, attempt, 
+            written - start, header_at - written, end - header_at
         )
-    
-    def set_aspect_ratio(self, data: AspectRatio):
-        self._send_write_one_byte(CMD.ASPECT_RATIO + data)
-
-    def get_aspect_ratio(self) -> AspectRatio:
-        return AspectRatio(self._send_read_one_byte(CMD.ASPECT_RATIO))
-    
-    def cycle_aspect_ratio(self) -> None:
-        self._send_write_one_byte(CMD.ASPECT_RATIO_CYCLE + EMPTY)
-
-    def auto_adjust(self) -> None:
-        self._send_write_one_byte(CMD.AUTO_ADJUST + EMPTY)
-
-    def adjust_horizontal_position(self, data: Adjustment) -> None:
-        # Increase is RIGHT, decrease is LEFT
-        self._send_write_one_byte(CMD.HORIZONTAL_POSITION + data)
-
-    def get_horizontal_position(self) -> int:
-        return one_byte_to_int(self._send_read_one_byte(CMD.HORIZONTAL_POSITION))
-    
-    def set_horizontal_position(self, value: int) -> None:
-        set_value_by_increment(self.get_horizontal_position, self.adjust_horizontal_position, value)
+        for hook in self.hooks:
+            hook(event)
 
-    def adjust_vertical_position(self, data: Adjustment) -> None:
-        # Increase is DOWN, decrease is UP
-        self._send_write_one_byte(CMD.VERTICAL_POSITION + data)
+    def load_profile(self, path: str = PROFILES_FILE) -> Optional[CapabilityProfile]:
+        '''use the capability profile of the connected model and firmware, if known'''
 
-    def get_vertical_position(self) -> int:
-        return one_byte_to_int(self._send_read_one_byte(CMD.VERTICAL_POSITION))
+        key = f'{self.get_model()} {self.get_firmware_version()}'
+        profile = load_profiles(path).get(key)
+        self.use_profile(profile)
+        return profile
 
-    def set_vertical_position(self, value: int) -> None:
-        set_value_by_increment(self.get_vertical_position, self.adjust_vertical_position, value)
-
-    def set_color_temperature(self, data: ColorTemperature) -> None:
-        self._send_write_one_byte(CMD.COLOR_TEMPERATURE + data)
-
-    def get_color_temperature(self) -> ColorTemperature:
-        return ColorTemperature(self._send_read_one_byte(CMD.COLOR_TEMPERATURE))
+    def use_profile(self, profile: Optional[CapabilityProfile]) -> None:
+        '''
+        Reads of disabled registers raise FunctionDisabled locally. A read 
+        being disabled says nothing about writes (actions are write only, 
+        some settings can be written but not read back): only writes that 
+        were answered DISABLED are refused, they are added to the profile 
+        as they are seen.
+        '''
 
-    def set_blank(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.BLANK + data)
+        self.profile = profile
+        self._disabled = frozenset() if profile is None else profile.disabled_commands()
+        self._disabled_writes = frozenset() if profile is None else profile.disabled_write_commands()
 
-    def get_blank(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.BLANK))
+    def build_profile(self, scanfile: str = SCANFILE, path: str = PROFILES_FILE) -> CapabilityProfile:
+        '''profile of the connected model and firmware from a scan, saved and used'''
 
-    def adjust_vertical_keystone(self, data: Adjustment) -> None:
-        self._send_write_one_byte(CMD.KEYSTONE_VERTICAL + data)
+        profile = profile_from_scan(self.get_model(), self.get_firmware_version(), scanfile)
+        # refused writes are not in the scan results
+        if self.profile is not None and self.profile.key == profile.key:
+            profile.disabled_writes = list(self.profile.disabled_writes)
+        save_profile(profile, path)
+        self.use_profile(profile)
+        return profile
 
-    def get_vertical_keystone(self) -> int:
-        return one_byte_to_int(self._send_read_one_byte(CMD.KEYSTONE_VERTICAL))
-    
-    def set_vertical_keystone(self, value: int) -> None:
-        set_value_by_increment(self.get_vertical_keystone, self.adjust_vertical_keystone, value)
-
-    def adjust_horizontal_keystone(self, data: Adjustment) -> None:
-        self._send_write_one_byte(CMD.KEYSTONE_HORIZONTAL + data)
+    def __del__(self):
+        self.close()
+
+    def __enter__(self) -> 'ViewSonicProjector':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        transport = getattr(self, 'transport', None)
+        if transport is not None:
+            self.transport = None
+            transport.close()
+
+    @contextmanager
+    def temporary_timeout(
+            self, 
+            timeout: Optional[float], 
+            attempts: Optional[int] = None
+        ) -> Iterator[None]:
+        '''
+        Override the read timeout (and the number of attempts) of the 
+        exchanges made by the calling thread for the duration of a with block.
+        None leaves the retry policy in charge.
+        '''
 
-    def get_horizontal_keystone(self) -> int:
-        return one_byte_to_int(self._send_read_one_byte(CMD.KEYSTONE_HORIZONTAL))
+        previous = (
+            getattr(self._local, 'timeout', None), 
+            getattr(self._local, 'attempts', None)
+        )
+        self._local.timeout, self._local.attempts = timeout, attempts
+        try:
+            yield
+        finally:
+            self._local.timeout, self._local.attempts = previous
+
+    def detect_baudrate(
+            self,
+            probe_timeout: float = BAUD_PROBE_TIMEOUT_SECONDS,
+            stress_reads: int = 0,
+            max_error_rate: float = 0.0
+        ) -> int:
+        '''
+        Probe baud rates from fastest to slowest with a cheap power status 
+        read and keep the fastest one that answers without error.
+        If stress_reads > 0, each answering rate is also stress tested and
+        must stay below max_error_rate. Measured rates are kept in 
+        baud_error_rates.
+        '''
 
-    def set_horizontal_keystone(self, value: int) -> None:
-        set_value_by_increment(self.get_horizontal_keystone, self.adjust_horizontal_keystone, value)
+        if not hasattr(self.transport, 'baudrate'):
+            raise ValueError('transport has no baud rate')
 
-    def set_color_mode(self, data: ColorMode) -> None:
-        self._send_write_one_byte(CMD.COLOR_MODE + data)
+        original = self.transport.baudrate
 
-    def get_color_mode(self) -> ColorMode:
-        return ColorMode(self._send_read_one_byte(CMD.COLOR_MODE))
+        with self.temporary_timeout(probe_timeout, attempts=1):
+            for baudrate in sorted(self.VALID_BAUD_RATES, reverse=True):
+                self.transport.baudrate = baudrate
+                try:
+                    self.get_power_status()
+                except (TransmissionError, ValueError):
+                    continue
+
+                errors = 0
+                for i in range(stress_reads):
+                    try:
+                        self.get_power_status()
+                    except (TransmissionError, ValueError):
+                        errors += 1
+
+                error_rate = errors / stress_reads if stress_reads else 0.0
+                self.baud_error_rates[baudrate] = error_rate
+                if error_rate <= max_error_rate:
+                    self.baudrate = baudrate
+                    # round trips measured at other rates do not apply
+                    self.retry_policy.reset()
+                    return baudrate
+
+        self.transport.baudrate = original
+        raise TransmissionError('no answer at any supported baud rate')
+
+    def power_on(self, timeout: float = POWER_ON_TIMEOUT_SECONDS) -> float:
+        '''
+        Turn the projector on and wait for the projector to warm up.
+        No command can be sent while the projector is warming up.
+        Returns the measured transition time in seconds.
+        '''
 
-    def set_auto_power_off(self, data: AutoPowerOff) -> None:
-        self._send_write_one_byte(CMD.AUTO_POWER_OFF + data)
+        self._send_write_one_byte(CMD.POWER_ON + EMPTY)
 
-    def get_auto_power_off(self) -> AutoPowerOff:
-        return AutoPowerOff(self._send_read_one_byte(CMD.AUTO_POWER_OFF))
+        elapsed = wait_for_power_status(
+            self.get_power_status,
+            target = PowerStatus.ON,
+            transitional = [PowerStatus.OFF, PowerStatus.WARM_UP],
+            timeout = timeout
+        )
+        self.power_transition_seconds[PowerStatus.ON] = elapsed
+        return elapsed
     
-    def cycle_color_mode(self) -> None:
-        self._send_write_one_byte(CMD.COLOR_MODE_CYCLE + EMPTY)
+    def power_off(self, timeout: float = POWER_OFF_TIMEOUT_SECONDS) -> float:
+        '''
+        Turn the projector off and wait for the projector to cool down.
+        No command can be sent while the projector is cooling down.
+        Returns the measured transition time in seconds.
+        '''
+        self._send_write_one_byte(CMD.POWER_OFF + EMPTY)
 
-    def set_ISF_mode(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.ISF_MODE + data)
+        elapsed = wait_for_power_status(
+            self.get_power_status,
+            target = PowerStatus.OFF,
+            transitional = [PowerStatus.ON, PowerStatus.COOL_DOWN],
+            timeout = timeout
+        )
+        self.power_transition_seconds[PowerStatus.OFF] = elapsed
+        return elapsed
+            
+    def _set_value_by_increment(
+            self,
+            read_fun: Callable[[], int], 
+            increment_fun: Callable[[Adjustment], None], 
+            desired_value: int
+        ) -> None:
+        step_delay = self.step_delays.setdefault(increment_fun.__name__, StepDelay())
+        set_value_by_increment(read_fun, increment_fun, desired_value, step_delay)
 
-    def get_ISF_mode(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.ISF_MODE))
+    def adjust_volume(self, data: Adjustment) -> None:
+        self.volume_up() if data == Adjustment.INCREASE else self.volume_down()
 
-    def set_HDR(self, data: HDR) -> None:
-        self._send_write_one_byte(CMD.HDR + data)
+    def set_volume(self, value: int) -> None:
+        self._set_value_by_increment(self.get_volume, self.adjust_volume, value)
 
-    def get_HDR(self) -> HDR:
-        return HDR(self._send_read_one_byte(CMD.HDR))
+    def get_light_source_usage_time(self) -> int:
+        # special case
+        return decode_light_source_usage_time(self._read_frame(CMD.LIGHT_SOURCE_USAGE_TIME))
 
-    def set_primary_color(self, data: PrimaryColor) -> None:
-        self._send_write_one_byte(CMD.PRIMARY_COLOR + data)
+    def get_error_status(self) -> Dict:
+        # special case
+        return decode_error_status(self._read_frame(CMD.ERROR_STATUS))
 
-    def get_primary_color(self) -> PrimaryColor:
-        # select primary color before you adjust hue/saturation/gain
-        return PrimaryColor(self._send_read_one_byte(CMD.PRIMARY_COLOR))
+    def get_operating_temperature(self) -> float:
+        # special case
+        return decode_operating_temperature(self._read_frame(CMD.OPERATING_TEMPERATURE))
+
+    def get_state(self) -> ProjectorState:
+        '''read every readable setting'''
+
+        state = ProjectorState()
+        registers = [self.REGISTER_MAP[name].cmd for name in STATE_FIELDS if name in self.REGISTER_MAP]
+        with self._prefetch(registers):
+            for name in STATE_FIELDS:
+                setattr(state, name, self._get_state_field(name))
+        return state
+
+    def apply_state(
+            self, 
+            state: ProjectorState, 
+            current: Optional[ProjectorState] = None
+        ) -> List[str]:
+        '''
+        Write back the settings of state that differ from the current ones,
+        in dependency order. Dependent settings are read again after their
+        parent is written. Returns the names of the settings written. 
+        '''
 
-    def adjust_hue(self, data: Adjustment) -> None:
-        # set primary color before you adjust hue/saturation/gain  
-        # for that color
-        self._send_write_one_byte(CMD.HUE_TINT + data)
+        if current is None:
+            current = self.get_state()
+        else:
+            current = replace(current)
 
-    def get_hue(self) -> int:
-        # set primary color before you adjust hue/saturation/gain  
-        # for that color
-        return two_bytes_to_int(self._send_read_two_byte(CMD.HUE_TINT))
-    
-    def set_hue(self, value: int) -> None:
-        set_value_by_increment(self.get_hue, self.adjust_hue, value)
-
-    def adjust_saturation(self, data: Adjustment) -> None:
-        # set primary color before you adjust hue/saturation/gain  
-        # for that color
-        self._send_write_one_byte(CMD.SATURATION + data)
-
-    def get_saturation(self) -> int:
-        # set primary color before you adjust hue/saturation/gain  
-        # for that color
-        return two_bytes_to_int(self._send_read_two_byte(CMD.SATURATION))
-
-    def set_saturation(self, value: int) -> None:
-        set_value_by_increment(self.get_saturation, self.adjust_saturation, value)
-
-    def adjust_gain(self, data: Adjustment) -> None:
-        # set primary color before you adjust hue/saturation/gain  
-        # for that color
-        self._send_write_one_byte(CMD.GAIN + data)
-
-    def get_gain(self) -> int:
-        # set primary color before you adjust hue/saturation/gain  
-        # for that color
-        return two_bytes_to_int(self._send_read_two_byte(CMD.GAIN))
-    
-    def set_gain(self, value: int) -> None:
-        set_value_by_increment(self.get_gain, self.adjust_gain, value)
-    
-    def adjust_sharpness(self, data: Adjustment) -> None:
-        self._send_write_one_byte(CMD.SHARPNESS + data)
+        written = []
+        for name in STATE_FIELDS:
+            target = getattr(state, name)
+            if target is None or target == getattr(current, name):
+                continue
 
-    def get_sharpness(self) -> int:
-        return two_bytes_to_int(self._send_read_two_byte(CMD.SHARPNESS))
-    
-    def set_sharpness(self, value: int) -> None:
-        set_value_by_increment(self.get_sharpness, self.adjust_sharpness, value)
+            getattr(self, 'set_' + name)(target)
+            written.append(name)
+
+            # source_input alone changes most of the state: one pipeline
+            dependents = STATE_DEPENDENCIES.get(name, [])
+            with self._prefetch(self.REGISTER_MAP[d].cmd for d in dependents if d in self.REGISTER_MAP):
+                for dependent in dependents:
+                    setattr(current, dependent, self._get_state_field(dependent))
+
+        return written
+
+    def _get_state_field(self, name: str):
+        try:
+            return getattr(self, 'get_' + name)()
+        except (FunctionDisabled, ValueError):
+            # disabled on this model or value not in the enum
+            return None
+
+    def tune_pipeline_depth(
+            self, 
+            max_depth: int = PIPELINE_MAX_DEPTH, 
+            reads: int = PIPELINE_TUNE_READS
+        ) -> int:
+        '''
+        Find the deepest pipeline the firmware answers reliably: alternate 
+        reads of two registers with different answers at doubling depths, 
+        and keep the last depth where every answer matched.
+        The result is remembered per firmware version in PIPELINE_DEPTHS.
+        '''
 
-    def set_freeze(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.FREEZE + data)
+        firmware = self.get_firmware_version()
+        if firmware in PIPELINE_DEPTHS:
+            self.pipeline_depth = PIPELINE_DEPTHS[firmware]
+            return self.pipeline_depth
+
+        packets = [bytes(CMD.PROJECTOR_MODEL), bytes(CMD.POWER_ON)]
+        expected = [self._send_read(p, use_cache=False) for p in packets]
+
+        best = 1
+        depth = 2
+        while depth <= max_depth:
+            self.pipeline_depth = depth
+            stalls = self.pipeline_stalls
+            res = self._send_read_many(packets * (reads // 2), use_cache=False)
+            if self.pipeline_stalls != stalls or res != expected * (reads // 2):
+                break
+            best = depth
+            depth *= 2
 
-    def get_freeze(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.FREEZE))
+        self.pipeline_depth = PIPELINE_DEPTHS[firmware] = best
+        return best
 
-    def set_source_input(self, data: SourceInput) -> None:
-        self._send_write_one_byte(CMD.SOURCE_INPUT + data)
+    @contextmanager
+    def _prefetch(self, packets: Iterable[bytes]) -> Iterator[None]:
+        '''
+        Read registers in one pipeline and serve the getters called by the 
+        same thread from the results for the duration of a with block.
+        '''
 
-    def get_source_input(self) -> SourceInput:
-        return SourceInput(self._send_read_one_byte(CMD.SOURCE_INPUT))        
+        if self.pipeline_depth <= 1:
+            yield
+            return
+
+        packets = list(packets)
+        self._local.prefetched = dict(zip(packets, self._send_read_many(packets)))
+        try:
+            yield
+        finally:
+            self._local.prefetched = None
+
+    def _send_read_many(
+            self, 
+            packets: Iterable[bytes], 
+            use_cache: bool = True,
+            use_profile: bool = True
+        ) -> List[Union[bytes, Exception]]:
+        '''
+        Read several registers, keeping up to pipeline_depth queries in 
+        flight. Each entry is the response, or the exception raised for 
+        that register (FunctionDisabled, ProjectorOFF, TransmissionError).
+        Registers disabled in the capability profile are not sent unless
+        use_profile is False.
+        '''
 
-    def set_quick_autosearch(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.QUICK_AUTO_SEARCH + data)
+        packets = [bytes(p) for p in packets]
+        results: List[Union[bytes, Exception, None]] = [None] * len(packets)
+        cache = self.cache if use_cache else None
+        disabled = self._disabled if use_profile else frozenset()
 
-    def get_quick_autosearch(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.QUICK_AUTO_SEARCH))
+        todo = []
+        for i, packet in enumerate(packets):
+            if packet in disabled:
+                results[i] = FunctionDisabled(f'{packet.hex(" ")} disabled in the capability profile')
+                continue
+            cached = cache.get(packet) if cache is not None else None
+            if cached is None:
+                todo.append(i)
+            else:
+                results[i] = cached
 
-    def set_mute(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.MUTE + data)
+        if self.pipeline_depth > 1 and len(todo) > 1:
+            todo = self._pipeline_reads(packets, todo, results)
 
-    def get_mute(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.MUTE))
+        for i in todo:
+            try:
+                results[i] = bytes(self._exchange(read_frame(packets[i])))
+            except (FunctionDisabled, ProjectorOFF, TransmissionError) as e:
+                results[i] = e
 
-    def set_silence_mode(self, data: Bool) -> None:
-        self._send_write_one_byte(CMD.SILENCE_MODE + data)
+        if cache is not None:
+            for i, packet in enumerate(packets):
+                if isinstance(results[i], bytes):
+                    cache.put(packet, results[i])
 
-    def get_silence_mode(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.SILENCE_MODE))
-    
-    #def set_panel_key_lock(self, data: Bool) -> None:
-    #    self._send_write_one_byte(CMD.PANEL_KEY_LOCK + data)
+        return results
 
-    #def get_panel_key_lock(self) -> Bool:
-    #    return Bool(self._send_read_one_byte(CMD.PANEL_KEY_LOCK))
-    
-    def volume_up(self) -> None:
-        self._send_write_one_byte(CMD.VOLUME_UP + EMPTY)
+    def _pipeline_sentinel(self) -> Optional[Tuple[bytes, bytes]]:
+        '''query and answer of the first of PIPELINE_SENTINELS read, None if none answers'''
+        if self._sentinel is None:
+            for cmd in PIPELINE_SENTINELS:
+                try:
+                    self._sentinel = (bytes(cmd), bytes(self._exchange(read_frame(bytes(cmd)))))
+                    break
+                except (FunctionDisabled, ProjectorOFF, TransmissionError):
+                    continue
+        return self._sentinel
+
+    def _pipeline_reads(
+            self, 
+            packets: List[bytes], 
+            todo: List[int], 
+            results: List
+        ) -> List[int]:
+        '''
+        Pipelined part of _send_read_many, answers are matched to queries 
+        in FIFO order. A lost query or an extra answer shifts every answer 
+        after it, which equal sized answers do not reveal: the sentinel 
+        register is read after every PIPELINE_CHECK_INTERVAL reads (and 
+        at least pipeline_depth) and last, the results before it are only 
+        kept if it gets its known answer. The sentinel spacing guarantees 
+        that a later sentinel answer cannot be taken for it.
+        On a timeout or a misaligned answer the pipeline is abandoned: 
+        returns the indices still to read lock-step, including every read 
+        since the last sentinel.
+        '''
 
-    def volume_down(self) -> None:
-        self._send_write_one_byte(CMD.VOLUME_DOWN + EMPTY)
+        sentinel = self._pipeline_sentinel()
+        if sentinel is None:
+            return todo
+        sentinel_packet, sentinel_answer = sentinel
+
+        # reads of the sentinel register itself could be taken for a sentinel
+        lockstep = [i for i in todo if packets[i] == sentinel_packet]
+        todo = [i for i in todo if packets[i] != sentinel_packet]
+        if not todo:
+            return lockstep
+
+        # indices to read, None for a sentinel read
+        interval = max(PIPELINE_CHECK_INTERVAL, self.pipeline_depth)
+        queue: List[Optional[int]] = []
+        for n, i in enumerate(todo, 1):
+            queue.append(i)
+            if n % interval == 0 or n == len(todo):
+                queue.append(None)
+
+        policy = self.retry_policy
+        override = getattr(self._local, 'timeout', None)
+        in_flight = deque()  # positions in queue
+        sent = 0
+        # answers since the last sentinel, and the position following it
+        unchecked = {}
+        checked = 0
+
+        # (packet, start, written, header_at, end, response, error) for the hooks
+        hooks = self.hooks
+        timings = {}
+        events = []
+
+        with self._lock:
+
+            if self._stale:
+                self._resync()
+
+            discarded = self._reader.discarded_frames
 
-    def adjust_volume(self, data: Adjustment) -> None:
-        self.volume_up() if data == Adjustment.INCREASE else self.volume_down()
+            try:
+                while sent < len(queue) or in_flight:
+
+                    while sent < len(queue) and len(in_flight) < self.pipeline_depth:
+                        i = queue[sent]
+                        query = read_frame(sentinel_packet if i is None else packets[i])
+                        if hooks:
+                            start = time.perf_counter()
+                            self.transport.write(query)
+                            timings[sent] = (start, time.perf_counter())
+                        else:
+                            self.transport.write(query)
+                        in_flight.append(sent)
+                        sent += 1
+
+                    position = in_flight[0]
+                    i = queue[position]
+                    packet = sentinel_packet if i is None else packets[i]
+                    timeout = policy.timeout_for(False, packet) if override is None else override
+                    if timeout != self._transport_timeout:
+                        self.transport.timeout = self._transport_timeout = timeout
+
+                    # kept until the sentinel: the one copy of the frame
+                    frame = bytes(self._reader.read_frame(EXPECTED_READ_RESPONSES))
+                    if self._reader.discarded_frames != discarded:
+                        raise TransmissionError('unmatched response')
+
+                    if i is None:
+                        if frame != sentinel_answer:
+                            raise TransmissionError('misaligned pipeline')
+                        for j, result in unchecked.items():
+                            results[j] = result
+                        unchecked.clear()
+                        checked = position + 1
+                        error = None
+                    else:
+                        if frame == HEADER.DISABLED:
+                            unchecked[i] = FunctionDisabled()
+                        elif frame == HEADER.PROJ_OFF:
+                            unchecked[i] = ProjectorOFF()
+                        else:
+                            expected_length = self._response_lengths.get(packet)
+                            if expected_length is not None and len(frame) != expected_length:
+                                raise TransmissionError('unmatched response')
+                            self._response_lengths[packet] = len(frame)
+                            unchecked[i] = frame
+                        error = unchecked[i] if isinstance(unchecked[i], Exception) else None
+
+                    if hooks:
+                        start, written = timings[position]
+                        end = time.perf_counter()
+                        events.append((packet, start, written, max(self._reader.header_at, written), end, frame, error))
+
+                    in_flight.popleft()
+
+            except TransmissionError as e:
+                # answers still in flight would be misaligned, as may be 
+                # the ones since the last sentinel
+                self._stale = True
+                self.pipeline_stalls += 1
+                if hooks:
+                    position = in_flight[0]
+                    i = queue[position]
+                    start, written = timings[position]
+                    end = time.perf_counter()
+                    events.append((sentinel_packet if i is None else packets[i], start, written, end, end, None, e))
+                remaining = [i for i in queue[checked:] if i is not None] + lockstep
 
-    def get_volume(self) -> int:
-        return one_byte_to_int(self._send_read_one_byte(CMD.VOLUME))
-    
-    def set_volume(self, value: int) -> None:
-        set_value_by_increment(self.get_volume, self.adjust_volume, value)
+            else:
+                remaining = lockstep
 
-    def set_language(self, data: Language):
-        self._send_write_one_byte(CMD.LANGUAGE + data)
+        for packet, start, written, header_at, end, response, error in events:
+            self._emit(packet, False, read_frame(packet), response, error, 0, start, written, header_at, end)
 
-    def get_language(self) -> Language:
-        return Language(self._send_read_one_byte(CMD.LANGUAGE))    
-        
-    def reset_light_source_usage_time(self) -> None:
-        self._send_write_one_byte(CMD.LIGHT_SOURCE_USAGE_TIME + EMPTY)
+        return remaining
 
-    def get_light_source_usage_time(self) -> int:
-        # special case
-        response = self._send_read(CMD.LIGHT_SOURCE_USAGE_TIME)
-        usage_time = int.from_bytes(response[7:11],byteorder='little')
-        return usage_time
+    def _resync(self) -> None:
+        '''
+        Drop late answers to timed out queries, called with the lock held. 
+        An answer does not say which query it is for: the line must stay 
+        quiet for as long as the overridden timeout (short scan probes) 
+        before it is used again.
+        '''
+        override = getattr(self._local, 'timeout', None) or 0.0
+        self._reader.drain(min(max(DRAIN_QUIET_SECONDS, override), DRAIN_MAX_SECONDS))
+        self._stale = False
 
-    def set_HDMI_format(self, data: HDMIFormat) -> None:
-        self._send_write_one_byte(CMD.HDMI_FORMAT + data)
+    def _exchange(self, query: bytes) -> memoryview:
+        '''
+        Send a complete query frame and read the response into the receive 
+        buffer of the calling thread. The returned view is only valid until 
+        the next exchange from the same thread.
+        Transmission errors are retried according to the retry policy.
+        '''
 
-    def get_HDMI_format(self) -> HDMIFormat:
-        return HDMIFormat(self._send_read_one_byte(CMD.HDMI_FORMAT))           
+        write, cmd = frame_command(query)
+        policy = self.retry_policy
+        attempts = getattr(self._local, 'attempts', None) or policy.attempts_for(write, cmd)
+        timeout = getattr(self._local, 'timeout', None)
 
-    def set_HDMI_range(self, data: HDMIRange) -> None:
-        self._send_write_one_byte(CMD.HDMI_RANGE + data)
+        for attempt in range(attempts):
+            try:
+                return self._exchange_once(
+                    query, 
+                    policy.timeout_for(write, cmd, attempt) if timeout is None else timeout,
+                    write,
+                    cmd,
+                    attempt
+                )
+            except TransmissionError:
+                if attempt == attempts - 1:
+                    raise
+                policy.retries += 1
+                time.sleep(policy.backoff(attempt))
+
+    def _exchange_once(
+            self, 
+            query: bytes, 
+            timeout: Optional[float], 
+            write: bool, 
+            cmd: bytes, 
+            attempt: int = 0
+        ) -> memoryview:
+
+        rx = getattr(self._local, 'rx', None)
+        if rx is None:
+            rx = self._local.rx = bytearray(RX_BUFFER_SIZE)
+
+        # read once: hooks added meanwhile by another thread wait for the next exchange
+        hooks = self.hooks
+
+        with self._lock:
+
+            # reconfiguring a serial port is a system call, skip it when possible
+            if timeout != self._transport_timeout:
+                self.transport.timeout = self._transport_timeout = timeout
+
+            # a late answer to a timed out query may still be in flight
+            if self._stale:
+                self._resync()
+
+            start = time.perf_counter()
+            self.transport.write(query)
+            written = time.perf_counter() if hooks else start
 
-    def get_HDMI_range(self) -> HDMIRange:
-        return HDMIRange(self._send_read_one_byte(CMD.HDMI_RANGE))
+            try:
+                frame = self._reader.read_frame(EXPECTED_WRITE_RESPONSES if write else EXPECTED_READ_RESPONSES)
+            except TransmissionError as e:
+                self._stale = True
+                error = e
+                end = time.perf_counter()
+            else:
+                error = None
+                end = time.perf_counter()
+                self.retry_policy.record(write, cmd, end - start)
+
+                # the frame is a view of the reader buffer, the next exchange
+                # from any thread overwrites it: the one copy, into rx
+                size = len(frame)
+                if size > len(rx):
+                    rx = self._local.rx = bytearray(size)
+                rx[:size] = frame
+
+        if error is not None:
+            if hooks:
+                self._emit(cmd, write, query, None, error, attempt, start, written, end, end)
+            raise error
+
+        response = memoryview(rx)[:size]
+        if response[0] == RESPONSE_KIND_READ:
+            self._response_lengths[cmd] = size
 
-    def set_CEC(self, data: Bool):
-        self._send_write_one_byte(CMD.CEC + data)
+        if response == HEADER.DISABLED:
+            error = FunctionDisabled()
+        elif response == HEADER.PROJ_OFF:
+            error = ProjectorOFF()
+        elif write and response != HEADER.ACK:
+            error = CommandFailed()
 
-    def get_CEC(self) -> Bool:
-        return Bool(self._send_read_one_byte(CMD.CEC))
-    
-    def get_error_status(self) -> Dict:
-        # special case
-        response = self._send_read(CMD.ERROR_STATUS)
-        error_status = response[7:31]
-        err = {}
-        err['lamp_fail_count'] = error_status[0]
-        err['lamp_lit_error_count'] = error_status[1]
-        err['fan1_error_count'] = error_status[2]
-        err['fan2_error_count'] = error_status[3]
-        err['fan3_error_count'] = error_status[4]
-        err['fan4_error_count'] = error_status[5]
-        err['diode1_open_error_count'] = error_status[6]
-        err['diode2_open_error_count'] = error_status[7]
-        err['diode1_short_error_count'] = error_status[8]
-        err['diode2_short_error_count'] = error_status[9]
-        err['temperature1_error_count'] = error_status[10]
-        err['temperature2_error_count'] = error_status[11]
-        err['fan_IC1_error_count'] = error_status[12]
-        err['color_wheel_error_count'] = error_status[13]
-        err['color_wheel_startup_error_count'] = error_status[14]
-        err['UART1_error_count'] = error_status[15]
-        err['abnormal_powerdown'] = error_status[16]
-        err['first_burn_in'] = int.from_bytes(error_status[17:21], byteorder='little')
-        err['lamp_status'] = error_status[21]
-        err['lamp_error_status'] = error_status[22:24]
-        return err
-    
-    def set_brilliant_color(self, data: BrilliantColor) -> None:
-        self._send_write_one_byte(CMD.BRILLIANT_COLOR + data)
+        if hooks:
+            header_at = max(self._reader.header_at, written)
+            self._emit(cmd, write, query, response, error, attempt, start, written, header_at, end)
 
-    def get_brilliant_color(self) -> BrilliantColor:
-        return BrilliantColor(self._send_read_one_byte(CMD.BRILLIANT_COLOR))       
+        if error is not None:
+            raise error
 
-    def set_remote_control_code(self, data: RemoteControlCode) -> None:
-        self._send_write_one_byte(CMD.REMOTE_CONTROL_CODE + data)
+        return response
 
-    def get_remote_control_code(self) -> RemoteControlCode:
-        return RemoteControlCode(self._send_read_one_byte(CMD.REMOTE_CONTROL_CODE))       
+    def _send_packet(self, packet: bytes) -> bytes:
 
-    def set_screen_color(self, data: ScreenColor) -> None:
-        self._send_write_one_byte(CMD.SCREEN_COLOR + data)
+        return bytes(self._exchange(build_frame(packet)))
 
-    def get_screen_color(self) -> ScreenColor:
-        return ScreenColor(self._send_read_one_byte(CMD.SCREEN_COLOR))       
+    def _send_write_frame(self, query: bytes, packet: bytes):
+        '''send a complete write query, packet starts with the written CMD'''
 
-    def set_overscan(self, data: OverScan) -> None:
-        self._send_write_one_byte(CMD.OVER_SCAN + data)
+        if self._disabled_writes and bytes(packet[:2]) in self._disabled_writes:
+            raise FunctionDisabled(f'{packet[:2].hex(" ")} disabled in the capability profile')
 
-    def get_overscan(self) -> OverScan:
-        return OverScan(self._send_read_one_byte(CMD.OVER_SCAN))       
+        if self.cache is not None:
+            self.cache.invalidate_write(packet)
 
-    def set_remote_key(self, data: RemoteKey) -> None:
-        self._send_write_one_byte(CMD.REMOTE_KEY + data)
+        # anything but an ACK raises
+        try:
+            self._exchange(query)
+        except FunctionDisabled:
+            cmd = bytes(packet[:2])
+            if self.profile is not None and cmd.hex(' ') not in self.profile.disabled_writes:
+                self.profile.disabled_writes.append(cmd.hex(' '))
+                self._disabled_writes = self._disabled_writes | {cmd}
+            raise
 
-    def get_remote_key(self) -> RemoteKey:
-        return RemoteKey(self._send_read_one_byte(CMD.REMOTE_KEY))   
-    
-    def get_operating_temperature(self) -> float:
-        # special case
-        response = self._send_read(CMD.OPERATING_TEMPERATURE)
-        temperature = int.from_bytes(response[7:11],byteorder='little')/10
-        return temperature
+    def _send_write_one_byte(self, packet: bytes):
 
-    def cycle_lamp_mode(self) -> None:
-        self._send_write_one_byte(CMD.LAMP_MODE_CYCLE + EMPTY)
+        self._send_write_frame(build_frame(HEADER.WRITE_ONE_BYTE + packet), packet)
 
-    def cycle_audio_mode(self) -> None:
-        self._send_write_one_byte(CMD.AUDIO_MODE_CYCLE + EMPTY)
+    def _send_write_two_byte(self, packet: bytes):
 
-    def _send_packet(self, packet: bytes) -> bytes:
+        self._send_write_frame(build_frame(HEADER.WRITE_TWO_BYTE + packet), packet)
 
-        self.ser.reset_input_buffer()
-        self.ser.reset_output_buffer()
+    def _read_frame(self, packet: bytes, use_cache: bool = True) -> Union[bytes, memoryview]:
+        '''read response for a register, as a view on the receive buffer unless cached'''
 
-        query = packet + checksum(packet)
+        if self._disabled and bytes(packet) in self._disabled:
+            raise FunctionDisabled(f'{packet.hex(" ")} disabled in the capability profile')
 
-        if self.verbose:
-            print('>> ' + query.hex(' '))
+        prefetched = getattr(self._local, 'prefetched', None)
+        if prefetched is not None:
+            response = prefetched.get(bytes(packet))
+            if isinstance(response, Exception):
+                raise response
+            if response is not None:
+                return response
 
-        self.ser.write(query)
+        if self.cache is None or not use_cache:
+            return self._exchange(read_frame(packet))
 
-        response_header = self.ser.read(HEADER.NUM_BYTES)
-        
-        if len(response_header) != HEADER.NUM_BYTES:
-            raise TransmissionError('failed to read response header')
+        response = self.cache.get(packet)
+        if response is None:
+            response = self._exchange(read_frame(packet))
+            self.cache.put(packet, bytes(response))
+        return response
         
-        payload_num_bytes = payload_length(response_header)
-        response_payload = self.ser.read(payload_num_bytes)
+    def _send_read(self, packet: bytes, use_cache: bool = True) -> bytes:
 
-        if len(response_payload) != payload_num_bytes:
-            raise TransmissionError('payload size mismatch')
+        return bytes(self._read_frame(packet, use_cache))
 
-        response = response_header + response_payload
+    def _send_read_one_byte(self, packet: bytes) -> bytes:
 
-        if self.verbose:
-            print(response.hex(' '))
-            print()
-        
-        if checksum(response[:-1]) != response[-1:]:
-            raise TransmissionError('invalid checksum')
+        response = self._read_frame(packet) 
+        return BYTE_VALUES[response[-2]]
+    
+    def _send_read_two_byte(self, packet: bytes) -> bytes:
 
-        if response == HEADER.DISABLED:
-            raise FunctionDisabled
-        
-        if response == HEADER.PROJ_OFF:
-            raise ProjectorOFF
+        response = self._read_frame(packet)
+        return bytes(response[-3:-1])
 
-        return response
+generate_accessors(ViewSonicProjector)
 
-    def _send_write_one_byte(self, packet: bytes):
+def _write_json(path: str, obj) -> None:
+    '''write json atomically so that a crash never leaves a truncated file'''
+    
+    tmp = path + '.tmp'
+    with open(tmp,'w') as f:
+        json.dump(obj,f)
+    os.replace(tmp, path)
+
+def _read_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path,'r') as f:
+        return json.load(f)
+
+def disabled_file(scanfile: str = SCANFILE) -> str:
+    '''negative cache stored next to the scan results'''
+    return os.path.splitext(scanfile)[0] + '_disabled.json'
+
+def progress_file(scanfile: str = SCANFILE) -> str:
+    return scanfile + '.progress'
+
+def rescan(
+        proj: ViewSonicProjector,
+        commands: Iterable[str],
+        probe_timeout: float = SCAN_PROBE_TIMEOUT_SECONDS
+    ) -> Dict:
+    '''
+    Read again a list of known command codes (hex strings). Commands that
+    do not answer are reported and left out, scan again to read them.
+    '''
 
-        response = self._send_packet(HEADER.WRITE_ONE_BYTE + packet)
+    res = {}
+    failed = []
+
+    skip = [CMD.OPERATING_TEMPERATURE.hex(' '), CMD.UNKNOWN_STATUS_INFO.hex(' ')]
+    cmds = [bytes.fromhex(hex) for hex in commands if hex not in skip]
+
+    with proj.temporary_timeout(probe_timeout):
+        responses = proj._send_read_many(cmds, use_cache=False)
+
+    for cmd, response in zip(cmds, responses):
+        if isinstance(response, FunctionDisabled):
+            continue
+        if isinstance(response, TransmissionError):
+            failed.append(cmd.hex(' '))
+            continue
+        if isinstance(response, Exception):
+            raise response
+        res[cmd.hex(' ')] = response.hex(' ')
+
+    if failed:
+        print(f'commands {", ".join(failed)} did not answer, scan again to read them')
+
+    return res
+
+def exhaustive_scan(
+        projectors: List[ViewSonicProjector],
+        cmd2_range: Iterable[int] = range(256),
+        scanfile: str = SCANFILE,
+        probe_timeout: float = SCAN_PROBE_TIMEOUT_SECONDS,
+        resume: bool = True,
+        skip_disabled: bool = True
+    ) -> Dict:
+    '''
+    Scan the cmd2/cmd3 read space one cmd2 block at a time.
+    - progress is checkpointed after every block and resumed from disk 
+    - blocks are shared between projectors (same model on different ports)
+    - cmd2 blocks and commands known to be disabled are skipped 
+    - blocks where a probe timed out are scanned again on resume
+    Results are merged into scanfile.
+    '''
 
-        if response != HEADER.ACK:
-            raise CommandFailed
+    progress_path = progress_file(scanfile)
+    disabled_path = disabled_file(scanfile)
 
-    def _send_write_two_byte(self, packet: bytes):
+    progress = {'done': [], 'results': {}}
+    if resume:
+        progress = _read_json(progress_path, progress)
 
-        response = self._send_packet(HEADER.WRITE_TWO_BYTE + packet)
+    disabled = _read_json(disabled_path, {'blocks': [], 'commands': []})
+    disabled_blocks = set(disabled['blocks'])
+    disabled_commands = set(disabled['commands'])
 
-        if response != HEADER.ACK:
-            raise CommandFailed
-        
-    def _send_read(self, packet: bytes) -> bytes:
+    done = set(progress['done'])
+    blocks = queue.Queue()
+    for cmd2 in cmd2_range:
+        if cmd2 in done:
+            continue
+        if skip_disabled and cmd2 in disabled_blocks:
+            continue
+        blocks.put(cmd2)
 
-        response = self._send_packet(HEADER.READ + packet)
-        return response
+    print(f'scanning {blocks.qsize()} blocks, {len(done)} already done')
 
-    def _send_read_one_byte(self, packet: bytes) -> bytes:
+    lock = threading.Lock()
+    incomplete = []
 
-        response = self._send_read(packet) 
-        data = response[-2:-1]      
-        return data
-    
-    def _send_read_two_byte(self, packet: bytes) -> bytes:
+    def checkpoint(cmd2: int, block_res: Dict, block_disabled: List[str], complete: bool) -> None:
+        with lock:
+            progress['results'].update(block_res)
+            if complete:
+                progress['done'].append(cmd2)
+            else:
+                incomplete.append(cmd2)
+            disabled_commands.update(block_disabled)
+            if len(block_disabled) == 256:
+                disabled_blocks.add(cmd2)
+            _write_json(progress_path, progress)
+            _write_json(disabled_path, {
+                'blocks': sorted(disabled_blocks), 
+                'commands': sorted(disabled_commands)
+            })
+
+    def worker(proj: ViewSonicProjector) -> None:
+        # a silent command must cost probe_timeout and a drain, not retries
+        with proj.temporary_timeout(probe_timeout, attempts=1):
+            while True:
+                try:
+                    cmd2 = blocks.get_nowait()
+                except queue.Empty:
+                    return
+                
+                block_res = {}
+                block_disabled = []
+                cmds = []
+                for cmd3 in range(256):
+                    cmd = bytes([cmd2, cmd3])
+                    if skip_disabled and cmd.hex(' ') in disabled_commands:
+                        block_disabled.append(cmd.hex(' '))
+                    else:
+                        cmds.append(cmd)
+
+                responses = proj._send_read_many(cmds, use_cache=False, use_profile=False)
+                complete = True
+                for cmd, response in zip(cmds, responses):
+                    hex = cmd.hex(' ')
+                    if isinstance(response, FunctionDisabled):
+                        block_disabled.append(hex)
+                    elif isinstance(response, TransmissionError):
+                        # no answer within probe timeout, the block is not 
+                        # marked done so that it is scanned again on resume
+                        complete = False
+                    elif isinstance(response, Exception):
+                        raise response
+                    else:
+                        block_res[hex] = response.hex(' ')
+                
+                checkpoint(cmd2, block_res, block_disabled, complete)
 
-        response = self._send_read(packet)
-        data = response[-3:-1]
-        return data
+    with ThreadPoolExecutor(max_workers=len(projectors)) as executor:
+        # propagate worker exceptions (e.g. ProjectorOFF), progress is kept
+        for future in [executor.submit(worker, proj) for proj in projectors]:
+            future.result()
 
-def scan(proj: ViewSonicProjector) -> Dict:
+    res = _read_json(scanfile, {})
+    res.update(progress['results'])
+    _write_json(scanfile, res)
 
-    res = {}
+    if incomplete:
+        print(f'blocks {", ".join(f"{cmd2:02x}" for cmd2 in sorted(incomplete))} had timeouts, scan again to resume them')
+    else:
+        # nothing to remove when every block was skipped
+        with suppress(FileNotFoundError):
+            os.remove(progress_path)
+
+    return res
+
+def scan(
+        proj: Union[ViewSonicProjector, List[ViewSonicProjector]],
+        cmd2_range: Optional[Iterable[int]] = None,
+        scanfile: str = SCANFILE,
+        probe_timeout: float = SCAN_PROBE_TIMEOUT_SECONDS,
+        resume: bool = True,
+        skip_disabled: bool = True
+    ) -> Dict:
+    '''
+    If the scan file exists and no cmd2_range is given, read again the 
+    commands it contains. Otherwise perform an exhaustive scan, limited to
+    cmd2_range if given. Several projectors can share an exhaustive scan.
+    '''
 
-    if os.path.exists(SCANFILE):
+    projectors = proj if isinstance(proj, list) else [proj]
 
-        print('scan file found, loading commands')
+    if cmd2_range is None and os.path.exists(scanfile):
 
-        with open(SCANFILE,'r') as f:
-            commands = json.load(f)
+        print('scan file found, loading commands')
+        commands = _read_json(scanfile, {})
+        return rescan(projectors[0], commands.keys(), probe_timeout)
+
+    print('performing an exhaustive scan')
+    return exhaustive_scan(
+        projectors,
+        range(256) if cmd2_range is None else cmd2_range,
+        scanfile,
+        probe_timeout,
+        resume,
+        skip_disabled
+    )
+
+def snapshot(
+        proj: ViewSonicProjector,
+        registers: Iterable[int],
+        probe_timeout: float = SCAN_PROBE_TIMEOUT_SECONDS
+    ) -> Dict[int, bytes]:
+    '''
+    read a list of registers, encoded as ints (cmd2 << 8 | cmd3).
+    Registers that timed out are read again once, those still missing
+    are left out: their value is unknown, not changed.
+    '''
 
-        for hex in commands.keys():
-            
-            if hex in [CMD.OPERATING_TEMPERATURE.hex(' '), CMD.UNKNOWN_STATUS_INFO.hex(' ')]:
-                continue
+    res = {}
+    todo = list(registers)
+    for attempt in range(2):
+        with proj.temporary_timeout(probe_timeout):
+            responses = proj._send_read_many([reg.to_bytes(2, 'big') for reg in todo], use_cache=False)
+
+        retry = []
+        for reg, response in zip(todo, responses):
+            if isinstance(response, ProjectorOFF):
+                raise response
+            if isinstance(response, TransmissionError):
+                retry.append(reg)
+            elif not isinstance(response, Exception):
+                res[reg] = response
+        if not retry:
+            break
+        todo = retry
+
+    return res
+
+class DiffIndex:
+    '''
+    Record which registers change between consecutive snapshots.
+    Only the last known value of each register is kept, changes are stored
+    as register -> list of action indices. A register missing from a 
+    snapshot (timed out) is not compared.
+    '''
 
-            cmd = bytes.fromhex(hex)
-            try:
-                response = proj._send_read(cmd)
-                res[cmd.hex(' ')] = response.hex(' ')
-            except FunctionDisabled:
-                pass
+    def __init__(self, baseline: Dict[int, bytes]):
+        self.previous = dict(baseline)
+        self.actions: List[str] = []
+        self.changes: Dict[int, List[int]] = {}
+
+    def add(self, action: str, snapshot: Dict[int, bytes]) -> List[int]:
+        index = len(self.actions)
+        self.actions.append(action)
+
+        previous = self.previous
+        changed = []
+        for reg, value in snapshot.items():
+            old = previous.get(reg)
+            if old is not None and old != value:
+                changed.append(reg)
+                self.changes.setdefault(reg, []).append(index)
+            # updated in place: only the registers of this snapshot are touched
+            previous[reg] = value
+        return changed
+
+    def report(self) -> Dict[str, List[str]]:
+        '''for each register that changed, the actions that changed it'''
+        return {
+            reg.to_bytes(2, 'big').hex(' '): [self.actions[i] for i in indices]
+            for reg, indices in sorted(self.changes.items())
+        }
+
+def reverse_engineer(
+        proj: ViewSonicProjector,
+        scanfile: str = SCANFILE
+    ) -> Dict[str, List[str]]:
+    '''reverse engineer command codes
+       - exhaustive scan of cmd2/cmd3 space using read query if there is no scan file yet (should be safe)
+       - loop: modify setting with projector OSD, then read again only the codes that answered during the scan
+       - check which values have changed after each action (some OSD settings alter several registers at once)
+       Returns, for each register, the list of actions that changed it.
+    '''
 
-    else:
+    if not os.path.exists(scanfile):
+        scan(proj, scanfile=scanfile)
 
-        print('scan file not found, performing an exhaustive scan')
+    volatile = [CMD.OPERATING_TEMPERATURE.hex(' '), CMD.UNKNOWN_STATUS_INFO.hex(' ')]
+    registers = [
+        int(hex.replace(' ', ''), 16) 
+        for hex in _read_json(scanfile, {}).keys()
+        if hex not in volatile
+    ]
 
-        for cmd2 in range(256): 
-            for cmd3 in range(256):
-                cmd = bytes([cmd2, cmd3])
-                try:
-                    response = proj._send_read(cmd)
-                    res[cmd.hex(' ')] = response.hex(' ')
-                except FunctionDisabled:
-                    pass
-        
-        with open(SCANFILE,'w') as f:
-            commands = json.dump(res,f)
-        
-    return res    
+    index = DiffIndex(snapshot(proj, registers))
 
-def reverse_engineer(proj: ViewSonicProjector):
-    '''reverse engineer command codes
-       - exhaustive scan of cmd2/cmd3 space using read query (should be safe)
-       - modify setting with projector OSD
-       - exhaustive scan of cmd2/cmd3 space using read query
-       - check which values have changed (hopefully only one, but some OSD settings might alter several registers at once)
-    '''
+    while True:
+        action = input('Change function on the projector using OSD. Describe the change and press Enter (empty to finish): ')
+        if not action:
+            break
+        changed = index.add(action, snapshot(proj, registers))
+        print('changed: ' + ', '.join(reg.to_bytes(2, 'big').hex(' ') for reg in changed))
 
-    scan1 = scan(proj)
-    input('Change function on the projector using OSD. Press Enter when done')
-    scan2 = scan(proj)
-    diff = set(scan1.items()) ^ set(scan2.items()) 
-    return diff
-    
-def set_fast_mode(proj: ViewSonicProjector) -> None:
-    # somehow this seems to be a bit unreliable
+    return index.report()
     
-    if proj.get_power_status() == PowerStatus.OFF:
-        proj.power_on()
-        
-    proj.reset_all_settings()
-    proj.set_mute(Bool.ON)
-    proj.set_source_input(SourceInput.HDMI_1)
-    proj.set_fast_input_mode(Bool.ON)
-    
-    if proj.get_fast_input_mode() == 0:
-        raise RuntimeError('failed to set to fast mode')
+def set_fast_mode(proj: ViewSonicProjector):
+    '''
+    Reset all settings, then select HDMI 1 with fast input mode on and 
+    sound muted. Waits for the reset to settle and verifies each setting,
+    returns the viewsonic_presets.PresetReport.
+    '''
 
+    # viewsonic_presets imports this module
+    from viewsonic_presets import apply_preset, FAST_MODE
+    return apply_preset(proj, FAST_MODE)
@@ -0,0 +1,363 @@
+import json
+import os
+import random
+import threading
+import time
+import tty
+from collections import deque
+from typing import Optional, Dict, Iterable
+
+from viewsonic_serial import (
+    CMD,
+    HEADER,
+    EMPTY,
+    SCANFILE,
+    REGISTERS,
+    Adjustment,
+    PowerStatus,
+    checksum,
+    payload_length,
+    int_to_two_bytes,
+    two_bytes_to_int
+)
+from viewsonic_transport import MemoryTransport
+
+SIM_WARM_UP_SECONDS = 20.0
+SIM_COOL_DOWN_SECONDS = 20.0
+SIM_INT_RANGE = (-50, 50)
+
+# registers read as 2 bytes
+TWO_BYTE_REGISTERS = [reg.cmd for reg in REGISTERS if reg.width == 2]
+
+# commands without a register of their own
+ACTION_COMMANDS = [
+    CMD.POWER_OFF,
+    CMD.RESET_ALL_SETTINGS,
+    CMD.RESET_COLOR_SETTINGS,
+    CMD.RESET_TO_FACTORY_DEFAULT,
+    CMD.AUTO_ADJUST,
+    CMD.COLOR_MODE_CYCLE,
+    CMD.ASPECT_RATIO_CYCLE,
+    CMD.AUDIO_MODE_CYCLE,
+    CMD.LAMP_MODE_CYCLE,
+    CMD.VOLUME_UP,
+    CMD.VOLUME_DOWN,
+    CMD.SET_VOLUME_LEVEL,
+    CMD.COLOR_TEMPERATURE_RED_GAIN_ADJUST,
+    CMD.COLOR_TEMPERATURE_GREEN_GAIN_ADJUST,
+    CMD.COLOR_TEMPERATURE_BLUE_GAIN_ADJUST,
+    CMD.COLOR_TEMPERATURE_RED_OFFSET_ADJUST,
+    CMD.COLOR_TEMPERATURE_GREEN_OFFSET_ADJUST,
+    CMD.COLOR_TEMPERATURE_BLUE_OFFSET_ADJUST
+]
+
+# write command -> register changed by one step, for Adjustment writes
+ADJUSTMENTS = {reg.adjust: reg.cmd for reg in REGISTERS if reg.adjust is not None}
+
+def default_registers() -> Dict[bytes, bytes]:
+    '''register file used when no scan file is available'''
+
+    registers = {}
+    for cmd in CMD:
+        if len(cmd) != 2 or cmd in ACTION_COMMANDS:
+            continue
+        registers[bytes(cmd)] = b'\x00\x00' if cmd in TWO_BYTE_REGISTERS else EMPTY
+
+    registers[bytes(CMD.SERIAL_NUMBER)] = b'SIM0000000001'
+    registers[bytes(CMD.PROJECTOR_MODEL)] = b'SIMULATOR' + bytes(5)
+    registers[bytes(CMD.FIRMWARE_VERSION)] = b'V0.00S' + bytes(14)
+    registers[bytes(CMD.ERROR_STATUS)] = bytes(24)
+    registers[bytes(CMD.UNKNOWN_STATUS_INFO)] = bytes(6)
+    registers[bytes(CMD.LIGHT_SOURCE_USAGE_TIME)] = (0).to_bytes(4, 'little')
+    registers[bytes(CMD.OPERATING_TEMPERATURE)] = (350).to_bytes(8, 'little')
+    registers[bytes(CMD.VOLUME)] = b'\x0a'
+    return registers
+
+def registers_from_scan(scanfile: str = SCANFILE) -> Dict[bytes, bytes]:
+    '''register file from the responses recorded by scan()'''
+
+    with open(scanfile, 'r') as f:
+        commands = json.load(f)
+
+    registers = {}
+    for hex, response in commands.items():
+        response = bytes.fromhex(response)
+        registers[bytes.fromhex(hex)] = response[7:-1]
+    return registers
+
+def response_frame(data: bytes) -> bytes:
+    '''read response for a register holding data'''
+    length = len(data) + 2
+    frame = b'\x05\x14' + EMPTY + length.to_bytes(2, 'little') + b'\x00\x00' + data
+    return frame + checksum(frame)
+
+class ProjectorSimulator:
+    '''
+    Pure-Python model of a ViewSonic projector speaking the RS232 protocol.
+    - register file, seeded from a scan file or from default_registers()
+    - power state machine with warm up and cool down durations
+    - DISABLED replies for unknown registers, PROJ_OFF replies while not ON
+    - configurable latency and jitter, baud rate transmission time
+    - injected checksum errors and dropped replies
+    handle() maps a query frame to a response frame. Connect a client with
+    SimulatedTransport (in-process) or serve_pty() (pseudo terminal).
+    '''
+
+    def __init__(
+        self,
+        registers: Optional[Dict[bytes, bytes]] = None,
+        power: PowerStatus = PowerStatus.ON,
+        warm_up_seconds: float = SIM_WARM_UP_SECONDS,
+        cool_down_seconds: float = SIM_COOL_DOWN_SECONDS,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        baudrate: Optional[int] = None,
+        checksum_error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        int_range: tuple = SIM_INT_RANGE,
+        disabled: Iterable[bytes] = (),
+        seed: Optional[int] = None
+        ):
+
+        self.registers = default_registers() if registers is None else dict(registers)
+        self.warm_up_seconds = warm_up_seconds
+        self.cool_down_seconds = cool_down_seconds
+        self.latency = latency
+        self.jitter = jitter
+        self.baudrate = baudrate
+        self.checksum_error_rate = checksum_error_rate
+        self.drop_rate = drop_rate
+        self.int_range = int_range
+        self.disabled = set(bytes(c) for c in disabled)
+        self.random = random.Random(seed)
+
+        self.queries = 0
+        self._lock = threading.Lock()
+        self._power = power
+        self._transition_end = 0.0
+
+    @classmethod
+    def from_scan(cls, scanfile: str = SCANFILE, **kwargs) -> 'ProjectorSimulator':
+        return cls(registers_from_scan(scanfile), **kwargs)
+
+    @property
+    def power_status(self) -> PowerStatus:
+        if self._power == PowerStatus.WARM_UP and time.monotonic() >= self._transition_end:
+            self._power = PowerStatus.ON
+        elif self._power == PowerStatus.COOL_DOWN and time.monotonic() >= self._transition_end:
+            self._power = PowerStatus.OFF
+        return self._power
+
+    def delay(self, num_bytes: int) -> float:
+        '''time before the response is fully received'''
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if self.baudrate is not None:
+            # 10 bits per byte on the wire: start, 8 data bits, stop
+            delay += 10 * num_bytes / self.baudrate
+        return delay
+
+    def handle(self, query: bytes) -> bytes:
+        '''process a complete query frame, return the response frame (possibly empty)'''
+
+        with self._lock:
+            self.queries += 1
+
+            if len(query) < HEADER.NUM_BYTES + 2 or checksum(query[:-1]) != query[-1:]:
+                return b''
+
+            if self.drop_rate and self.random.random() < self.drop_rate:
+                return b''
+
+            response = self._process(query)
+
+            if self.checksum_error_rate and self.random.random() < self.checksum_error_rate:
+                response = response[:-1] + bytes([(response[-1] + 1) % 256])
+
+            return response
+
+    def _process(self, query: bytes) -> bytes:
+
+        if query[0] == HEADER.READ[0]:
+            return self._read(query[8:-1])
+
+        if query[0] == HEADER.WRITE_ONE_BYTE[0]:
+            return self._write(query[6:-1])
+
+        return HEADER.DISABLED
+
+    def _read(self, cmd: bytes) -> bytes:
+
+        if cmd == CMD.POWER_ON:
+            return response_frame(self.power_status)
+
+        if self.power_status != PowerStatus.ON:
+            return HEADER.PROJ_OFF
+
+        if cmd in self.disabled or cmd not in self.registers:
+            return HEADER.DISABLED
+
+        return response_frame(self.registers[cmd])
+
+    def _write(self, packet: bytes) -> bytes:
+
+        if packet[:2] == CMD.POWER_ON:
+            if self.power_status == PowerStatus.OFF:
+                self._power = PowerStatus.WARM_UP
+                self._transition_end = time.monotonic() + self.warm_up_seconds
+            return HEADER.ACK
+
+        if packet[:2] == CMD.POWER_OFF:
+            if self.power_status == PowerStatus.ON:
+                self._power = PowerStatus.COOL_DOWN
+                self._transition_end = time.monotonic() + self.cool_down_seconds
+            return HEADER.ACK
+
+        if self.power_status != PowerStatus.ON:
+            return HEADER.PROJ_OFF
+
+        if packet[:2] in self.disabled:
+            return HEADER.DISABLED
+
+        for cmd in (packet[:3], packet[:2]):
+            if cmd in ADJUSTMENTS and packet[len(cmd):] in (Adjustment.INCREASE, Adjustment.DECREASE):
+                self._adjust(ADJUSTMENTS[cmd], packet[len(cmd):] == Adjustment.INCREASE)
+                return HEADER.ACK
+
+        cmd, data = packet[:2], packet[2:]
+
+        if cmd == CMD.VOLUME_UP or cmd == CMD.VOLUME_DOWN:
+            self._adjust(bytes(CMD.VOLUME), cmd == CMD.VOLUME_UP)
+            return HEADER.ACK
+
+        if cmd in self.registers:
+            self.registers[cmd] = data
+            return HEADER.ACK
+
+        if cmd in ACTION_COMMANDS:
+            return HEADER.ACK
+
+        return HEADER.DISABLED
+
+    def _adjust(self, register: bytes, increase: bool) -> None:
+
+        low, high = self.int_range
+        value = self.registers.get(register, b'\x00\x00')
+
+        if len(value) == 2:
+            new = two_bytes_to_int(value) + (1 if increase else -1)
+            self.registers[register] = int_to_two_bytes(min(high, max(low, new)))
+        else:
+            new = value[0] + (1 if increase else -1)
+            self.registers[register] = bytes([min(max(0, high), max(0, new))])
+
+    def serve_pty(self) -> str:
+        '''
+        Serve the protocol on a pseudo terminal from a daemon thread.
+        Returns the device name to open with ViewSonicProjector(port=...).
+        '''
+
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        self._slave = slave # keep the slave end open
+        threading.Thread(target=self._serve_fd, args=(master,), daemon=True).start()
+        return os.ttyname(slave)
+
+    def _serve_fd(self, fd: int) -> None:
+
+        def read_exactly(n: int) -> bytes:
+            data = b''
+            while len(data) < n:
+                chunk = os.read(fd, n - len(data))
+                if not chunk:
+                    raise EOFError
+                data += chunk
+            return data
+
+        try:
+            while True:
+                header = read_exactly(HEADER.NUM_BYTES)
+                query = header + read_exactly(payload_length(header))
+                response = self.handle(query)
+                time.sleep(self.delay(len(query) + len(response)))
+                os.write(fd, response)
+        except (EOFError, OSError):
+            os.close(fd)
+
+class SimulatedTransport(MemoryTransport):
+    '''
+    In-process transport wired to a ProjectorSimulator, usable as 
+    ViewSonicProjector(transport=SimulatedTransport(sim)).
+    Each response becomes readable after its simulated delay, and not
+    before the previous one went through the wire.
+    At most queue_depth queries can wait for an answer, further ones are
+    lost like on a firmware with a small receive buffer.
+    Reads that cannot be satisfied block for the timeout like a real port.
+    '''
+
+    def __init__(
+        self, 
+        simulator: ProjectorSimulator, 
+        timeout: Optional[float] = 10.0,
+        baudrate: Optional[int] = None,
+        queue_depth: Optional[int] = None
+        ):
+        super().__init__(simulator.handle, timeout)
+        self.simulator = simulator
+        self.baudrate = simulator.baudrate if baudrate is None else baudrate
+        self.queue_depth = queue_depth
+        self._pending: deque = deque()
+
+    def _receive(self) -> None:
+        '''move the responses whose delay elapsed to the receive buffer'''
+        now = time.monotonic()
+        while self._pending and self._pending[0][0] <= now:
+            self._rx += self._pending.popleft()[1]
+
+    @property
+    def in_waiting(self) -> int:
+        self._receive()
+        return len(self._rx)
+
+    def write(self, data: bytes) -> int:
+        if self.simulator.baudrate is not None and self.baudrate != self.simulator.baudrate:
+            # framing errors on the projector side, no answer
+            return len(data)
+
+        now = time.monotonic()
+        self._receive()
+        if self.queue_depth is not None and len(self._pending) >= self.queue_depth:
+            return len(data)
+
+        response = self.simulator.handle(bytes(data))
+        ready_at = now + self.simulator.delay(len(data) + len(response))
+        if self._pending and self.simulator.baudrate is not None:
+            # the link latency overlaps, bytes on the wire do not
+            ready_at = max(ready_at, self._pending[-1][0] + 10 * len(response) / self.simulator.baudrate)
+        self._pending.append((ready_at, response))
+        return len(data)
+
+    def readinto(self, buffer) -> int:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        while True:
+            self._receive()
+            if len(self._rx) >= len(buffer):
+                break
+
+            # nothing more will come: a real port blocks until timeout
+            ready_at = self._pending[0][0] if self._pending else float('inf')
+            if deadline is not None:
+                ready_at = min(ready_at, deadline)
+            if ready_at == float('inf'):
+                break
+
+            time.sleep(max(0.0, ready_at - time.monotonic()))
+            if deadline is not None and time.monotonic() >= deadline:
+                self._receive()
+                break
+
+        return super().readinto(buffer)
+
+    def reset_input_buffer(self) -> None:
+        self._receive()
+        super().reset_input_buffer()
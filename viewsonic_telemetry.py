@@ -0,0 +1,298 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Optional, Dict, Callable, List, Tuple, Iterator, NamedTuple, Sequence, Union
+
+from viewsonic_serial import (
+    ViewSonicProjector,
+    CMD,
+    FunctionDisabled,
+    ProjectorOFF,
+    TransmissionError
+)
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_CAPACITY = 1024
+STREAM_QUEUE_SIZE = 1024
+
+# default sampling interval of each metric, in seconds
+DEFAULT_INTERVALS = {
+    'temperature': 10.0,
+    'light_source_usage_time': 300.0,
+    'error_status': 30.0,
+    'unknown_status_info': 60.0
+}
+
+ERROR_COUNT_FIELDS = [
+    'lamp_fail_count',
+    'lamp_lit_error_count',
+    'fan1_error_count',
+    'fan2_error_count',
+    'fan3_error_count',
+    'fan4_error_count',
+    'diode1_open_error_count',
+    'diode2_open_error_count',
+    'diode1_short_error_count',
+    'diode2_short_error_count',
+    'temperature1_error_count',
+    'temperature2_error_count',
+    'fan_IC1_error_count',
+    'color_wheel_error_count',
+    'color_wheel_startup_error_count',
+    'UART1_error_count'
+]
+
+class TelemetryEvent(NamedTuple):
+    '''
+    kind is 'sample' for a new measurement, 'error' when an error counter
+    increased and 'failure' when the projector could not be read.
+    '''
+    time: float
+    metric: str
+    kind: str
+    name: str
+    value: float
+    delta: float = 0
+
+class RingBuffer:
+    '''
+    Fixed size buffer of timestamped samples stored in flat arrays.
+    Each sample holds `channels` values.
+    '''
+
+    def __init__(self, capacity: int = TELEMETRY_CAPACITY, typecode: str = 'd', channels: int = 1):
+        self.capacity = capacity
+        self.channels = channels
+        self.times = array('d', [0.0]) * capacity
+        self.values = array(typecode, [0]) * (capacity * channels)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp: float, values: Sequence) -> None:
+        i = self.count % self.capacity
+        self.times[i] = timestamp
+        self.values[i*self.channels:(i+1)*self.channels] = array(self.values.typecode, values)
+        self.count += 1
+
+    def latest(self) -> Optional[Tuple[float, array]]:
+        if self.count == 0:
+            return None
+        i = (self.count - 1) % self.capacity
+        return self.times[i], self.values[i*self.channels:(i+1)*self.channels]
+
+    def samples(self) -> Iterator[Tuple[float, array]]:
+        '''iterate samples from oldest to newest'''
+        start = self.count - len(self)
+        for n in range(start, self.count):
+            i = n % self.capacity
+            yield self.times[i], self.values[i*self.channels:(i+1)*self.channels]
+
+class SampleLog:
+    '''
+    RingBuffer interface for samples that do not fit a fixed size array,
+    such as raw payloads.
+    '''
+
+    def __init__(self, capacity: int = TELEMETRY_CAPACITY):
+        self.capacity = capacity
+        self._samples: deque = deque(maxlen=capacity)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def append(self, timestamp: float, values: Sequence) -> None:
+        self._samples.append((timestamp, tuple(values)))
+        self.count += 1
+
+    def latest(self) -> Optional[Tuple[float, tuple]]:
+        return self._samples[-1] if self._samples else None
+
+    def samples(self) -> Iterator[Tuple[float, tuple]]:
+        return iter(list(self._samples))
+
+def read_unknown_status_info(proj: ViewSonicProjector) -> bytes:
+    '''undocumented register 0c 0f, a few bytes that change with time'''
+    response = proj._send_read(CMD.UNKNOWN_STATUS_INFO, use_cache=False)
+    return bytes(response[7:-1])
+
+class TelemetryMonitor:
+    '''
+    Sample temperature, light source usage, error counters and the
+    undocumented status register in a background thread, each metric on its
+    own schedule. Samples are kept in RingBuffers (raw bytes of the
+    undocumented register in a SampleLog) and pushed to callbacks
+    and to stream() consumers. An increase of any error counter immediately
+    emits an 'error' event. A failed read emits a 'failure' event and is
+    counted in failures by exception type; the metric keeps being sampled,
+    unless the model does not support it. Unexpected exceptions are
+    also logged.
+
+    The monitor issues commands from its own thread: share the port with
+    other threads only through a thread-safe connection.
+    '''
+
+    def __init__(
+        self,
+        proj: ViewSonicProjector,
+        intervals: Optional[Dict[str, float]] = None,
+        capacity: int = TELEMETRY_CAPACITY
+        ):
+
+        self.proj = proj
+        self.intervals = dict(DEFAULT_INTERVALS if intervals is None else intervals)
+
+        self.readers: Dict[str, Callable[[], Sequence]] = {
+            'temperature': lambda: (proj.get_operating_temperature(),),
+            'light_source_usage_time': lambda: (proj.get_light_source_usage_time(),),
+            'error_status': self._read_error_counts,
+            'unknown_status_info': lambda: (read_unknown_status_info(proj),)
+        }
+        unknown = set(self.intervals) - set(self.readers)
+        if unknown:
+            raise ValueError(f'unknown metrics: {unknown}')
+
+        self.buffers: Dict[str, Union[RingBuffer, SampleLog]] = {
+            'temperature': RingBuffer(capacity, 'd'),
+            'light_source_usage_time': RingBuffer(capacity, 'L'),
+            'error_status': RingBuffer(capacity, 'B', len(ERROR_COUNT_FIELDS)),
+            # its length is unknown, it would not fit a fixed size integer
+            'unknown_status_info': SampleLog(capacity)
+        }
+
+        self.callbacks: List[Callable[[TelemetryEvent], None]] = []
+        self.failures: Dict[str, int] = {}
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'TelemetryMonitor':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='TelemetryMonitor', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            for q in self._subscribers:
+                self._put(q, None)
+
+    def add_callback(self, callback: Callable[[TelemetryEvent], None]) -> None:
+        self.callbacks.append(callback)
+
+    def stream(self, kinds: Optional[Sequence[str]] = None) -> Iterator[TelemetryEvent]:
+        '''yield events as they are produced, until the monitor stops'''
+
+        q = queue.Queue(STREAM_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.append(q)
+        try:
+            while True:
+                event = q.get()
+                if event is None:
+                    return
+                if kinds is None or event.kind in kinds:
+                    yield event
+        finally:
+            with self._lock:
+                self._subscribers.remove(q)
+
+    def sample(self, metric: str) -> None:
+        '''read one metric now, store it and emit the corresponding events'''
+
+        timestamp = time.time()
+        values = self.readers[metric]()
+
+        buffer = self.buffers[metric]
+        previous = buffer.latest()
+        buffer.append(timestamp, values)
+
+        if metric == 'error_status':
+            if previous is not None:
+                for name, old, new in zip(ERROR_COUNT_FIELDS, previous[1], values):
+                    if new > old:
+                        self._emit(TelemetryEvent(timestamp, metric, 'error', name, new, new - old))
+            return
+
+        value = values[0]
+        if isinstance(value, bytes):
+            value = int.from_bytes(value, byteorder='little')
+        self._emit(TelemetryEvent(timestamp, metric, 'sample', metric, value))
+
+    def _read_error_counts(self) -> List[int]:
+        err = self.proj.get_error_status()
+        return [err[name] for name in ERROR_COUNT_FIELDS]
+
+    def _run(self) -> None:
+
+        now = time.monotonic()
+        schedule = [(now, metric) for metric in self.intervals]
+        heapq.heapify(schedule)
+
+        while schedule and not self._stop.is_set():
+            due, metric = heapq.heappop(schedule)
+            if self._stop.wait(max(0.0, due - time.monotonic())):
+                return
+
+            try:
+                self.sample(metric)
+            except FunctionDisabled:
+                # not available on this model, stop sampling it
+                continue
+            except (ProjectorOFF, TransmissionError) as e:
+                self._failed(metric, e)
+            except Exception as e:
+                # e.g. a malformed response, must not kill the monitor thread
+                logger.exception('telemetry sampling of %s failed', metric)
+                self._failed(metric, e)
+
+            heapq.heappush(schedule, (max(due + self.intervals[metric], time.monotonic()), metric))
+
+    def _failed(self, metric: str, error: Exception) -> None:
+        name = type(error).__name__
+        self.failures[name] = self.failures.get(name, 0) + 1
+        self._emit(TelemetryEvent(time.time(), metric, 'failure', name, 0))
+
+    def _emit(self, event: TelemetryEvent) -> None:
+        for callback in self.callbacks:
+            try:
+                callback(event)
+            except Exception:
+                # a failing callback must not stop the sampling
+                logger.exception('telemetry callback %r failed on %s', callback, event)
+        with self._lock:
+            for q in self._subscribers:
+                self._put(q, event)
+
+    @staticmethod
+    def _put(q: queue.Queue, event: Optional[TelemetryEvent]) -> None:
+        # slow consumers lose the oldest events rather than blocking sampling
+        while True:
+            try:
+                q.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
@@ -0,0 +1,323 @@
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Callable, Tuple
+
+TCP_CONNECT_TIMEOUT_SECONDS = 5.0
+TCP_KEEPALIVE_IDLE_SECONDS = 30
+TCP_KEEPALIVE_INTERVAL_SECONDS = 10
+TCP_KEEPALIVE_COUNT = 3
+POOL_MAX_IDLE_SECONDS = 300.0
+POOL_ACQUIRE_TIMEOUT_SECONDS = 30.0
+
+class Transport(ABC):
+    '''
+    Byte stream used by ViewSonicProjector, with serial port semantics:
+    reads block for at most `timeout` seconds and may return fewer bytes.
+    '''
+
+    timeout: Optional[float] = None
+
+    @abstractmethod
+    def write(self, data: bytes) -> int:
+        pass
+
+    @abstractmethod
+    def readinto(self, buffer) -> int:
+        pass
+
+    def read(self, size: int = 1) -> bytes:
+        buffer = bytearray(size)
+        n = self.readinto(buffer)
+        return bytes(buffer[:n])
+
+    def reset_input_buffer(self) -> None:
+        pass
+
+    def reset_output_buffer(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+class SerialTransport(Transport):
+    '''pyserial backend'''
+
+    def __init__(self, **kwargs):
+        import serial
+        self.ser = serial.Serial(**kwargs)
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return self.ser.timeout
+
+    @timeout.setter
+    def timeout(self, value: Optional[float]) -> None:
+        self.ser.timeout = value
+
+    @property
+    def baudrate(self) -> int:
+        return self.ser.baudrate
+
+    @baudrate.setter
+    def baudrate(self, value: int) -> None:
+        self.ser.baudrate = value
+
+    def write(self, data: bytes) -> int:
+        return self.ser.write(data)
+
+    def readinto(self, buffer) -> int:
+        return self.ser.readinto(buffer)
+
+    def read(self, size: int = 1) -> bytes:
+        return self.ser.read(size)
+
+    def reset_input_buffer(self) -> None:
+        self.ser.reset_input_buffer()
+
+    def reset_output_buffer(self) -> None:
+        self.ser.reset_output_buffer()
+
+    def close(self) -> None:
+        self.ser.close()
+
+class TCPTransport(Transport):
+    '''
+    Raw TCP socket to a serial device server or a LAN control port.
+    TCP keepalive is enabled and the socket is reopened transparently when
+    the peer dropped it.
+    '''
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = 10.0,
+        connect_timeout: float = TCP_CONNECT_TIMEOUT_SECONDS
+        ):
+
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self._timeout = timeout
+        self.sock: Optional[socket.socket] = None
+        self.reconnects = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value: Optional[float]) -> None:
+        self._timeout = value
+        if self.sock is not None:
+            self.sock.settimeout(value)
+
+    def connect(self) -> None:
+        self.disconnect()
+        sock = socket.create_connection((self.host, self.port), self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for name, value in [
+                ('TCP_KEEPIDLE', TCP_KEEPALIVE_IDLE_SECONDS),
+                ('TCP_KEEPINTVL', TCP_KEEPALIVE_INTERVAL_SECONDS),
+                ('TCP_KEEPCNT', TCP_KEEPALIVE_COUNT)
+            ]:
+            if hasattr(socket, name):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+        sock.settimeout(self._timeout)
+        self.sock = sock
+
+    def write(self, data: bytes) -> int:
+        if self.sock is None:
+            self.connect()
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            # stale connection, reconnect once and resend
+            self.reconnects += 1
+            self.connect()
+            self.sock.sendall(data)
+        self.last_used = time.monotonic()
+        return len(data)
+
+    def readinto(self, buffer) -> int:
+        if self.sock is None:
+            return 0
+
+        view = memoryview(buffer)
+        total = 0
+        deadline = None if self._timeout is None else time.monotonic() + self._timeout
+
+        while total < len(view):
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.sock.settimeout(remaining)
+            try:
+                n = self.sock.recv_into(view[total:])
+            except socket.timeout:
+                break
+            except OSError:
+                self.disconnect()
+                break
+            if n == 0:
+                # peer closed, reconnect on next write
+                self.disconnect()
+                break
+            total += n
+
+        if self.sock is not None:
+            self.sock.settimeout(self._timeout)
+        self.last_used = time.monotonic()
+        return total
+
+    def reset_input_buffer(self) -> None:
+        '''discard bytes already received'''
+        if self.sock is None:
+            return
+        self.sock.setblocking(False)
+        try:
+            while self.sock.recv(4096):
+                pass
+            # empty read: the peer closed the connection
+            self.disconnect()
+            return
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self.disconnect()
+            return
+        self.sock.settimeout(self._timeout)
+
+    def disconnect(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+
+    def close(self) -> None:
+        self.disconnect()
+
+class PooledTCPTransport(TCPTransport):
+    '''TCPTransport whose close() hands the socket back to its pool'''
+
+    def __init__(self, pool: 'TCPConnectionPool', *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = pool
+
+    def close(self) -> None:
+        self.pool.release(self)
+
+class TCPConnectionPool:
+    '''
+    Keep TCP connections open between uses. Serial device servers
+    usually accept a single client per port, so each address has one
+    connection, leased to one user at a time.
+    '''
+
+    def __init__(
+        self,
+        max_idle: float = POOL_MAX_IDLE_SECONDS,
+        acquire_timeout: float = POOL_ACQUIRE_TIMEOUT_SECONDS
+        ):
+
+        self.max_idle = max_idle
+        self.acquire_timeout = acquire_timeout
+        self._idle: Dict[Tuple[str, int], PooledTCPTransport] = {}
+        self._leased: Dict[Tuple[str, int], PooledTCPTransport] = {}
+        self._cond = threading.Condition()
+
+    def acquire(self, host: str, port: int, timeout: Optional[float] = 10.0) -> PooledTCPTransport:
+        key = (host, port)
+        deadline = time.monotonic() + self.acquire_timeout
+
+        with self._cond:
+            while key in self._leased:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f'{host}:{port} is in use')
+                self._cond.wait(remaining)
+
+            transport = self._idle.pop(key, None)
+            if transport is None:
+                transport = PooledTCPTransport(self, host, port, timeout)
+            elif time.monotonic() - transport.last_used > self.max_idle:
+                transport.disconnect()
+
+            transport.timeout = timeout
+            self._leased[key] = transport
+
+        if transport.sock is None:
+            transport.connect()
+        return transport
+
+    def release(self, transport: PooledTCPTransport) -> None:
+        key = (transport.host, transport.port)
+        with self._cond:
+            if self._leased.get(key) is transport:
+                del self._leased[key]
+                self._idle[key] = transport
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        '''close idle connections'''
+        with self._cond:
+            for transport in self._idle.values():
+                transport.disconnect()
+            self._idle.clear()
+
+DEFAULT_POOL = TCPConnectionPool()
+
+class MemoryTransport(Transport):
+    '''
+    In-memory transport: every write is answered by handler(query),
+    e.g. a ProjectorSimulator. Reads return immediately.
+    '''
+
+    def __init__(self, handler: Callable[[bytes], bytes], timeout: Optional[float] = 10.0):
+        self.handler = handler
+        self.timeout = timeout
+        self.is_open = True
+        self._rx = bytearray()
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._rx)
+
+    def write(self, data: bytes) -> int:
+        self._rx += self.handler(bytes(data))
+        return len(data)
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), len(self._rx))
+        buffer[:n] = self._rx[:n]
+        del self._rx[:n]
+        return n
+
+    def reset_input_buffer(self) -> None:
+        self._rx.clear()
+
+    def close(self) -> None:
+        self.is_open = False
+
+def open_transport(
+        port: str,
+        timeout: Optional[float] = 10.0,
+        pool: TCPConnectionPool = DEFAULT_POOL,
+        **serial_kwargs
+    ) -> Transport:
+    '''
+    tcp://host:port opens a pooled TCP connection,
+    anything else is a serial port for pyserial
+    '''
+
+    if port.startswith('tcp://'):
+        host, _, tcp_port = port[len('tcp://'):].rpartition(':')
+        return pool.acquire(host, int(tcp_port), timeout)
+
+    return SerialTransport(port=port, timeout=timeout, **serial_kwargs)